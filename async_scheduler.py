@@ -0,0 +1,350 @@
+"""Play hundreds of games in one process from a matchup spec.
+
+    python async_scheduler.py matchups.json --concurrent_games 200 --call_limit gemini=32
+
+Games spend nearly all their time waiting for LLM responses, so instead of
+a process per game every LLM call is made on one asyncio event loop with
+the async OpenAI client. The game logic itself is synchronous, so each game
+runs on a lightweight thread that blocks while its call is in flight.
+
+Calls are limited per provider/model by --call_limit (a limit given for a
+provider alone is shared by all its models), and when a limit is reached
+the waiting call from the game closest to finishing goes first, so
+completed games keep coming. Results are appended to <output>/results.jsonl
+in the same format as tournament.py.
+
+Games share the process-wide `random` module, so unlike tournament.py a
+game's seed does not reproduce it, and file logging is off because
+GameLogger's loggers are process-global.
+
+--trace PATH writes a Chrome Trace Event timeline with every game on its own
+track (see tracing.py), and --metrics_port serves live metrics, including
+each rate limiter's state, and a status page (see metrics_server.py).
+"""
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import batch_mode
+import llm_interface
+from metrics_server import MetricsServer, build_metrics
+from secret_hitler_game import GameRunner
+from telemetry import TELEMETRY
+from tournament import expand_games, game_config, game_result, load_results, load_spec, print_summary
+import tracing
+
+
+class PrioritySemaphore:
+    """asyncio semaphore whose waiters are woken lowest priority value first."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_use = 0
+        self._waiters = []
+        self._order = itertools.count()
+
+    async def acquire(self, priority):
+        if self.in_use < self.limit and not self._waiters:
+            self.in_use += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), waiter))
+        try:
+            await waiter  # release() hands its slot straight to us
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_use -= 1
+
+
+def game_progress(game_state):
+    """How close a game is to a policy win, from 0 to 1."""
+    if game_state is None:
+        return 0.0
+    return max(game_state.lib_policies / 5, game_state.fasc_policies / 6)
+
+
+class _ThreadConsole:
+    """sys.stdout replacement that sends game threads' output to their own
+    stream and everything else to the real stdout."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        return getattr(self.local, "target", self.stream).write(text)
+
+    def flush(self):
+        getattr(self.local, "target", self.stream).flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class _ScheduledClient:
+    """Stands in for a player's LLM client and runs its calls on the
+    scheduler's event loop."""
+
+    def __init__(self, scheduler, client, provider_name, runner):
+        self.scheduler = scheduler
+        self.client = client
+        self.provider_name = provider_name
+        self.runner = runner
+
+    def chat_completion(self, model_name, messages, **kwargs):
+        if self.scheduler.batch:
+            return self.scheduler.batch.chat_completion(self.client, model_name, messages, kwargs)
+        priority = -game_progress(self.runner.game_state)
+        call = self.scheduler.call(self.client, self.provider_name, model_name, priority,
+                                   messages, kwargs)
+        return asyncio.run_coroutine_threadsafe(call, self.scheduler.loop).result()
+
+
+class _ScheduledPlayer:
+    """Wraps a player interface to enforce the game's deadline; game threads
+    cannot be interrupted, so the check runs before every decision."""
+
+    def __init__(self, player, deadline):
+        self.player = player
+        self.deadline = deadline
+
+    def get_llm_response(self, *args, **kwargs):
+        if self.deadline and time.monotonic() > self.deadline:
+            raise TimeoutError("Game timed out")
+        return self.player.get_llm_response(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.player, name)
+
+
+class AsyncScheduler:
+    def __init__(self, concurrent_games, call_limits=None, default_call_limit=16, timeout=0,
+                 results_db=None, batch=None):
+        self.concurrent_games = concurrent_games
+        self.results_db = results_db
+        self.call_limits = call_limits or {}
+        self.default_call_limit = default_call_limit
+        self.timeout = timeout
+        self.loop = None
+        self._semaphores = {}
+        # For metrics(): the runners of the games being played
+        self.runners = {}
+        self.finished = Counter()
+        self.started_at = time.time()
+        # batch_mode.BatchCollector, which sends calls once every game playing is waiting
+        self.batch = batch
+        self.playing = 0
+        self._playing_lock = threading.Lock()
+
+    def _semaphore(self, provider_name, model_name):
+        key = f"{provider_name}/{model_name}"
+        if key not in self.call_limits and provider_name in self.call_limits:
+            key = provider_name
+        if key not in self._semaphores:
+            self._semaphores[key] = PrioritySemaphore(
+                self.call_limits.get(key, self.default_call_limit))
+        return self._semaphores[key]
+
+    async def call(self, client, provider_name, model_name, priority, messages, kwargs):
+        semaphore = self._semaphore(provider_name, model_name)
+        queued = time.perf_counter()
+        await semaphore.acquire(priority)
+        queue_wait = time.perf_counter() - queued
+        try:
+            response = await client.async_chat_completion(model_name, messages, **kwargs)
+        finally:
+            semaphore.release()
+        # Read by LLMPlayerInterface's call telemetry
+        response.queue_wait = queue_wait
+        return response
+
+    def _play(self, game):
+        # Runs on a game thread
+        sys.stdout.local.target = self._discard
+        with self._playing_lock:
+            self.playing += 1
+        try:
+            return self._play_game(game)
+        finally:
+            with self._playing_lock:
+                self.playing -= 1
+            if self.batch:
+                self.batch.notify()
+
+    def _play_game(self, game):
+        start = time.perf_counter()
+        runner = GameRunner(game_config(game, log_dir=None, log_to_file=False, results_db=self.results_db),
+                            game_key=game["game_id"])
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        for name, player in runner.player_llm_configs.items():
+            if hasattr(player, "llm_client"):
+                # Replace the player's reference only; the pooled client is shared
+                player.llm_client = _ScheduledClient(self, player.llm_client, player.provider_name, runner)
+            runner.player_llm_configs[name] = _ScheduledPlayer(player, deadline)
+        self.runners[game["game_id"]] = runner
+        try:
+            runner.run_game()
+        finally:
+            del self.runners[game["game_id"]]
+        return game_result(game, runner.game_state, time.perf_counter() - start, runner.player_llm_configs)
+
+    async def _run(self, games, retries, on_result):
+        self.loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.concurrent_games, thread_name_prefix="game")
+
+        async def play(game):
+            for attempt in range(1, retries + 2):
+                try:
+                    result = await self.loop.run_in_executor(executor, self._play, game)
+                    break
+                except Exception as e:
+                    print(f"{game['game_id']} failed (attempt {attempt}): {e!r}")
+                    result = {"game_id": game["game_id"], "matchup": game["matchup"],
+                              "seed": game["seed"], "status": "failed", "error": repr(e)}
+            result["attempts"] = attempt
+            self.finished[result["status"]] += 1
+            on_result(result)
+
+        try:
+            await asyncio.gather(*(play(game) for game in games))
+        finally:
+            executor.shutdown(wait=True)
+
+    def metrics(self):
+        """Live metrics for MetricsServer; called from its thread."""
+        limiters = {key: {"limit": semaphore.limit, "in_use": semaphore.in_use,
+                          "waiting": len(semaphore._waiters)}
+                    for key, semaphore in list(self._semaphores.items())}
+        statuses = [runner.status() for runner in list(self.runners.values())]
+        return build_metrics(self.started_at, statuses, Counter(self.finished), TELEMETRY,
+                             rate_limiters=limiters)
+
+    def run(self, games, retries=1, on_result=None):
+        """Play every game, retrying failures up to `retries` times, and
+        return their results."""
+        results = []
+
+        def record(result):
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+        console = sys.stdout
+        self._discard = open(os.devnull, "w")
+        sys.stdout = _ThreadConsole(console)
+        try:
+            asyncio.run(self._run(games, retries, record))
+        finally:
+            sys.stdout = console
+            self._discard.close()
+        return results
+
+
+def parse_call_limits(values):
+    limits = {}
+    for value in values:
+        key, _, limit = value.rpartition("=")
+        if not key:
+            raise ValueError(f"Invalid call limit {value}; expected provider[/model]=N")
+        limits[key] = int(limit)
+    return limits
+
+
+def peak_memory_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Play a Secret Hitler tournament as concurrent games in one process.")
+    parser.add_argument("spec", help="JSON matchup spec (see tournament.py)")
+    parser.add_argument("--output", default="tournaments/latest",
+                        help="Directory for results.jsonl")
+    parser.add_argument("--concurrent_games", type=int, default=100)
+    parser.add_argument("--call_limit", action="append", default=[],
+                        help="Concurrent calls for provider or provider/model, e.g. gemini=32 "
+                             "or openrouter/openai/gpt-4o=8 (repeatable)")
+    parser.add_argument("--default_call_limit", type=int, default=16,
+                        help="Concurrent calls for each provider/model without a --call_limit")
+    parser.add_argument("--retries", type=int, default=1)
+    parser.add_argument("--timeout", type=int, default=0,
+                        help="Seconds before a game is abandoned (0 for no limit)")
+    parser.add_argument("--results_db", default=None,
+                        help="Also record every game in this SQLite results store")
+    parser.add_argument("--metrics_port", type=int, default=None,
+                        help="Serve live metrics and a status page on this local port")
+    parser.add_argument("--trace", metavar="PATH", default=None,
+                        help="Write a Chrome Trace Event timeline of every game to PATH")
+    parser.add_argument("--batch_api", action="store_true",
+                        help="Send calls through the providers' batch APIs (see batch_mode.py)")
+    parser.add_argument("--batch_dir", default=None,
+                        help="Send calls as batch files to this directory (see batch_mode.py)")
+    parser.add_argument("--batch_wait", type=float, default=60.0,
+                        help="Seconds a call may wait for the other games before its batch is sent")
+    parser.add_argument("--batch_poll", type=float, default=30.0,
+                        help="Seconds between batch status checks with --batch_api")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    results_path = os.path.join(args.output, "results.jsonl")
+    done_ids = {result["game_id"] for result in load_results(results_path)
+                if result["status"] == "ok"}
+    games = [game for game in expand_games(load_spec(args.spec)) if game["game_id"] not in done_ids]
+    print(f"Playing {len(games)} games, {args.concurrent_games} at a time")
+
+    if args.trace:
+        tracing.enable()
+    scheduler = AsyncScheduler(args.concurrent_games, parse_call_limits(args.call_limit),
+                               args.default_call_limit, args.timeout, args.results_db)
+    if args.batch_api or args.batch_dir:
+        backend = (batch_mode.DirectoryBackend(args.batch_dir) if args.batch_dir
+                   else batch_mode.OpenAIBatchBackend(os.path.join(args.output, "batches"), args.batch_poll))
+        scheduler.batch = batch_mode.BatchCollector(backend, lambda: scheduler.playing, args.batch_wait)
+    if args.metrics_port is not None:
+        MetricsServer(scheduler.metrics, args.metrics_port).start()
+    start = time.perf_counter()
+    with open(results_path, "a") as results_file:
+        finished = 0
+
+        def record(result):
+            global finished
+            finished += 1
+            results_file.write(json.dumps(result) + "\n")
+            results_file.flush()
+            elapsed = time.perf_counter() - start
+            print(f"[{finished}/{len(games)}] {result['game_id']}: {result.get('winner') or result['status']} "
+                  f"({elapsed:.1f}s elapsed, {finished / elapsed * 3600:.0f} games/hour)")
+
+        scheduler.run(games, args.retries, record)
+    if args.trace:
+        tracing.write_trace(args.trace, tracing.take_events())
+        print(f"Trace written to {args.trace}")
+    if scheduler.batch:
+        scheduler.batch.close()
+        print(f"Sent {scheduler.batch.requests} calls in {scheduler.batch.batches} batches")
+    print(f"Peak memory {peak_memory_mb():.0f} MB")
+    for provider_name, base_url, stats in llm_interface.batch_stats():
+        print(f"Batched {provider_name} at {base_url}: {stats['requests']} calls in {stats['batches']} batches "
+              f"(mean {stats['mean_batch_size']:.1f}, largest {stats['largest_batch']}, "
+              f"limit {stats['batch_size']} within {stats['batch_wait'] * 1000:.0f} ms), "
+              f"{stats['tokens_per_second']:.0f} completion tokens/s")
+    print_summary(load_results(results_path))
@@ -0,0 +1,275 @@
+"""Play games through asynchronous batch endpoints instead of live calls.
+
+    python async_scheduler.py matchups.json --batch_api
+    python async_scheduler.py matchups.json --batch_dir batches/
+    python batch_mode.py watch batches/ --base_url http://127.0.0.1:8765/v1/ --api_key_env MOCK_API_KEY
+
+Batch endpoints take a file of requests and return a file of responses
+hours later, at a large discount. Games are independent, so when every
+running game is waiting on an LLM call, so that every game moves one
+decision per batch, or --batch_wait seconds after the first call arrived
+(while other games wait on a batch already sent), the waiting calls are written to a JSONL file in the
+chat-completions batch format:
+
+    {"custom_id": "...", "method": "POST", "url": "/v1/chat/completions", "body": {...}}
+
+one file per client (provider, key and base_url). The file is submitted,
+and each game resumes when the line answering its call comes back. A game
+makes one call at a time, so a game of 150 decisions takes 150 batch
+round trips: this trades latency for cost per game.
+
+--batch_api uploads each file to the seat's provider through the OpenAI
+files and batches API, polls until the batch ends and downloads the output
+file. --batch_dir is a local stand-in for that service: files are written
+to DIR/inbox/ and the results read from DIR/outbox/. `batch_mode.py watch
+DIR` answers them by sending every request to any OpenAI-compatible
+endpoint, such as benchmarks/mock_llm_server.py. Both keep the request and
+result files of every batch.
+"""
+import argparse
+import itertools
+import json
+import os
+import threading
+import time
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+FINISHED_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class BatchRequestError(Exception):
+    pass
+
+
+def request_line(custom_id, client, model_name, messages, kwargs):
+    """A batch input line for the request client.chat_completion would send."""
+    request = client._request_kwargs(model_name, messages, **{key: value for key, value in kwargs.items()
+                                                            if key != "stream"})
+    # extra_body is merged into the request body; headers cannot be batched
+    request.pop("extra_headers", None)
+    extra_body = request.pop("extra_body", None) or {}
+    body = {**request, **extra_body}
+    return {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}
+
+
+def _write_jsonl(path, lines):
+    with open(path + ".tmp", "w") as f:
+        for line in lines:
+            f.write(json.dumps(line) + "\n")
+    os.replace(path + ".tmp", path)
+
+
+def _read_jsonl(text):
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class DirectoryBackend:
+    """Writes each batch to inbox/<batch_id>.jsonl and waits for
+    outbox/<batch_id>.jsonl."""
+
+    def __init__(self, directory, poll=0.2):
+        self.inbox = os.path.join(directory, "inbox")
+        self.outbox = os.path.join(directory, "outbox")
+        os.makedirs(self.inbox, exist_ok=True)
+        os.makedirs(self.outbox, exist_ok=True)
+        self.poll = poll
+
+    def run(self, batch_id, client, lines):
+        _write_jsonl(os.path.join(self.inbox, f"{batch_id}.jsonl"), lines)
+        output_path = os.path.join(self.outbox, f"{batch_id}.jsonl")
+        while not os.path.exists(output_path):
+            time.sleep(self.poll)
+        with open(output_path) as f:
+            return _read_jsonl(f.read())
+
+
+class OpenAIBatchBackend:
+    """Submits each batch through the provider's files and batches API with
+    the seats' own client, keeping copies of the files in `directory`."""
+
+    def __init__(self, directory, poll=30.0, completion_window="24h"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.poll = poll
+        self.completion_window = completion_window
+
+    def run(self, batch_id, client, lines):
+        api = client.client
+        input_path = os.path.join(self.directory, f"{batch_id}.input.jsonl")
+        _write_jsonl(input_path, lines)
+        with open(input_path, "rb") as f:
+            input_file = api.files.create(file=(f"{batch_id}.jsonl", f.read()), purpose="batch")
+        batch = api.batches.create(input_file_id=input_file.id, endpoint=BATCH_ENDPOINT,
+                                   completion_window=self.completion_window,
+                                   metadata={"batch_id": batch_id})
+        print(f"Submitted {batch_id} ({len(lines)} requests) as {batch.id}")
+        while batch.status not in FINISHED_STATUSES:
+            time.sleep(self.poll)
+            batch = api.batches.retrieve(batch.id)
+        results = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                results.extend(_read_jsonl(api.files.content(file_id).text))
+        _write_jsonl(os.path.join(self.directory, f"{batch_id}.output.jsonl"), results)
+        print(f"{batch_id} {batch.status}: {len(results)} of {len(lines)} results")
+        return results
+
+
+class _PendingCall:
+    __slots__ = ("client", "model_name", "messages", "kwargs", "queued", "submitted", "done",
+                 "response", "error")
+
+    def __init__(self, client, model_name, messages, kwargs):
+        self.client = client
+        self.model_name = model_name
+        self.messages = messages
+        self.kwargs = kwargs
+        self.queued = time.perf_counter()
+        self.submitted = None
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class BatchCollector:
+    """Holds the calls of game threads until every running game has one
+    waiting (`active_games()` counts them) or the oldest call has waited
+    `max_wait` seconds, then sends them to `backend` as one batch per client."""
+
+    def __init__(self, backend, active_games, max_wait=60.0, max_requests=50000):
+        self.backend = backend
+        self.active_games = active_games
+        self.max_wait = max_wait
+        self.max_requests = max_requests
+        self.pending = []
+        self.batches = 0
+        self.requests = 0
+        self.prefix = time.strftime("%Y%m%d-%H%M%S")
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    def chat_completion(self, client, model_name, messages, kwargs):
+        """Called on a game thread; blocks until the batch with this call
+        comes back."""
+        call = _PendingCall(client, model_name, messages, kwargs)
+        with self._condition:
+            self.pending.append(call)
+            self._condition.notify()
+        call.done.wait()
+        if call.error:
+            raise call.error
+        # Read by LLMPlayerInterface's call telemetry: time spent waiting for the batch to be sent
+        call.response.queue_wait = call.submitted - call.queued
+        return call.response
+
+    def notify(self):
+        """Wake the dispatcher, e.g. when a game has finished."""
+        with self._condition:
+            self._condition.notify()
+
+    def close(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._dispatcher.join()
+
+    def _ready(self):
+        if not self.pending:
+            return False
+        return (len(self.pending) >= self.active_games()
+                or len(self.pending) >= self.max_requests
+                or time.perf_counter() - self.pending[0].queued >= self.max_wait)
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                while not self._stopped and not self._ready():
+                    self._condition.wait(timeout=0.5)
+                if self._stopped:
+                    return
+                calls, self.pending = self.pending, []
+            by_client = {}
+            for call in calls:
+                by_client.setdefault(id(call.client), []).append(call)
+            for client_calls in by_client.values():
+                threading.Thread(target=self._run_batch, args=(client_calls,), daemon=True).start()
+
+    def _run_batch(self, calls):
+        from openai.types.chat import ChatCompletion
+
+        batch_id = f"batch-{self.prefix}-{next(self._ids):05d}"
+        custom_ids = [f"{batch_id}-{index}" for index in range(len(calls))]
+        submitted = time.perf_counter()
+        # Every call must be released, whatever fails, or its game waits forever
+        try:
+            lines = []
+            for custom_id, call in zip(custom_ids, calls):
+                call.submitted = submitted
+                lines.append(request_line(custom_id, call.client, call.model_name, call.messages, call.kwargs))
+            results = {result["custom_id"]: result for result in self.backend.run(batch_id, calls[0].client, lines)}
+            failure = None
+        except Exception as e:
+            results = {}
+            failure = e
+        for custom_id, call in zip(custom_ids, calls):
+            call.submitted = submitted
+            result = results.get(custom_id)
+            response = (result or {}).get("response") or {}
+            try:
+                if result and response.get("status_code") == 200:
+                    call.response = ChatCompletion.model_validate(response["body"])
+                else:
+                    error = failure or (result or {}).get("error") or response.get("body") or "missing from the results"
+                    call.error = BatchRequestError(f"{custom_id}: {error}")
+            except Exception as e:
+                call.error = BatchRequestError(f"{custom_id}: {e!r}")
+            call.done.set()
+        with self._condition:
+            self.batches += 1
+            self.requests += len(calls)
+
+
+def watch(directory, base_url, api_key, poll=0.2):
+    """Answer every DIR/inbox/*.jsonl batch with DIR/outbox/*.jsonl by
+    sending its requests to the chat completions endpoint at base_url."""
+    from openai import OpenAI
+
+    client = OpenAI(api_key=api_key, base_url=base_url)
+    inbox = os.path.join(directory, "inbox")
+    outbox = os.path.join(directory, "outbox")
+    os.makedirs(inbox, exist_ok=True)
+    os.makedirs(outbox, exist_ok=True)
+    print(f"Answering batches in {inbox} from {base_url}")
+    while True:
+        for name in sorted(os.listdir(inbox)):
+            if not name.endswith(".jsonl") or os.path.exists(os.path.join(outbox, name)):
+                continue
+            with open(os.path.join(inbox, name)) as f:
+                lines = _read_jsonl(f.read())
+            results = []
+            for line in lines:
+                try:
+                    body = client.chat.completions.create(**line["body"]).model_dump()
+                    results.append({"custom_id": line["custom_id"], "error": None,
+                                    "response": {"status_code": 200, "body": body}})
+                except Exception as e:
+                    results.append({"custom_id": line["custom_id"], "response": None,
+                                    "error": {"message": str(e)}})
+            _write_jsonl(os.path.join(outbox, name), results)
+            print(f"Answered {name}: {len(lines)} requests")
+        time.sleep(poll)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for a provider's batch endpoint.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    watch_parser = subparsers.add_parser("watch", help="Answer batch files written to a directory")
+    watch_parser.add_argument("directory")
+    watch_parser.add_argument("--base_url", required=True, help="OpenAI-compatible endpoint to send requests to")
+    watch_parser.add_argument("--api_key_env", default="OPENAI_API_KEY")
+    watch_parser.add_argument("--poll", type=float, default=0.2, help="Seconds between inbox scans")
+    args = parser.parse_args()
+    watch(args.directory, args.base_url, os.environ.get(args.api_key_env, "none"), args.poll)
@@ -0,0 +1,42 @@
+"""Throughput benchmark for SecretHitlerVectorEnv under random legal play.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_env --players 10 --envs 64 --steps 2000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from secret_hitler_env import SecretHitlerVectorEnv, sample_legal_actions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure environment steps per second on one core.")
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--envs", type=int, default=64)
+    parser.add_argument("--steps", type=int, default=2000,
+                        help="Vector steps; each advances every game by one decision")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    env = SecretHitlerVectorEnv(args.envs, args.players)
+    rng = np.random.default_rng(args.seed)
+    obs = env.reset(seed=args.seed)
+    games = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        obs, rewards, dones, info = env.step(sample_legal_actions(obs["action_mask"], rng))
+        games += int(dones.sum())
+    elapsed = time.perf_counter() - start
+
+    steps = args.steps * args.envs
+    print(f"{args.players} players, {args.envs} envs, {args.steps} vector steps")
+    print(f"{'env steps':<16} {steps / elapsed:>12,.0f} /s")
+    print(f"{'games finished':<16} {games / elapsed:>12,.0f} /s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Micro-benchmark for GameState.fork() and GameState.determinize().
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fork --players 10 --iterations 200000
+"""
+import argparse
+import copy
+import random
+import time
+
+from secret_hitler_engine import GameState, Role
+
+
+def make_mid_game_state(num_players, seed):
+    random.seed(seed)
+    players = [f"Player{i+1}" for i in range(num_players)]
+    game_state = GameState(players, None)
+    for _ in range(4):
+        game_state.discard_policy(game_state.draw_policies(3)[0])
+    game_state.set_government(players[0], players[1])
+    game_state.reset_government()
+    return game_state
+
+
+def time_per_second(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure GameState forks per second.")
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    game_state = make_mid_game_state(args.players, args.seed)
+    rng = random.Random(args.seed)
+    liberal = game_state.get_player_names_by_role(Role.LIBERAL)[0]
+
+    def fork_and_draw():
+        game_state.fork().draw_policies(3)
+
+    results = {
+        "fork": time_per_second(game_state.fork, args.iterations),
+        "fork + draw 3": time_per_second(fork_and_draw, args.iterations),
+        "determinize (liberal seat)": time_per_second(
+            lambda: game_state.determinize(liberal, rng), args.iterations),
+        "copy.deepcopy": time_per_second(
+            lambda: copy.deepcopy(game_state), max(1, args.iterations // 20)),
+    }
+
+    print(f"{args.players} players, {args.iterations} iterations")
+    for name, per_second in results.items():
+        print(f"{name:<28} {per_second:>12,.0f} /s")
+
+
+if __name__ == "__main__":
+    main()
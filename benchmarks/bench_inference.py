@@ -0,0 +1,45 @@
+"""Micro-benchmark for RoleInference updates and queries.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_inference --players 10 --iterations 20000
+"""
+import argparse
+
+from benchmarks.bench_fork import time_per_second
+from role_inference import RoleInference
+from secret_hitler_engine import ElectionRecord, Role
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure microseconds per role-inference event.")
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    players = [f"Player{i+1}" for i in range(args.players)]
+    player_ids = {p: i for i, p in enumerate(players)}
+    half = args.players // 2
+    record = ElectionRecord(players[0], players[1], tuple(players[:half]),
+                            tuple(players[half:]), 2, Role.FASCIST)
+    inference = RoleInference(args.players)
+
+    results = {
+        "vote": time_per_second(
+            lambda: inference.observe_vote(2, 0, 1, True), args.iterations),
+        f"election ({args.players} votes)": time_per_second(
+            lambda: inference.observe_election_votes(player_ids, record), args.iterations),
+        "enacted policy": time_per_second(
+            lambda: inference.observe_policy(0, 1, Role.FASCIST), args.iterations),
+        "fascist_probabilities": time_per_second(
+            inference.fascist_probabilities, args.iterations),
+    }
+
+    print(f"{args.players} players, {len(inference.table)} assignments")
+    for name, per_second in results.items():
+        print(f"{name:<24} {1e6 / per_second:>8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
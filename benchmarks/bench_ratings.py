@@ -0,0 +1,80 @@
+"""Rating recompute and bootstrap timings on synthetic games with known skills.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ratings --games 100000 --models 12 --bootstrap 2000
+
+Pass --db to time loading and fitting a real results store instead.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ratings import ELO_MEAN, ELO_SCALE, PLAYER_COUNTS, RatingData, bootstrap_intervals, fit_ratings
+from secret_hitler_engine import ROLE_DISTRIBUTION, Role
+
+
+def synthetic_data(num_games, num_models, seed=0):
+    """Random lineups with outcomes drawn from the rating model itself."""
+    rng = np.random.default_rng(seed)
+    liberal_skill = rng.normal(0, 0.5, num_models)
+    fascist_skill = liberal_skill + rng.normal(0, 0.25, num_models)
+    base = {n: rng.normal(0, 0.3) for n in PLAYER_COUNTS}
+    game_players = rng.choice(PLAYER_COUNTS, num_games)
+    seat_game, seat_model, seat_fascist = [], [], []
+    liberal_won = np.empty(num_games)
+    for n in PLAYER_COUNTS:
+        games = np.flatnonzero(game_players == n)
+        fascist = np.array([role != Role.LIBERAL for role in ROLE_DISTRIBUTION[n]])
+        models = rng.integers(0, num_models, (len(games), n))
+        strength = (base[n] + liberal_skill[models[:, ~fascist]].mean(axis=1)
+                    - fascist_skill[models[:, fascist]].mean(axis=1))
+        liberal_won[games] = rng.random(len(games)) < 1 / (1 + np.exp(-strength))
+        seat_game.append(np.repeat(games, n))
+        seat_model.append(models.ravel())
+        seat_fascist.append(np.tile(fascist, len(games)))
+    data = RatingData([f"model-{i}" for i in range(num_models)], np.concatenate(seat_game),
+                      np.concatenate(seat_model), np.concatenate(seat_fascist), game_players, liberal_won)
+    return data, ELO_MEAN + ELO_SCALE * (liberal_skill + fascist_skill) / 2
+
+
+def timed(label, function, *args, **kwargs):
+    start = time.perf_counter()
+    value = function(*args, **kwargs)
+    print(f"{label:<28} {time.perf_counter() - start:>8.2f}s")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the rating fit and bootstrap.")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--models", type=int, default=12)
+    parser.add_argument("--bootstrap", type=int, default=2000)
+    parser.add_argument("--db", default=None, help="Time a results store instead of synthetic games")
+    args = parser.parse_args()
+
+    truth = None
+    if args.db:
+        from results_store import ResultsStore
+        store = ResultsStore(args.db)
+        data = timed("load from store", RatingData.from_store, store)
+        store.close()
+    else:
+        data, truth = synthetic_data(args.games, args.models)
+    print(f"{data.num_games} games, {data.num_models} models")
+
+    ratings = timed("full recompute", fit_ratings, data)
+    low, high = timed(f"{args.bootstrap} bootstrap resamples", bootstrap_intervals, data, ratings,
+                      args.bootstrap)
+    elo = ratings.elo()
+    if truth is not None:
+        # Ratings are identified only up to a shared offset
+        error = (elo - elo.mean()) - (truth - truth.mean())
+        covered = np.mean((low - elo.mean() <= truth - truth.mean()) & (truth - truth.mean() <= high - elo.mean()))
+        print(f"RMS error vs true skills {np.sqrt(np.mean(error ** 2)):.1f} Elo; "
+              f"mean 95% CI width {np.mean(high - low):.1f}; true skill inside CI for {covered:.0%} of models")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Bulk-insert and leaderboard query timings for ResultsStore.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_results_store --games 100000 --db /tmp/bench_results.db
+"""
+import argparse
+import os
+import random
+import time
+
+from results_store import ResultsStore
+from secret_hitler_engine import ROLE_DISTRIBUTION
+
+MODELS = [("gemini", "gemini-2.0-flash"), ("gemini", "gemini-2.5-pro"),
+          ("openrouter", "openai/gpt-4o"), ("openrouter", "anthropic/claude-3.5-sonnet"),
+          ("openrouter", "meta-llama/llama-3.3-70b-instruct"), ("bayes", "bayes"), ("random", "random")]
+PHASES = ["Nomination", "Voting", "President Discard", "Chancellor Enact"]
+
+
+def synthetic_game(index, rng, calls_per_seat):
+    num_players = rng.choice(list(ROLE_DISTRIBUTION))
+    roles = [role.value for role in ROLE_DISTRIBUTION[num_players]]
+    rng.shuffle(roles)
+    winner = rng.choice(["Liberal", "Fascist"])
+    return {
+        "game_key": f"bench-{index}", "finished_at": time.time(), "num_players": num_players,
+        "winner": winner, "win_reason": "liberal_policies" if winner == "Liberal" else "fascist_policies",
+        "lib_policies": 5 if winner == "Liberal" else 2, "fasc_policies": 6 if winner == "Fascist" else 3,
+        "elections": rng.randint(5, 20),
+        "seats": [{
+            "seat": seat, "player_name": f"Player{seat + 1}",
+            "provider": provider, "model": model, "role": role, "alive": rng.random() > 0.1,
+            "won": (role == "Liberal") == (winner == "Liberal"),
+            "calls": [{"phase": rng.choice(PHASES), "latency": rng.uniform(0.3, 3.0),
+                       "prompt_tokens": 2500, "completion_tokens": 60, "parse_status": "ok"}
+                      for _ in range(calls_per_seat)],
+        } for seat, (role, (provider, model)) in enumerate(
+            zip(roles, (rng.choice(MODELS) for _ in roles)))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time ResultsStore inserts and leaderboard queries.")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--calls_per_seat", type=int, default=2)
+    parser.add_argument("--batch", type=int, default=1000, help="Games per insert transaction")
+    parser.add_argument("--db", default="bench_results.db")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    store = ResultsStore(args.db)
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for first in range(0, args.games, args.batch):
+        store.record_games([synthetic_game(index, rng, args.calls_per_seat)
+                            for index in range(first, min(first + args.batch, args.games))])
+    elapsed = time.perf_counter() - start
+    print(f"{args.games} games inserted in {elapsed:.1f}s ({args.games / elapsed:,.0f} games/s, "
+          f"including generating them)")
+
+    queries = {
+        "leaderboard": lambda: store.leaderboard(),
+        "leaderboard, 7 players": lambda: store.leaderboard(num_players=7),
+        "leaderboard, Hitler": lambda: store.leaderboard(role="Hitler"),
+        "call stats": store.call_stats,
+    }
+    for name, query in queries.items():
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            query()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        print(f"{name:<24} median {timings[len(timings) // 2] * 1000:>8.2f} ms"
+              f"   max {timings[-1] * 1000:>8.2f} ms")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
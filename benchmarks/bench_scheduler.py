@@ -0,0 +1,69 @@
+"""Games/hour and memory of AsyncScheduler against the local mock endpoint.
+
+Run from the repository root, one concurrency level per run so that the
+peak memory figure belongs to it:
+
+    python -m benchmarks.bench_scheduler --concurrent_games 100 --latency 0.5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from async_scheduler import AsyncScheduler, peak_memory_mb
+from tournament import expand_games
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure AsyncScheduler throughput against a mock LLM endpoint.")
+    parser.add_argument("--concurrent_games", type=int, default=100)
+    parser.add_argument("--games", type=int, default=None,
+                        help="Games to play (default: 2 x --concurrent_games)")
+    parser.add_argument("--players", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.5,
+                        help="Mock endpoint seconds per call")
+    parser.add_argument("--call_limit", type=int, default=1000,
+                        help="Concurrent calls allowed to the mock model")
+    parser.add_argument("--timeout", type=int, default=600,
+                        help="Seconds before a game is abandoned; games that reach the engine's "
+                             "short-deck stall never finish on their own")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = subprocess.Popen([sys.executable, "-m", "benchmarks.mock_llm_server",
+                               "--port", str(args.port), "--latency", str(args.latency)])
+    os.environ.setdefault("MOCK_API_KEY", "mock")
+    try:
+        time.sleep(1)
+        player = {"provider": "gemini", "model": "mock", "api_key_env": "MOCK_API_KEY",
+                  "base_url": f"http://127.0.0.1:{args.port}/v1/"}
+        games = expand_games({"matchups": [{
+            "name": "mock", "num_players": args.players,
+            "games": args.games or 2 * args.concurrent_games,
+            "player_models": {f"Player{i+1}": player for i in range(args.players)}}]})
+        scheduler = AsyncScheduler(args.concurrent_games, {"gemini/mock": args.call_limit},
+                                   timeout=args.timeout)
+        finish_times = []
+
+        def record(result):
+            if result["status"] == "ok":
+                finish_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        results = scheduler.run(games, retries=0, on_result=record)
+    finally:
+        server.terminate()
+
+    # Throughput up to the last finished game, so that stalled games waiting
+    # for their timeout do not count against it
+    played = len(finish_times)
+    print(f"{args.concurrent_games} concurrent games, {args.latency}s mock latency")
+    print(f"{'games played':<16} {played:>10} ({len(results) - played} failed or timed out)")
+    print(f"{'games/hour':<16} {played / max(finish_times) * 3600:>10,.0f}")
+    print(f"{'peak memory':<16} {peak_memory_mb():>10,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
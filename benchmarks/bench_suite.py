@@ -0,0 +1,257 @@
+"""Benchmark suite for the engine, prompt assembly and response parsing.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_suite --save before.json
+    ... change something ...
+    python -m benchmarks.bench_suite --compare before.json --threshold 0.1
+
+Fixtures come from the game bundled in logs/: the LLM responses in
+logs/game.log, with the actions each was allowed (deepseek-r1's include
+answers cut off before their JSON), and game states captured at round 1
+and round 15 of a game whose seats replay those responses.
+
+    engine_games        games/s through GameRunner with random scripted
+                        seats, terminal output skipped
+    prompt_round_1      _construct_prompt calls/s early in a game
+    prompt_round_15     the same late in a game, with long logs and discussion
+    parse_responses     responses/s through _extract_action, extract_thought
+                        and extract_public_statement, as in get_player_input
+    parse_truncated     the same over the responses with no valid JSON
+    mock_client_games   games/s of LLM seats against an in-process mock
+                        client, so everything but the network is measured
+    worker_startup      fresh interpreters/s that import tournament.py, as
+                        each tournament worker process does
+
+Every result is a rate, so higher is better. Each is the best of --repeat
+runs. --save writes the results as JSON; --compare reads an earlier file,
+flags every result more than --threshold below it and exits with status 1
+if there are any.
+"""
+import argparse
+import ast
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+from benchmarks.mock_llm_server import ALLOWED_ACTION
+from llm_interface import GameLogger, LLMPlayerInterface
+from secret_hitler_engine import GameState
+from secret_hitler_game import GameConfig, GameRunner
+from secret_hitler_simulator import play_engine_games
+
+LOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs", "game.log")
+RESPONSE = re.compile(r"Allowed Responses: (\[.*?\]), Player: \S+\n.*?"
+                      r"--- LLM RESPONSE ---\n(.*?)\n--- END RESPONSE ---", re.DOTALL)
+PROMPT_ROUNDS = (1, 15)
+DISCUSSION_PROMPT = "Discuss the proposed government."
+
+
+def load_responses(path=LOG_PATH):
+    """(response, allowed responses) for every logged LLM response."""
+    with open(path) as f:
+        text = f.read()
+    return [(response, ast.literal_eval(allowed)) for allowed, response in RESPONSE.findall(text)]
+
+
+class _MockClient:
+    """Answers like an LLM that says and thinks what the logged players did
+    and picks a random allowed action."""
+
+    def __init__(self, statements, rng):
+        self.statements = itertools.cycle(statements)
+        self.rng = rng
+
+    def chat_completion(self, model_name, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        allowed = ALLOWED_ACTION.findall(prompt.rpartition("**Allowed Actions:**")[2])
+        thoughts, say = next(self.statements)
+        content = json.dumps({"thoughts": thoughts, "say": say,
+                              "action": self.rng.choice(allowed) if allowed else "pass"})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                               usage=None)
+
+
+class _Stalled(Exception):
+    pass
+
+
+class _MockGameRunner(GameRunner):
+    """Stops games at the engine's short-deck stall, like the simulator's
+    cross-check, and keeps copies of the game state at PROMPT_ROUNDS."""
+
+    def __init__(self, config, statements, rng):
+        super().__init__(config)
+        for player in self.player_llm_configs.values():
+            player.llm_client = _MockClient(statements, rng)
+        self.captured = {}
+
+    def election_phase(self, resume_phase=None):
+        if self.round_number in PROMPT_ROUNDS:
+            self.captured[self.round_number] = GameState.from_snapshot(self.game_state.snapshot(), None)
+        return super().election_phase(resume_phase)
+
+    def legislative_session(self):
+        available = len(self.game_state.deck_codes) + len(self.game_state.discard_codes)
+        if 0 < available < 3:
+            raise _Stalled()
+        return super().legislative_session()
+
+
+def _statements(responses):
+    player = LLMPlayerInterface.__new__(LLMPlayerInterface)
+    player.game_logger = GameLogger(False)
+    player.player_name = "Player1"
+    statements = [(player.extract_thought(response), player.extract_public_statement(response))
+                  for response, _ in responses]
+    return [(thoughts, say) for thoughts, say in statements if thoughts or say]
+
+
+def mock_client_config(num_players):
+    os.environ.setdefault("MOCK_API_KEY", "mock")
+    seat = json.dumps({"provider": "gemini", "model": "mock", "api_key_env": "MOCK_API_KEY"})
+    return GameConfig(argparse.Namespace(
+        num_players=num_players, slowdown=0, press_enter=False, debug_llm=False, log_to_file=False,
+        log_dir="logs", results_db=None, checkpoint=None, resume=None,
+        player_models=[f"Player{i + 1}={seat}" for i in range(num_players)]))
+
+
+def play_mock_game(config, statements, seed):
+    random.seed(seed)
+    runner = _MockGameRunner(config, statements, random.Random(seed))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner.run_game()
+    except _Stalled:
+        pass
+    return runner
+
+
+def prompt_states(config, statements):
+    """Game states at each of PROMPT_ROUNDS, from the first seed that lasts."""
+    for seed in range(1000):
+        runner = play_mock_game(config, statements, seed)
+        if len(runner.captured) == len(PROMPT_ROUNDS):
+            return runner.captured, runner.player_llm_configs["Player1"]
+    raise ValueError(f"No game lasted {max(PROMPT_ROUNDS)} rounds")
+
+
+def start_worker():
+    subprocess.run([sys.executable, "-c", "import tournament"], check=True,
+                   cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return 1
+
+
+def best_rate(function, repeat, min_time):
+    """Best operations per second over `repeat` runs of at least min_time
+    seconds; function() runs once and returns the operations it did."""
+    best = 0.0
+    for _ in range(repeat):
+        operations, start = 0, time.perf_counter()
+        while (elapsed := time.perf_counter() - start) < min_time or not operations:
+            operations += function()
+        best = max(best, operations / elapsed)
+    return best
+
+
+def run_suite(repeat=5, min_time=0.5, num_players=7):
+    responses = load_responses()
+    statements = _statements(responses)
+    player = LLMPlayerInterface.__new__(LLMPlayerInterface)
+    player.game_logger = GameLogger(False)
+    player.player_name = "Player1"
+    truncated = [(response, allowed) for response, allowed in responses
+                 if player._extract_json_field(response, "action") is None]
+    config = mock_client_config(num_players)
+    states, prompt_player = prompt_states(config, statements)
+
+    def parse(fixtures):
+        def run():
+            for response, allowed in fixtures:
+                player._extract_action(response, allowed)
+                player.extract_thought(response)
+                player.extract_public_statement(response)
+            return len(fixtures)
+        return run
+
+    def prompt(state):
+        def run():
+            prompt_player._construct_prompt(state, DISCUSSION_PROMPT, ["pass"], "Election Discussion", None)
+            return 1
+        return run
+
+    engine_seeds = itertools.count()
+    mock_seeds = itertools.count(1000)
+    benchmarks = {
+        "engine_games": lambda: len(play_engine_games(num_players, 5, next(engine_seeds))),
+        **{f"prompt_round_{round_number}": prompt(states[round_number]) for round_number in PROMPT_ROUNDS},
+        "parse_responses": parse(responses),
+        "parse_truncated": parse(truncated),
+        "mock_client_games": lambda: bool(play_mock_game(config, statements, next(mock_seeds))),
+        "worker_startup": start_worker,
+    }
+    results = {}
+    for name, function in benchmarks.items():
+        results[name] = best_rate(function, repeat, min_time)
+        print(f"{name:<20} {results[name]:>12,.1f} /s")
+    return {"python": sys.version.split()[0], "machine": platform.machine(), "time": time.time(),
+            "fixtures": {"responses": len(responses), "truncated": len(truncated),
+                         **{f"prompt_round_{round_number}_chars": len(prompt_player._construct_prompt(
+                             states[round_number], DISCUSSION_PROMPT, ["pass"], "Election Discussion", None))
+                            for round_number in PROMPT_ROUNDS}},
+            "results": results}
+
+
+def compare(baseline, current, threshold):
+    """Print each result against the baseline; returns the regressed names."""
+    regressions = []
+    print(f"\n{'benchmark':<20} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, rate in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            print(f"{name:<20} {'-':>12} {rate:>12,.1f}")
+            continue
+        change = rate / before - 1
+        flag = ""
+        if change < -threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<20} {before:>12,.1f} {rate:>12,.1f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the engine, prompt building and parsing.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark; the best is kept")
+    parser.add_argument("--min_time", type=float, default=0.5, help="Seconds per run")
+    parser.add_argument("--players", type=int, default=7)
+    parser.add_argument("--save", default=None, help="Write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Slowdown, as a fraction, that counts as a regression")
+    args = parser.parse_args()
+
+    current = run_suite(args.repeat, args.min_time, args.players)
+    print(f"Fixtures: {current['fixtures']}")
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), current, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Local OpenAI-compatible endpoint for load tests.
+
+Answers POST .../chat/completions after a fixed delay with a random action
+from the prompt's "Allowed Actions" list, so games can be played end to end
+without an API key. Streamed requests get their first token after a third
+of the delay and the rest, with usage, at the end. POST .../completions
+answers a list of prompts in one response after the same delay, like a
+batching inference server:
+
+    python -m benchmarks.mock_llm_server --port 8765 --latency 0.5
+
+and point players at it with
+{"provider": "gemini", "model": "mock", "api_key_env": "MOCK_API_KEY",
+ "base_url": "http://127.0.0.1:8765/v1/"}.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+
+ALLOWED_ACTION = re.compile(r'^- "(.*)"$', re.MULTILINE)
+
+
+def answer(prompt, rng):
+    allowed = ALLOWED_ACTION.findall(prompt.rpartition("**Allowed Actions:**")[2])
+    return json.dumps({"thoughts": "", "say": "",
+                       "action": rng.choice(allowed) if allowed else "pass"})
+
+
+def batch_completion_body(request, rng):
+    """A legacy /completions answer; `prompt` may be a list, answered in one
+    response as a batching inference server would."""
+    prompts = request["prompt"] if isinstance(request["prompt"], list) else [request["prompt"]]
+    texts = [answer(prompt, rng) for prompt in prompts]
+    prompt_tokens = sum(len(prompt) for prompt in prompts) // 4
+    completion_tokens = sum(len(text) for text in texts) // 4
+    return {
+        "id": "mock", "object": "text_completion", "created": int(time.time()), "model": request["model"],
+        "choices": [{"index": i, "text": text, "finish_reason": "stop", "logprobs": None}
+                    for i, text in enumerate(texts)],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+def completion_body(request, rng):
+    prompt = request["messages"][-1]["content"]
+    content = answer(prompt, rng)
+    return {
+        "id": "mock", "object": "chat.completion", "created": int(time.time()),
+        "model": request["model"],
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        # The game rules open every prompt, so a provider would serve them from its cache
+        "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                  "total_tokens": (len(prompt) + len(content)) // 4,
+                  "prompt_tokens_details": {"cached_tokens": len(prompt) // 8},
+                  "completion_tokens_details": {"reasoning_tokens": 0}},
+    }
+
+
+async def stream_completion(writer, payload, latency):
+    def event(choices, usage=None):
+        chunk = {"id": payload["id"], "object": "chat.completion.chunk", "created": payload["created"],
+                 "model": payload["model"], "choices": choices, "usage": usage}
+        data = f"data: {json.dumps(chunk)}\n\n".encode()
+        return f"{len(data):x}\r\n".encode() + data + b"\r\n"
+
+    content = payload["choices"][0]["message"]["content"]
+    half = len(content) // 2
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                 b"Transfer-Encoding: chunked\r\n\r\n")
+    await asyncio.sleep(latency / 3)
+    writer.write(event([{"index": 0, "delta": {"role": "assistant", "content": content[:half]},
+                         "finish_reason": None}]))
+    await writer.drain()
+    await asyncio.sleep(latency * 2 / 3)
+    writer.write(event([{"index": 0, "delta": {"content": content[half:]}, "finish_reason": "stop"}]))
+    writer.write(event([], payload["usage"]))
+    done = b"data: [DONE]\n\n"
+    writer.write(f"{len(done):x}\r\n".encode() + done + b"\r\n0\r\n\r\n")
+    await writer.drain()
+
+
+async def handle_connection(reader, writer, latency, rng):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode().partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            if b"/chat/completions" in request_line and json.loads(body).get("stream"):
+                await stream_completion(writer, completion_body(json.loads(body), rng), latency)
+                continue
+            await asyncio.sleep(latency)
+            if b"/chat/completions" in request_line:
+                status, payload = "200 OK", completion_body(json.loads(body), rng)
+            elif b"/completions" in request_line:
+                status, payload = "200 OK", batch_completion_body(json.loads(body), rng)
+            else:
+                status, payload = "404 Not Found", {"error": {"message": "not found"}}
+            data = json.dumps(payload).encode()
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(port, latency, seed=0):
+    rng = random.Random(seed)
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(reader, writer, latency, rng),
+        "127.0.0.1", port, backlog=1024)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve mock chat completions locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5,
+                        help="Seconds before each response")
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, args.latency))
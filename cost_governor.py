@@ -0,0 +1,214 @@
+"""Token and cost accounting with tournament budgets.
+
+    python tournament.py matchups.json --budget 50 --soft_budget 40 --prices prices.json
+    python cost_governor.py report tournaments/run1/results.jsonl --prices prices.json
+
+Every LLM call's usage (prompt, completion, reasoning and cached tokens) is
+recorded by LLMPlayerInterface, summed per seat into each game's result, and
+priced here from a per-model table in dollars per million tokens:
+
+    {"openrouter/openai/gpt-4o": {"input": 2.5, "output": 10, "cached_input": 1.25}}
+
+Keys are "provider/model" or just the model name. Reasoning tokens are
+counted within completion tokens and billed at the "reasoning" price, which
+defaults to the output price; cached tokens are counted within prompt tokens
+and billed at "cached_input", which defaults to the input price. PRICES below
+are list prices at the time of writing; pass --prices to override them.
+"""
+import argparse
+import json
+import math
+
+import numpy as np
+
+from ratings import RatingData, bootstrap_intervals, fit_ratings
+
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "reasoning_tokens", "cached_tokens")
+
+PRICES = {
+    "gemini-2.0-flash": {"input": 0.10, "output": 0.40, "cached_input": 0.025},
+    "gemini-2.5-flash": {"input": 0.30, "output": 2.50, "cached_input": 0.075},
+    "gemini-2.5-pro": {"input": 1.25, "output": 10.00, "cached_input": 0.31},
+    "openai/gpt-4o": {"input": 2.50, "output": 10.00, "cached_input": 1.25},
+    "openai/gpt-4o-mini": {"input": 0.15, "output": 0.60, "cached_input": 0.075},
+    "anthropic/claude-3.5-sonnet": {"input": 3.00, "output": 15.00, "cached_input": 0.30},
+    "meta-llama/llama-3.3-70b-instruct": {"input": 0.13, "output": 0.40},
+}
+
+
+def load_prices(path=None):
+    prices = dict(PRICES)
+    if path:
+        with open(path) as f:
+            prices.update(json.load(f))
+    return prices
+
+
+def game_usage(players):
+    """Calls and token totals per LLM seat, from the players' call records."""
+    usage = {}
+    for name, player in players.items():
+        calls = getattr(player, "call_records", None)
+        if calls is None:
+            continue
+        totals = {"calls": len(calls)}
+        for field in TOKEN_FIELDS:
+            totals[field] = sum(call[field] or 0 for call in calls)
+        usage[name] = totals
+    return usage
+
+
+def _model_key(config):
+    return f"{config['provider']}/{config.get('model', config['provider'])}"
+
+
+class CostGovernor:
+    """Prices finished games and enforces tournament budgets.
+
+    The soft budget prints a warning once; the hard budget makes may_start()
+    refuse new games once the spend so far plus the expected cost of the
+    games still running would reach it. Running games always finish, and
+    until a game has finished there is no estimate, so the first batch of
+    games always starts."""
+
+    def __init__(self, prices=None, soft_budget=None, hard_budget=None):
+        self.prices = PRICES if prices is None else prices
+        self.soft_budget = soft_budget
+        self.hard_budget = hard_budget
+        self.spent = 0.0
+        self.games = 0
+        self.model_costs = {}
+        self.model_seats = {}
+        self.model_tokens = {}
+        self.matchup_costs = {}
+        self.unpriced = set()
+        self.warned = False
+
+    def price(self, provider, model):
+        return self.prices.get(f"{provider}/{model}") or self.prices.get(model)
+
+    def seat_cost(self, config, usage):
+        """Dollars for one seat's calls, or None if its model has no price."""
+        price = self.price(config["provider"], config.get("model", config["provider"]))
+        if price is None:
+            self.unpriced.add(_model_key(config))
+            return None
+        cached = usage["cached_tokens"]
+        reasoning = usage["reasoning_tokens"]
+        return ((usage["prompt_tokens"] - cached) * price["input"]
+                + cached * price.get("cached_input", price["input"])
+                + (usage["completion_tokens"] - reasoning) * price["output"]
+                + reasoning * price.get("reasoning", price["output"])) / 1e6
+
+    def record(self, result):
+        """Add a finished game's spend; returns its cost."""
+        if "usage" not in result:
+            return 0.0
+        cost = 0.0
+        for player, config in result["player_models"].items():
+            usage = result["usage"].get(player)
+            model = _model_key(config)
+            self.model_seats[model] = self.model_seats.get(model, 0) + 1
+            if usage is None:
+                continue
+            seat_cost = self.seat_cost(config, usage) or 0.0
+            cost += seat_cost
+            self.model_costs[model] = self.model_costs.get(model, 0.0) + seat_cost
+            tokens = self.model_tokens.setdefault(model, dict.fromkeys(TOKEN_FIELDS, 0))
+            for field in TOKEN_FIELDS:
+                tokens[field] += usage[field]
+        self.spent += cost
+        self.games += 1
+        spent, count = self.matchup_costs.get(result["matchup"], (0.0, 0))
+        self.matchup_costs[result["matchup"]] = (spent + cost, count + 1)
+        if self.soft_budget is not None and self.spent >= self.soft_budget and not self.warned:
+            self.warned = True
+            print(f"WARNING: spent ${self.spent:.2f}, past the soft budget of ${self.soft_budget:.2f}")
+        return cost
+
+    def expected_cost(self, matchup):
+        """Mean cost of a game of `matchup`, or of any game before it has one."""
+        spent, count = self.matchup_costs.get(matchup, (0.0, 0))
+        if count:
+            return spent / count
+        return self.spent / self.games if self.games else 0.0
+
+    def may_start(self, game, running_games):
+        if self.hard_budget is None:
+            return True
+        committed = self.spent + sum(self.expected_cost(running["matchup"]) for running in running_games)
+        return committed + self.expected_cost(game["matchup"]) <= self.hard_budget
+
+    def projected_total(self, remaining_games):
+        return self.spent + sum(self.expected_cost(game["matchup"]) for game in remaining_games)
+
+    def print_report(self, remaining_games=()):
+        print("\n======== COST ========")
+        print(f"{'model':<40} {'seats':>6} {'prompt tok':>11} {'output tok':>11} {'reasoning':>10} "
+              f"{'cached':>9} {'cost':>9}")
+        for model, seats in sorted(self.model_seats.items()):
+            tokens = self.model_tokens.get(model, dict.fromkeys(TOKEN_FIELDS, 0))
+            cost = "unpriced" if model in self.unpriced else f"${self.model_costs.get(model, 0.0):.2f}"
+            print(f"{model:<40} {seats:>6} {tokens['prompt_tokens']:>11} {tokens['completion_tokens']:>11} "
+                  f"{tokens['reasoning_tokens']:>10} {tokens['cached_tokens']:>9} {cost:>9}")
+        line = f"Spent ${self.spent:.2f} on {self.games} games"
+        if remaining_games:
+            line += (f"; {len(remaining_games)} games not played, "
+                     f"projected ${self.projected_total(remaining_games):.2f} to finish them all")
+        print(line)
+        if self.unpriced:
+            print(f"No price for {', '.join(sorted(self.unpriced))}; counted as $0 (add them with --prices)")
+
+
+def cost_per_rating_point(results, governor, target_halfwidth=25.0, bootstrap=1000):
+    """Per model: seats, spend, cost per seat, rating with its 95% interval,
+    what one more Elo of precision costs at the current interval, and the
+    spend needed to narrow it to +/- target_halfwidth. Intervals shrink with
+    the square root of the seats played, so narrowing the half-width h by
+    one point takes about 2 * seats / h more seats."""
+    for result in results:
+        if result["status"] == "ok":
+            governor.record(result)
+    data = RatingData.from_results(results)
+    if data.num_games == 0:
+        raise ValueError("No finished games to rate")
+    ratings = fit_ratings(data)
+    elo = ratings.elo()
+    low, high = bootstrap_intervals(data, ratings, bootstrap)
+    seats = np.bincount(data.seat_model, minlength=data.num_models)
+    report = []
+    for index, model in enumerate(data.model_names):
+        spent = governor.model_costs.get(model, 0.0)
+        per_seat = spent / seats[index]
+        halfwidth = (high[index] - low[index]) / 2
+        seats_needed = math.ceil(seats[index] * (halfwidth / target_halfwidth) ** 2)
+        report.append({
+            "model": model, "seats": int(seats[index]), "cost": spent, "cost_per_seat": per_seat,
+            "rating": float(elo[index]), "halfwidth": float(halfwidth),
+            "cost_per_point": 2 * spent / halfwidth if halfwidth else math.inf,
+            "cost_to_target": max(seats_needed - seats[index], 0) * per_seat,
+        })
+    return sorted(report, key=lambda row: -row["rating"])
+
+
+if __name__ == "__main__":
+    from tournament import load_results
+
+    parser = argparse.ArgumentParser(description="Token and cost reports for tournament results.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    report_parser = subparsers.add_parser("report", help="Spend per model and cost per rating point")
+    report_parser.add_argument("results", help="results.jsonl from tournament.py")
+    report_parser.add_argument("--prices", default=None, help="JSON price table overriding the built-in one")
+    report_parser.add_argument("--target", type=float, default=25.0,
+                               help="Rating interval half-width (Elo) to project the cost of")
+    args = parser.parse_args()
+
+    governor = CostGovernor(load_prices(args.prices))
+    rows = cost_per_rating_point(load_results(args.results), governor, args.target)
+    governor.print_report()
+    print(f"\n{'model':<40} {'seats':>6} {'$/seat':>8} {'rating':>7} {'95% CI':>8} "
+          f"{'$/Elo of CI':>12} {f'$ to +/-{args.target:.0f}':>10}")
+    for row in rows:
+        print(f"{row['model']:<40} {row['seats']:>6} {row['cost_per_seat']:>8.4f} {row['rating']:>7.0f} "
+              f"{'+/-' + format(row['halfwidth'], '.0f'):>8} {row['cost_per_point']:>12.2f} "
+              f"{row['cost_to_target']:>10.2f}")
@@ -1,36 +1,118 @@
-from openai import OpenAI
+import asyncio
+import time
+
+from openai import AsyncOpenAI, BadRequestError, NotFoundError, OpenAI
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+
+
+class _StreamCollector:
+    """Assembles streamed chunks into a ChatCompletion, noting the time to
+    the first content token as its time_to_first_token."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_token = None
+        self.parts = []
+        self.finish_reason = None
+        self.usage = None
+        self.last = None
+
+    def add(self, chunk):
+        self.last = chunk
+        if chunk.usage:
+            self.usage = chunk.usage
+        if not chunk.choices:
+            return
+        choice = chunk.choices[0]
+        if choice.delta.content:
+            if self.first_token is None:
+                self.first_token = time.perf_counter() - self.start
+            self.parts.append(choice.delta.content)
+        self.finish_reason = choice.finish_reason or self.finish_reason
+
+    def response(self):
+        message = ChatCompletionMessage.model_construct(role="assistant", content="".join(self.parts))
+        return ChatCompletion.model_construct(
+            id=getattr(self.last, "id", None), object="chat.completion",
+            created=getattr(self.last, "created", int(time.time())), model=getattr(self.last, "model", None),
+            choices=[Choice.model_construct(index=0, finish_reason=self.finish_reason or "stop",
+                                            message=message)],
+            usage=self.usage,
+            time_to_first_token=self.first_token)
 
 
 class BaseLLMClient:
-    def chat_completion(self, model_name, messages, **kwargs):
-        raise NotImplementedError(
-            "Subclasses must implement chat_completion method")
+    base_url = None
+    provider_label = "LLM"
 
+    def __init__(self, api_key, base_url=None):
+        self.api_key = api_key
+        self.base_url = base_url or self.base_url
+        self.client = OpenAI(api_key=api_key, base_url=self.base_url)
+        self._async_client = None
+        self._async_loop = None
 
-class GeminiClient(BaseLLMClient):
-    def __init__(self, api_key):
-        self.client = OpenAI(
-            api_key=api_key, base_url="https://generativelanguage.googleapis.com/v1beta/openai/")
+    @property
+    def async_client(self):
+        # An async client's connection pool belongs to one event loop
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._async_client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+            self._async_loop = loop
+        return self._async_client
+
+    def _request_kwargs(self, model_name, messages, **kwargs):
+        return dict(model=model_name, messages=messages, **kwargs)
+
+    def _process_response(self, model_name, response):
+        return response
 
     def chat_completion(self, model_name, messages, **kwargs):
         try:
-            response = self.client.chat.completions.create(
-                model=model_name,
-                messages=messages,
-                **kwargs
-            )
-            return response
+            request = self._request_kwargs(model_name, messages, **kwargs)
+            if request.get("stream"):
+                collector = _StreamCollector()
+                for chunk in self.client.chat.completions.create(
+                        **request, stream_options={"include_usage": True}):
+                    collector.add(chunk)
+                response = collector.response()
+            else:
+                response = self.client.chat.completions.create(**request)
+            return self._process_response(model_name, response)
         except Exception as e:
-            print(f"Gemini API Error: {e}")  # Log error here as well
+            print(f"{self.provider_label} API Error: {e}")  # Log error here as well
             raise e  # Re-raise the exception to be caught in _llm_call_with_retry
 
+    async def async_chat_completion(self, model_name, messages, **kwargs):
+        try:
+            request = self._request_kwargs(model_name, messages, **kwargs)
+            if request.get("stream"):
+                collector = _StreamCollector()
+                async for chunk in await self.async_client.chat.completions.create(
+                        **request, stream_options={"include_usage": True}):
+                    collector.add(chunk)
+                response = collector.response()
+            else:
+                response = await self.async_client.chat.completions.create(**request)
+            return self._process_response(model_name, response)
+        except Exception as e:
+            print(f"{self.provider_label} API Error: {e}")
+            raise e
+
+
+class GeminiClient(BaseLLMClient):
+    base_url = "https://generativelanguage.googleapis.com/v1beta/openai/"
+    provider_label = "Gemini"
+
 
 class OpenRouterClient(BaseLLMClient):
-    def __init__(self, api_key):
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key,
-        )
+    base_url = "https://openrouter.ai/api/v1"
+    provider_label = "OpenRouter"
+
+    def __init__(self, api_key, base_url=None):
+        super().__init__(api_key, base_url)
         self.json_schema = {
             "type": "object",
             "properties": {
@@ -54,7 +136,7 @@ class OpenRouterClient(BaseLLMClient):
             "additionalProperties": False
         }
 
-    def chat_completion(self, model_name, messages, extra_headers=None, extra_body=None, **kwargs):
+    def _request_kwargs(self, model_name, messages, extra_headers=None, extra_body=None, **kwargs):
         headers = {}
         if extra_headers:
             headers.update(extra_headers)
@@ -73,33 +155,190 @@ class OpenRouterClient(BaseLLMClient):
                 "schema": self.json_schema
             }
         }
+        return dict(model=model_name, messages=messages, extra_headers=headers,
+                    extra_body=body, **kwargs)
 
-        try:
-            response = self.client.chat.completions.create(
-                model=model_name,
-                messages=messages,
-                extra_headers=headers,
-                extra_body=body,
-                **kwargs
-            )
-
-            # Extract content, ignoring reasoning tokens if present
-            message_obj = response.choices[0].message
-            if "reasoning" in message_obj:  # Check if 'reasoning' field exists
-                # Debug log
-                print(f"Reasoning tokens found in response from {model_name}")
-                llm_content = message_obj.content  # Use the regular 'content' field
-            else:
-                # Debug log
-                print(f"No reasoning tokens in response from {model_name}")
-                llm_content = message_obj.content  # Fallback to regular 'content'
+    def _process_response(self, model_name, response):
+        # Extract content, ignoring reasoning tokens if present
+        message_obj = response.choices[0].message
+        if "reasoning" in message_obj:  # Check if 'reasoning' field exists
+            # Debug log
+            print(f"Reasoning tokens found in response from {model_name}")
+            llm_content = message_obj.content  # Use the regular 'content' field
+        else:
+            # Debug log
+            print(f"No reasoning tokens in response from {model_name}")
+            llm_content = message_obj.content  # Fallback to regular 'content'
+
+        # Replace the original response.choices[0].message.content with llm_content
+        # Modify the response object
+        response.choices[0].message.content = llm_content
+
+        return response  # Return the modified response
+
+
+class _MicroBatcher:
+    """Coalesces the calls made on one event loop within `wait` seconds of
+    the first into a single /completions request of up to `size` prompts.
 
-            # Replace the original response.choices[0].message.content with llm_content
-            # Modify the response object
-            response.choices[0].message.content = llm_content
+    The server reports usage for the whole batch; each call is given a share
+    of the prompt and completion tokens in proportion to its prompt and
+    completion length."""
 
-            return response  # Return the modified response
+    def __init__(self, client, size, wait):
+        self.client = client
+        self.size = size
+        self.wait = wait
+        self.pending = {}
+        self.timers = {}
+        self.tasks = set()
+        self.batches = 0
+        self.requests = 0
+        self.largest = 0
+        self.completion_tokens = 0
+        self.first_sent = None
+        self.last_done = None
 
+    def submit(self, model_name, messages, kwargs):
+        loop = asyncio.get_running_loop()
+        key = (model_name, tuple(sorted(kwargs.items())))
+        future = loop.create_future()
+        batch = self.pending.setdefault(key, [])
+        batch.append((messages, future))
+        if len(batch) >= self.size:
+            self._flush(key)
+        elif len(batch) == 1:
+            self.timers[key] = loop.call_later(self.wait, self._flush, key)
+        return future
+
+    def _flush(self, key):
+        timer = self.timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        batch = self.pending.pop(key, None)
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._send(key, batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _send(self, key, batch):
+        model_name, kwargs = key
+        kwargs = dict(kwargs)
+        prompts = [self.client.prompt_template.format(prompt=messages[0]["content"]) for messages, _ in batch]
+        start = time.perf_counter()
+        self.first_sent = self.first_sent or start
+        try:
+            response = await self.client.async_client.completions.create(
+                model=model_name, prompt=prompts, **kwargs)
+        except (BadRequestError, NotFoundError) as e:
+            # The server takes one prompt per request, or no /completions at all
+            print(f"{self.client.provider_label}: batched completions failed ({e}); sending calls one at a time")
+            self.client.batching_supported = False
+            for messages, future in batch:
+                self._resolve(future, self.client.async_chat_completion(model_name, messages, **kwargs))
+            return
         except Exception as e:
-            print(f"OpenRouter API Error: {e}")  # Log error here as well
-            raise e  # Re-raise the exception to be caught in _llm_call_with_retry
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.last_done = time.perf_counter()
+        self.batches += 1
+        self.requests += len(batch)
+        self.largest = max(self.largest, len(batch))
+
+        n = kwargs.get("n", 1)
+        texts = {}
+        for choice in response.choices:
+            texts.setdefault(choice.index // n, (choice.text, choice.finish_reason))
+        usage = response.usage
+        if usage:
+            self.completion_tokens += usage.completion_tokens
+        prompt_chars = sum(len(prompt) for prompt in prompts) or 1
+        completion_chars = sum(len(text) for text, _ in texts.values()) or 1
+        for index, (_, future) in enumerate(batch):
+            text, finish_reason = texts.get(index, ("", "stop"))
+            share = None
+            if usage:
+                prompt_tokens = round(usage.prompt_tokens * len(prompts[index]) / prompt_chars)
+                completion_tokens = round(usage.completion_tokens * len(text) / completion_chars)
+                share = CompletionUsage.model_construct(
+                    prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                    total_tokens=prompt_tokens + completion_tokens)
+            message = ChatCompletionMessage.model_construct(role="assistant", content=text)
+            if not future.done():
+                future.set_result(ChatCompletion.model_construct(
+                    id=response.id, object="chat.completion", created=response.created, model=response.model,
+                    choices=[Choice.model_construct(index=0, finish_reason=finish_reason or "stop",
+                                                    message=message)],
+                    usage=share, batch_size=len(batch)))
+
+    def _resolve(self, future, call):
+        async def run():
+            try:
+                result = await call
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                return
+            if not future.done():
+                future.set_result(result)
+        task = asyncio.get_running_loop().create_task(run())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def stats(self):
+        elapsed = (self.last_done - self.first_sent) if self.batches else 0.0
+        return {
+            "batch_size": self.size,
+            "batch_wait": self.wait,
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_second": self.completion_tokens / elapsed if elapsed else 0.0,
+        }
+
+
+class OpenAICompatibleClient(BaseLLMClient):
+    """A self-hosted server with the OpenAI API (vLLM, llama.cpp's server,
+    ...) at `base_url`.
+
+    With batch_size > 1, async calls (async_scheduler.py) from any seat or
+    game that arrive within batch_wait seconds of each other go out as one
+    /completions request with a list of prompts, each the chat message
+    rendered with prompt_template. tournament.py plays one game per process,
+    so its calls have nothing to be batched with and go one at a time. If
+    the server rejects a list of prompts, batching is switched off."""
+    provider_label = "OpenAI-compatible"
+
+    def __init__(self, api_key, base_url=None, batch_size=1, batch_wait=0.02, prompt_template="{prompt}"):
+        if not base_url:
+            raise ValueError("The openai_compatible provider needs a base_url")
+        super().__init__(api_key, base_url)
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.prompt_template = prompt_template
+        self.batching_supported = True
+        self._batchers = {}
+
+    async def async_chat_completion(self, model_name, messages, **kwargs):
+        if self.batch_size <= 1 or not self.batching_supported or kwargs.get("stream") or len(messages) != 1:
+            return await super().async_chat_completion(model_name, messages, **kwargs)
+        loop = asyncio.get_running_loop()
+        if loop not in self._batchers:
+            self._batchers[loop] = _MicroBatcher(self, self.batch_size, self.batch_wait)
+        return await self._batchers[loop].submit(model_name, messages, kwargs)
+
+    def batch_stats(self):
+        """Totals over every event loop's batcher, or None if nothing was batched."""
+        batchers = [batcher.stats() for batcher in self._batchers.values()]
+        if not batchers:
+            return None
+        stats = {"batch_size": self.batch_size, "batch_wait": self.batch_wait}
+        for field in ("batches", "requests", "completion_tokens", "tokens_per_second"):
+            stats[field] = sum(batcher[field] for batcher in batchers)
+        stats["largest_batch"] = max(batcher["largest_batch"] for batcher in batchers)
+        stats["mean_batch_size"] = stats["requests"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
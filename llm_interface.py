@@ -1,16 +1,21 @@
 import time
-from openai import OpenAI
+import importlib
 import logging
 import os
 import json
 import random
+import threading
 from prompt_strings import PromptStrings
-from llm_clients import GeminiClient, OpenRouterClient
+from telemetry import TELEMETRY
+import tracing
 
 
 class GameLogger:
-    def __init__(self, log_to_file_enabled):
+    def __init__(self, log_to_file_enabled, file_mode='w', log_dir="logs"):
         self.log_to_file_enabled = log_to_file_enabled
+        self.log_dir = log_dir
+        # 'a' keeps the logs of a game that is being resumed from a checkpoint
+        self.file_mode = file_mode
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.DEBUG)
 
@@ -21,7 +26,7 @@ class GameLogger:
         self.public_logger = None
 
         if self.log_to_file_enabled:
-            log_dir = "logs"
+            log_dir = self.log_dir
             os.makedirs(log_dir, exist_ok=True)
 
             game_log_filepath = os.path.join(log_dir, "game.log")
@@ -30,7 +35,7 @@ class GameLogger:
             game_formatter = logging.Formatter(
                 '%(asctime)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
             game_file_handler = logging.FileHandler(
-                game_log_filepath, mode='w')
+                game_log_filepath, mode=self.file_mode)
             game_file_handler.setFormatter(game_formatter)
             self.logger.addHandler(game_file_handler)
             self.game_file_handler = game_file_handler
@@ -39,7 +44,7 @@ class GameLogger:
             public_logger.setLevel(logging.INFO)
             public_formatter = logging.Formatter('%(message)s')
             public_file_handler = logging.FileHandler(
-                public_log_filepath, mode='w')
+                public_log_filepath, mode=self.file_mode)
             public_file_handler.setFormatter(public_formatter)
             public_logger.addHandler(public_file_handler)
             self.public_log_file_handler = public_file_handler
@@ -48,14 +53,14 @@ class GameLogger:
     def setup_logging(self, player_names):
         if not self.log_to_file_enabled:
             return
-        if self.log_to_file_enabled and self.public_log_file_handler:
+        if self.public_log_file_handler and self.file_mode == 'w':
             self.public_log_file_handler.stream.truncate(0)
             self.public_log_file_handler.stream.seek(0)
 
         for player_name in player_names:
-            player_log_filepath = os.path.join("logs", f"{player_name}.log")
+            player_log_filepath = os.path.join(self.log_dir, f"{player_name}.log")
             player_file_handler = logging.FileHandler(
-                player_log_filepath, mode='w')
+                player_log_filepath, mode=self.file_mode)
             formatter = logging.Formatter('%(message)s')
             player_file_handler.setFormatter(formatter)
             player_logger = logging.getLogger(player_name)
@@ -64,6 +69,7 @@ class GameLogger:
             self.player_loggers[player_name] = player_logger
             self.player_file_handlers[player_name] = player_file_handler
 
+    @tracing.traced("log")
     def log_public_event(self, event):
         if self.log_to_file_enabled and self.public_logger:
             self.public_logger.info(event)
@@ -80,12 +86,15 @@ class GameLogger:
         handlers = self.logger.handlers[:]
         for handler in handlers:
             self.logger.removeHandler(handler)
+        if self.public_logger:
+            self.public_logger.removeHandler(self.public_log_file_handler)
         for player_logger in self.player_loggers.values():
             handlers = player_logger.handlers[:]
             for handler in handlers:
                 player_logger.removeHandler(handler)
 
     # Added full_prompt and raw_llm_response arguments
+    @tracing.traced("log")
     def log_to_debug_file(self, player_name, message, full_prompt=None, raw_llm_response=None):
         if self.log_to_file_enabled:
             self.logger.debug(message)
@@ -111,8 +120,66 @@ class GameLogger:
                         player_file_handler.flush()
 
 
+# Provider name -> client class, or "module:Class" to import on first use.
+# The built-in clients need openai, which takes most of a second to import,
+# so processes that only run scripted seats never load it. Packages can add
+# providers under the PROVIDER_ENTRY_POINTS entry point group.
+PROVIDERS = {
+    "gemini": "llm_clients:GeminiClient",
+    "openrouter": "llm_clients:OpenRouterClient",
+    "openai_compatible": "llm_clients:OpenAICompatibleClient",
+}
+PROVIDER_ENTRY_POINTS = "secret_hitler.providers"
+
+# Clients hold HTTP connection pools, so every player and every game in a
+# process shares one client per provider and API key. async_scheduler.py
+# sets up its games on many threads at once, hence the lock.
+_LLM_CLIENTS = {}
+_LLM_CLIENTS_LOCK = threading.Lock()
+
+
+def register_provider(provider_name, client_class):
+    """Make `provider_name` seats use client_class (a class or "module:Class"),
+    which is called with api_key, base_url and the seat's client_options."""
+    PROVIDERS[provider_name] = client_class
+
+
+def get_provider(provider_name):
+    client_class = PROVIDERS.get(provider_name)
+    if client_class is None:
+        from importlib.metadata import entry_points
+        for entry_point in entry_points(group=PROVIDER_ENTRY_POINTS, name=provider_name):
+            client_class = entry_point.value
+    if client_class is None:
+        raise ValueError(f"Unsupported provider: {provider_name}")
+    if isinstance(client_class, str):
+        module_name, _, class_name = client_class.partition(":")
+        client_class = getattr(importlib.import_module(module_name), class_name)
+        PROVIDERS[provider_name] = client_class
+    return client_class
+
+
+def get_llm_client(provider_name, api_key, base_url=None, options=None):
+    options = options or {}
+    key = (provider_name, api_key, base_url, tuple(sorted(options.items())))
+    with _LLM_CLIENTS_LOCK:
+        if key not in _LLM_CLIENTS:
+            _LLM_CLIENTS[key] = get_provider(provider_name)(api_key=api_key, base_url=base_url, **options)
+        return _LLM_CLIENTS[key]
+
+
+def batch_stats():
+    """[(provider, base_url, stats)] for the pooled clients that batched calls."""
+    stats = []
+    for (provider_name, _, base_url, _), client in list(_LLM_CLIENTS.items()):
+        client_stats = client.batch_stats() if hasattr(client, "batch_stats") else None
+        if client_stats:
+            stats.append((provider_name, base_url, client_stats))
+    return stats
+
+
 class LLMPlayerInterface:
-    def __init__(self, player_name, model_name, api_key, game_logger, llm_debug_enabled=False, slowdown_timer=0, provider_name="gemini"):
+    def __init__(self, player_name, model_name, api_key, game_logger, llm_debug_enabled=False, slowdown_timer=0, provider_name="gemini", base_url=None, stream=False, client_options=None):
         self.player_name = player_name
         self.model_name = model_name
         self.game_rules = PromptStrings.get_game_rules()
@@ -120,13 +187,42 @@ class LLMPlayerInterface:
         self.llm_debug_enabled = llm_debug_enabled
         self.slowdown_timer = slowdown_timer
         self.provider_name = provider_name
-
-        if provider_name == "gemini":
-            self.llm_client = GeminiClient(api_key=api_key)
-        elif provider_name == "openrouter":
-            self.llm_client = OpenRouterClient(api_key=api_key)
-        else:
-            raise ValueError(f"Unsupported provider: {provider_name}")
+        # Streaming costs nothing extra and measures time to first token
+        self.stream = stream
+
+        self.llm_client = get_llm_client(provider_name, api_key, base_url, client_options)
+        # One dict per API call (see telemetry.py)
+        self.call_records = []
+        # perf_counter() when the request in flight was sent, for status reports
+        self.request_started = None
+
+    def _record_call(self, game_phase, attempt, latency, response, parse_status, defaulted=False):
+        usage = getattr(response, "usage", None)
+        # Set by async_scheduler.py, whose calls may wait for a free slot
+        queue_wait = getattr(response, "queue_wait", 0.0) if response is not None else None
+        if latency is not None and queue_wait:
+            latency -= queue_wait
+        # Reasoning tokens are part of completion_tokens and cached tokens
+        # part of prompt_tokens; not every provider reports the details
+        completion_details = getattr(usage, "completion_tokens_details", None)
+        prompt_details = getattr(usage, "prompt_tokens_details", None)
+        record = {
+            "provider": self.provider_name,
+            "model": self.model_name,
+            "phase": game_phase,
+            "attempt": attempt,
+            "queue_wait": queue_wait,
+            "ttft": getattr(response, "time_to_first_token", None),
+            "latency": latency,
+            "prompt_tokens": usage.prompt_tokens if usage else None,
+            "completion_tokens": usage.completion_tokens if usage else None,
+            "reasoning_tokens": getattr(completion_details, "reasoning_tokens", None),
+            "cached_tokens": getattr(prompt_details, "cached_tokens", None),
+            "parse_status": parse_status,
+            "defaulted": bool(defaulted),
+        }
+        self.call_records.append(record)
+        TELEMETRY.record(record)
 
     def get_llm_response(
             self,
@@ -135,13 +231,14 @@ class LLMPlayerInterface:
             allowed_responses,
             game_phase,
             additional_prompt_info=None):
-        return self._llm_call_with_retry(
-            game_state,
-            prompt_text,
-            allowed_responses,
-            game_phase,
-            additional_prompt_info
-        )
+        with tracing.span("llm_call", model=f"{self.provider_name}/{self.model_name}"):
+            return self._llm_call_with_retry(
+                game_state,
+                prompt_text,
+                allowed_responses,
+                game_phase,
+                additional_prompt_info
+            )
 
     def _llm_call_with_retry(
             self,
@@ -155,11 +252,14 @@ class LLMPlayerInterface:
         retry_delay = initial_delay
 
         for attempt in range(max_retries):
+            response = None
+            call_start = call_latency = None
             try:
                 start_time = time.time()
 
-                full_prompt = self._construct_prompt(
-                    game_state, prompt_text, allowed_responses, game_phase, additional_prompt_info)
+                with tracing.span("build_prompt"):
+                    full_prompt = self._construct_prompt(
+                        game_state, prompt_text, allowed_responses, game_phase, additional_prompt_info)
 
                 self.game_logger.log_to_debug_file(
                     self.player_name,
@@ -168,16 +268,25 @@ class LLMPlayerInterface:
                     f"Phase: {game_phase}\n"
                 )
 
-                response = self.llm_client.chat_completion(
-                    model_name=self.model_name,
-                    messages=[{"role": "user", "content": full_prompt}],
-                    n=1,
-                    temperature=0.7,
-                    # max_tokens=500
-                )
+                call_start = self.request_started = time.perf_counter()
+                try:
+                    with tracing.span("request", attempt=attempt + 1):
+                        response = self.llm_client.chat_completion(
+                            model_name=self.model_name,
+                            messages=[{"role": "user", "content": full_prompt}],
+                            n=1,
+                            temperature=0.7,
+                            # max_tokens=500
+                            **({"stream": True} if self.stream else {})
+                        )
+                finally:
+                    self.request_started = None
+                call_latency = time.perf_counter() - call_start
                 llm_response = response.choices[0].message.content.strip()
 
                 if not llm_response:  # Check if llm_response is empty or just whitespace
+                    self._record_call(game_phase, attempt + 1, call_latency, response, "empty",
+                                      defaulted=attempt == max_retries - 1)
                     error_log_msg = (
                         f"WARNING: LLM returned an empty response for {self.player_name} "
                         f"(attempt {attempt + 1}/{max_retries}). "
@@ -192,7 +301,8 @@ class LLMPlayerInterface:
                         delay = max(0, retry_delay + jitter)
                         print(
                             f"Empty response detected. Retrying in {delay:.2f} seconds...")
-                        time.sleep(delay)
+                        with tracing.span("backoff"):
+                            time.sleep(delay)
                         retry_delay *= 2
                         continue  # Go to the next retry attempt
                     else:  # Max retries reached for empty response
@@ -220,17 +330,25 @@ class LLMPlayerInterface:
                     f"--- END RESPONSE ---"
                 )
 
-                action = self._extract_action(
-                    llm_response, allowed_responses)
+                with tracing.span("parse"):
+                    action = self._extract_action(
+                        llm_response, allowed_responses)
+                defaulted = action == "pass" and allowed_responses and "pass" not in allowed_responses
+                self._record_call(game_phase, attempt + 1, call_latency, response,
+                                  "invalid_action" if defaulted else "ok", defaulted)
                 elapsed_time = time.time() - start_time
                 remaining_time = max(0, self.slowdown_timer - elapsed_time)
 
                 if remaining_time > 0:
-                    time.sleep(remaining_time)
+                    with tracing.span("slowdown"):
+                        time.sleep(remaining_time)
 
                 return llm_response, action
 
             except Exception as e:
+                if call_latency is None and call_start is not None:
+                    # Failed calls are timed too; timeouts are what we need to see
+                    call_latency = time.perf_counter() - call_start
                 is_retryable_error = False
                 error_message = str(e)
 
@@ -239,6 +357,8 @@ class LLMPlayerInterface:
                         "timeout" in error_msg or
                         "APIError" in error_message):
                     is_retryable_error = True
+                self._record_call(game_phase, attempt + 1, call_latency, response, "error",
+                                  defaulted=not (attempt < max_retries - 1 and is_retryable_error))
 
                 error_log_msg = (
                     f"Error calling LLM for {self.player_name} "
@@ -254,7 +374,8 @@ class LLMPlayerInterface:
                     delay = max(0, retry_delay + jitter)
                     print(
                         f"Retryable error detected. Retrying in {delay:.2f} seconds...")
-                    time.sleep(delay)
+                    with tracing.span("backoff"):
+                        time.sleep(delay)
                     retry_delay *= 2
                 else:
                     print(
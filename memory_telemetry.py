@@ -0,0 +1,152 @@
+"""Memory growth per round and per game, from tracemalloc.
+
+    python tournament.py matchups.json --memory [--leak_kb 256]
+
+Each game then writes memory.jsonl to its directory, one line at the start
+of every round and one at the end of the game, with the bytes traced in
+total; the bytes held by the game's structures (public log, private logs --
+the shared event log plus each player's overlay, which holds their full
+responses -- discussion history and call records); the bytes still
+allocated by prompt building and by the LLM clients; the number of logging
+handlers attached; and the allocation sites that grew most since the game
+started.
+
+After each game, once its runner is gone and its log files are closed, the
+worker compares traced memory with what it was before the game started.
+Growth of more than --leak_kb prints a leak warning with the top allocation
+sites. The first game in each worker is exempt, since it warms up import
+caches and connection pools.
+"""
+import gc
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+# Allocations attributed to a category by the file that made them
+PROMPT_FILES = ("llm_interface.py", "prompt_strings.py")
+CLIENT_FILES = ("llm_clients.py", "/openai/", "/httpx/", "/httpcore/", "/ssl.py")
+
+_monitor = None
+
+
+def deep_size(obj, seen=None):
+    """Bytes of obj and the containers and strings it holds, counting
+    shared objects once."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+def structure_sizes(runner):
+    game_state = runner.game_state
+    return {
+        "public_log": deep_size(game_state.public_log),
+        "private_logs": deep_size((game_state.event_log, game_state.private_overlays)),
+        "discussion": deep_size(game_state.discussion_history),
+        "call_records": deep_size([getattr(player, "call_records", []) for player in
+                                   runner.player_llm_configs.values()]),
+    }
+
+
+def logging_handlers():
+    loggers = [logging.getLogger()] + [logger for logger in logging.Logger.manager.loggerDict.values()
+                                       if isinstance(logger, logging.Logger)]
+    return sum(len(logger.handlers) for logger in loggers)
+
+
+def _snapshot():
+    # Leave out tracemalloc's own bookkeeping
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+def _file_bytes(snapshot, patterns):
+    return sum(stat.size for stat in snapshot.statistics("filename")
+               if any(pattern in stat.traceback[0].filename for pattern in patterns))
+
+
+def _top_sites(snapshot, baseline, top):
+    return [{"site": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+             "bytes": stat.size_diff, "count": stat.count_diff}
+            for stat in snapshot.compare_to(baseline, "lineno")[:top] if stat.size_diff > 0]
+
+
+class MemoryMonitor:
+    def __init__(self, leak_kb=256, top=5):
+        self.leak_bytes = leak_kb * 1024
+        self.top = top
+        self.games = 0
+        self.baseline = None
+        self.path = None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin_game(self, path):
+        gc.collect()
+        self.baseline = _snapshot()
+        self.path = path
+        with open(path, "w"):
+            pass
+
+    def record_round(self, runner, rounds):
+        snapshot = _snapshot()
+        record = {
+            "rounds": rounds,
+            "time": time.time(),
+            "traced": tracemalloc.get_traced_memory()[0],
+            **structure_sizes(runner),
+            "prompts": _file_bytes(snapshot, PROMPT_FILES),
+            "clients": _file_bytes(snapshot, CLIENT_FILES),
+            "logging_handlers": logging_handlers(),
+            "top_sites": _top_sites(snapshot, self.baseline, self.top),
+        }
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        return record
+
+    def end_game(self, game_id):
+        """Check what the game left behind; returns the bytes retained."""
+        gc.collect()
+        snapshot = _snapshot()
+        retained = sum(stat.size_diff for stat in snapshot.compare_to(self.baseline, "filename"))
+        self.games += 1
+        if self.games > 1 and retained > self.leak_bytes:
+            print(f"WARNING: {game_id} left {retained / 1024:.0f} KB allocated after its logs were closed; "
+                  f"{logging_handlers()} logging handlers attached. Largest growth:")
+            for site in _top_sites(snapshot, self.baseline, self.top):
+                print(f"  {site['site']:<40} {site['bytes'] / 1024:>9.1f} KB in {site['count']} blocks")
+        self.baseline = None
+        return retained
+
+
+def enable(leak_kb=256, top=5):
+    global _monitor
+    if _monitor is None:
+        _monitor = MemoryMonitor(leak_kb, top)
+    return _monitor
+
+
+def begin_game(path):
+    if _monitor is not None:
+        _monitor.begin_game(path)
+
+
+def record_round(runner, rounds):
+    if _monitor is not None and _monitor.baseline is not None:
+        _monitor.record_round(runner, rounds)
+
+
+def end_game(game_id):
+    if _monitor is not None and _monitor.baseline is not None:
+        return _monitor.end_game(game_id)
+    return None
@@ -0,0 +1,274 @@
+"""Live metrics for running tournaments over HTTP.
+
+    python tournament.py matchups.json --metrics_port 9100
+    python async_scheduler.py matchups.json --metrics_port 9100
+
+serves, on 127.0.0.1 only:
+
+    /metrics        Prometheus text format
+    /metrics.json   the same numbers as JSON
+    /               a status page listing every running game's round and phase
+
+The metrics are active games, finished games and games per hour, LLM calls
+in flight per provider, rate-limiter slots and waiters (async_scheduler.py
+only), calls, retries and default actions per model, tokens and spend per
+model, and latency quantiles per model.
+
+The server runs on its own thread and builds every response from a
+snapshot taken when it is requested, so the games pay nothing between
+scrapes. tournament.py's games run in worker processes; each worker writes
+its game's status to status.json every few seconds for TournamentMonitor to
+read.
+"""
+import html
+import json
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cost_governor import CostGovernor
+from telemetry import CallTelemetry
+
+STATUS_INTERVAL = 2.0
+
+
+def build_metrics(start, statuses, finished, telemetry, prices=None, rate_limiters=None):
+    """The metrics dict served as JSON and rendered for Prometheus.
+
+    `statuses` are GameRunner.status() dicts of the running games,
+    `finished` counts finished games by status, `telemetry` is a
+    CallTelemetry of every call so far and `rate_limiters` maps a limiter
+    name to its limit, slots in use and waiting calls."""
+    elapsed = time.time() - start
+    governor = CostGovernor(prices)
+    in_flight = Counter(call["provider"] for status in statuses for call in status["in_flight"])
+    calls, tokens, spend = {}, {}, {}
+    for (model, _, parse_status), count in telemetry.outcomes.items():
+        calls.setdefault(model, Counter())[parse_status] += count
+    for (model, field), count in telemetry.tokens.items():
+        tokens.setdefault(model, {})[field] = count
+    for model, counts in tokens.items():
+        provider, _, name = model.partition("/")
+        usage = {field: counts.get(field, 0) for field in
+                 ("prompt_tokens", "completion_tokens", "reasoning_tokens", "cached_tokens")}
+        cost = governor.seat_cost({"provider": provider, "model": name}, usage)
+        if cost is not None:
+            spend[model] = cost
+    latency = {row["model"]: {"p50": row["latency_p50"], "p95": row["latency_p95"], "p99": row["latency_p99"]}
+               for row in telemetry.summary() if row["phase"] == "all"}
+    return {
+        "uptime_seconds": elapsed,
+        "active_games": len(statuses),
+        "games_finished": dict(finished),
+        "games_per_hour": sum(finished.values()) / elapsed * 3600 if elapsed else 0.0,
+        "calls_in_flight": dict(in_flight),
+        "rate_limiters": rate_limiters or {},
+        "calls": {model: dict(counts) for model, counts in calls.items()},
+        "retries": dict(telemetry.retries),
+        "default_actions": dict(telemetry.default_actions),
+        "tokens": tokens,
+        "spend_dollars": spend,
+        "latency_seconds": latency,
+        "games": statuses,
+    }
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(metrics):
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP secret_hitler_{name} {help_text}")
+        lines.append(f"# TYPE secret_hitler_{name} {kind}")
+        for labels, value in samples:
+            if value is None:
+                continue
+            label_text = ",".join(f'{key}="{_label(label)}"' for key, label in labels.items())
+            lines.append(f"secret_hitler_{name}{{{label_text}}} {value}" if label_text
+                         else f"secret_hitler_{name} {value}")
+
+    metric("active_games", "gauge", "Games being played", [({}, metrics["active_games"])])
+    metric("games_finished_total", "counter", "Finished games by status",
+           [({"status": status}, count) for status, count in metrics["games_finished"].items()])
+    metric("games_per_hour", "gauge", "Finished games per hour since the start",
+           [({}, metrics["games_per_hour"])])
+    metric("calls_in_flight", "gauge", "LLM calls awaiting a response",
+           [({"provider": provider}, count) for provider, count in metrics["calls_in_flight"].items()])
+    for field, help_text in (("limit", "Concurrent calls allowed"), ("in_use", "Slots in use"),
+                             ("waiting", "Calls waiting for a slot")):
+        metric(f"rate_limiter_{field}", "gauge", help_text,
+               [({"limiter": name}, state[field]) for name, state in metrics["rate_limiters"].items()])
+    metric("llm_calls_total", "counter", "LLM calls by parse outcome",
+           [({"model": model, "status": status}, count)
+            for model, counts in metrics["calls"].items() for status, count in counts.items()])
+    metric("llm_retries_total", "counter", "LLM calls that were retries",
+           [({"model": model}, count) for model, count in metrics["retries"].items()])
+    metric("default_actions_total", "counter", "Decisions that fell back to a default action",
+           [({"model": model}, count) for model, count in metrics["default_actions"].items()])
+    metric("tokens_total", "counter", "Tokens by model and kind",
+           [({"model": model, "kind": field}, count)
+            for model, counts in metrics["tokens"].items() for field, count in counts.items()])
+    metric("spend_dollars_total", "counter", "Dollars spent by model (see cost_governor.py)",
+           [({"model": model}, cost) for model, cost in metrics["spend_dollars"].items()])
+    metric("llm_latency_seconds", "gauge", "LLM call latency quantiles",
+           [({"model": model, "quantile": q}, quantiles[key])
+            for model, quantiles in metrics["latency_seconds"].items()
+            for q, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99"))])
+    return "\n".join(lines) + "\n"
+
+
+def status_page(metrics):
+    rows = "".join(
+        f"<tr><td>{html.escape(str(game['game_id']))}</td><td>{game['round']}</td>"
+        f"<td>{html.escape(str(game['phase'] or ''))}</td>"
+        f"<td>{game['lib_policies']}/{game['fasc_policies']}</td>"
+        f"<td>{', '.join(html.escape(call['model']) for call in game['in_flight'])}</td></tr>"
+        for game in sorted(metrics["games"], key=lambda game: str(game["game_id"])))
+    finished = ", ".join(f"{count} {status}" for status, count in metrics["games_finished"].items()) or "none"
+    spend = sum(metrics["spend_dollars"].values())
+    return (f"<html><head><title>Secret Hitler games</title><meta http-equiv='refresh' content='5'></head>"
+            f"<body><h1>{metrics['active_games']} games running</h1>"
+            f"<p>Finished: {finished}; {metrics['games_per_hour']:.0f} games/hour; ${spend:.2f} spent. "
+            f"<a href='/metrics'>Prometheus</a> <a href='/metrics.json'>JSON</a></p>"
+            f"<table border='1' cellpadding='4'><tr><th>game</th><th>round</th><th>phase</th>"
+            f"<th>policies (L/F)</th><th>waiting on</th></tr>{rows}</table></body></html>")
+
+
+class MetricsServer:
+    """Serves collect()'s metrics dict on a daemon thread."""
+
+    def __init__(self, collect, port, host="127.0.0.1"):
+        self.collect = collect
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/metrics":
+                    body, content_type = prometheus_text(server.collect()), "text/plain; version=0.0.4"
+                elif path == "/metrics.json":
+                    body, content_type = json.dumps(server.collect()), "application/json"
+                elif path == "/":
+                    body, content_type = status_page(server.collect()), "text/html"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        host, port = self.httpd.server_address[:2]
+        print(f"Metrics at http://{host}:{port}/")
+        return self
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class StatusWriter(threading.Thread):
+    """Writes a running game's status and call telemetry to `path` every
+    `interval` seconds, from a worker process for TournamentMonitor."""
+
+    def __init__(self, path, interval=STATUS_INTERVAL):
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.runner = None
+        # A status left by an earlier attempt would show until the first write
+        if os.path.exists(path):
+            os.remove(path)
+        self._stopped = threading.Event()
+
+    def write(self):
+        if self.runner is None:
+            return
+        status = {"status": self.runner.status(), "telemetry": self.runner.call_telemetry().to_dict()}
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(status, f)
+        os.replace(self.path + ".tmp", self.path)
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.write()
+
+    def stop(self):
+        """Stop and write the final status."""
+        self._stopped.set()
+        self.join()
+        self.write()
+
+
+def _read_status(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class TournamentMonitor:
+    """Metrics for tournament.py: the parent knows which games are running
+    and finished, and reads the rest from the status.json its workers write."""
+
+    def __init__(self, output_dir, prices=None):
+        self.output_dir = output_dir
+        self.prices = prices
+        self.start = time.time()
+        self.running = set()
+        self.finished = Counter()
+        self.telemetry = CallTelemetry()
+        self.lock = threading.Lock()
+
+    def _status_path(self, game_id):
+        return os.path.join(self.output_dir, "games", game_id, "status.json")
+
+    def game_started(self, game):
+        with self.lock:
+            self.running.add(game["game_id"])
+
+    def game_finished(self, game, result):
+        """Called for every finished attempt; `result` is None for a failed
+        attempt that will be retried."""
+        status = _read_status(self._status_path(game["game_id"]))
+        with self.lock:
+            self.running.discard(game["game_id"])
+            if result:
+                self.finished[result["status"]] += 1
+            if status:
+                self.telemetry.merge(CallTelemetry.from_dict(status["telemetry"]))
+
+    def collect(self):
+        with self.lock:
+            running = list(self.running)
+            telemetry = CallTelemetry()
+            telemetry.merge(self.telemetry)
+            finished = Counter(self.finished)
+        statuses = []
+        for game_id in running:
+            status = _read_status(self._status_path(game_id))
+            if status:
+                statuses.append(status["status"])
+                telemetry.merge(CallTelemetry.from_dict(status["telemetry"]))
+            else:
+                statuses.append({"game_id": game_id, "round": 0, "phase": None, "lib_policies": 0,
+                                 "fasc_policies": 0, "in_flight": []})
+        return build_metrics(self.start, statuses, finished, telemetry, self.prices)
@@ -0,0 +1,186 @@
+"""CPU profiles of game orchestration.
+
+    python tournament.py matchups.json --profile
+    python tournament.py matchups.json --profile calls
+
+With scripted players the LLM is out of the picture and throughput is
+limited by the orchestration code itself. --profile runs every game under
+cProfile and a SIGPROF stack sampler, and writes for all games together:
+
+    profile.prof        cProfile stats, for pstats or snakeviz
+    profile.txt         functions sorted by their own CPU time
+    profile.collapsed   sampled stacks in collapsed format, for
+                        flamegraph.pl or speedscope
+
+The sampler runs alongside cProfile, so its stacks include cProfile's own
+overhead, spread roughly in proportion to the calls made. Both modes also
+count calls to and time spent in the known hot spots (HOT_SPOTS); "--profile
+calls" does only that, which is cheap enough to confirm a speedup without
+the distortion of a full profile.
+"""
+import cProfile
+import functools
+import importlib
+import io
+import json
+import os
+import pstats
+import signal
+import time
+from collections import Counter
+
+PROFILE_MODES = ("cpu", "calls")
+
+# function name -> (module, class) defining it
+HOT_SPOTS = {
+    "display_state_terminal": ("secret_hitler_game", "GameRunner"),
+    "_construct_prompt": ("llm_interface", "LLMPlayerInterface"),
+    "_extract_json_field": ("llm_interface", "LLMPlayerInterface"),
+    "_log_private": ("secret_hitler_engine", "GameState"),
+}
+
+# function name -> [calls, seconds], for this process
+_call_counts = {}
+
+
+def _counted(name, function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            counts = _call_counts.setdefault(name, [0, 0.0])
+            counts[0] += 1
+            counts[1] += time.perf_counter() - start
+    wrapper.counted = True
+    return wrapper
+
+
+def count_hot_spots():
+    """Wrap the HOT_SPOTS methods to count their calls and time. Nothing is
+    wrapped, and nothing costs anything, until this is called."""
+    for name, (module, class_name) in HOT_SPOTS.items():
+        owner = getattr(importlib.import_module(module), class_name)
+        function = getattr(owner, name)
+        if not getattr(function, "counted", False):
+            setattr(owner, name, _counted(name, function))
+
+
+def take_call_counts():
+    """Return {name: {"calls", "seconds"}} counted so far and start afresh."""
+    counts = {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in _call_counts.items()}
+    _call_counts.clear()
+    return counts
+
+
+class GameProfiler:
+    """cProfile plus a stack sampler on SIGPROF, which fires every
+    `interval` seconds of CPU time. The sampler only sees the main thread,
+    which is where tournament workers play."""
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.profile = cProfile.Profile()
+        self.stacks = Counter()
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        self.stacks[";".join(reversed(stack))] += 1
+
+    def __enter__(self):
+        signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self.profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.profile.disable()
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+        return False
+
+    def save(self, directory):
+        self.profile.dump_stats(os.path.join(directory, "profile.prof"))
+        write_collapsed(os.path.join(directory, "profile.collapsed"), self.stacks)
+
+
+def write_collapsed(path, stacks):
+    with open(path, "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+def read_collapsed(path):
+    stacks = Counter()
+    with open(path) as f:
+        for line in f:
+            stack, _, count = line.rpartition(" ")
+            stacks[stack] += int(count)
+    return stacks
+
+
+def hot_function_table(stats, limit=30):
+    stream = io.StringIO()
+    stats.stream = stream
+    # print_stats would otherwise list every merged file
+    stats.files = []
+    stats.sort_stats("tottime").print_stats(limit)
+    return stream.getvalue()
+
+
+def merge_profiles(directories, output_dir, games=None):
+    """Combine the profiles and hot-spot counts saved in `directories` into
+    profile.prof, profile.txt, profile.collapsed and hot_spots.json in
+    output_dir, print the hot-function and hot-spot tables, and return the
+    merged counts."""
+    profiles = [os.path.join(d, "profile.prof") for d in directories
+                if os.path.exists(os.path.join(d, "profile.prof"))]
+    if profiles:
+        stats = pstats.Stats(*profiles)
+        stats.dump_stats(os.path.join(output_dir, "profile.prof"))
+        table = hot_function_table(stats)
+        with open(os.path.join(output_dir, "profile.txt"), "w") as f:
+            f.write(table)
+        stacks = Counter()
+        for d in directories:
+            if os.path.exists(os.path.join(d, "profile.collapsed")):
+                stacks.update(read_collapsed(os.path.join(d, "profile.collapsed")))
+        write_collapsed(os.path.join(output_dir, "profile.collapsed"), stacks)
+        print(f"\n======== HOT FUNCTIONS ({len(profiles)} games) ========")
+        print(table)
+        print(f"Profiles written to {output_dir}/profile.prof, profile.txt and profile.collapsed")
+
+    counts = {}
+    for d in directories:
+        path = os.path.join(d, "hot_spots.json")
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            for name, count in json.load(f).items():
+                merged = counts.setdefault(name, {"calls": 0, "seconds": 0.0})
+                merged["calls"] += count["calls"]
+                merged["seconds"] += count["seconds"]
+    if counts:
+        with open(os.path.join(output_dir, "hot_spots.json"), "w") as f:
+            json.dump(counts, f, indent=2)
+        print_call_counts(counts, games or len(directories))
+    return counts
+
+
+def save_call_counts(directory):
+    with open(os.path.join(directory, "hot_spots.json"), "w") as f:
+        json.dump(take_call_counts(), f)
+
+
+def print_call_counts(counts, games=1):
+    print("\n======== HOT SPOTS ========")
+    print(f"{'function':<26} {'calls':>10} {'calls/game':>11} {'seconds':>9} {'us/call':>9}")
+    for name, count in sorted(counts.items(), key=lambda item: -item[1]["seconds"]):
+        calls, seconds = count["calls"], count["seconds"]
+        print(f"{name:<26} {calls:>10} {calls / games:>11.1f} {seconds:>9.3f} "
+              f"{seconds / calls * 1e6 if calls else 0:>9.1f}")
@@ -0,0 +1,378 @@
+"""SQLite store of finished games for the leaderboard.
+
+    python secret_hitler_game.py 7 --results_db results.db ...
+    python tournament.py matchups.json --results_db results.db
+    python results_store.py leaderboard --db results.db --players 7
+
+Schema:
+
+    games    one row per game: player count, winner, win reason, policy counts
+    models   one row per (provider, model)
+    seats    one row per seat: model, role, alive at the end, won
+    calls    one row per LLM call: phase, attempt, timings, tokens, parse status
+    call_histograms
+             latency, time-to-first-token and queue-wait histograms per
+             (model, phase), merged as games are recorded (see telemetry.py)
+    model_results, model_calls
+             wins and games per (model, player count, role) and call totals
+             per model, kept up to date in the same transaction as every
+             insert so leaderboard queries read a few hundred rows instead
+             of scanning every seat and call
+
+The database runs in WAL mode, so tournament workers on one host can write
+to it concurrently while it is being read.
+"""
+import argparse
+import json
+import sqlite3
+import time
+from collections import Counter, defaultdict
+
+from secret_hitler_engine import Role
+from telemetry import TIMINGS, Histogram
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    game_key TEXT UNIQUE,
+    finished_at REAL NOT NULL,
+    num_players INTEGER NOT NULL,
+    winner TEXT,
+    win_reason TEXT,
+    lib_policies INTEGER NOT NULL,
+    fasc_policies INTEGER NOT NULL,
+    elections INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_num_players ON games (num_players);
+
+CREATE TABLE IF NOT EXISTS models (
+    id INTEGER PRIMARY KEY,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    UNIQUE (provider, model)
+);
+
+CREATE TABLE IF NOT EXISTS seats (
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    seat INTEGER NOT NULL,
+    player_name TEXT NOT NULL,
+    model_id INTEGER NOT NULL REFERENCES models (id),
+    role TEXT NOT NULL,
+    alive INTEGER NOT NULL,
+    won INTEGER NOT NULL,
+    PRIMARY KEY (game_id, seat)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS seats_model ON seats (model_id, role, won);
+CREATE INDEX IF NOT EXISTS seats_role ON seats (role, won);
+
+CREATE TABLE IF NOT EXISTS calls (
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    seat INTEGER NOT NULL,
+    phase TEXT,
+    latency REAL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    parse_status TEXT NOT NULL,
+    attempt INTEGER,
+    queue_wait REAL,
+    ttft REAL,
+    reasoning_tokens INTEGER,
+    cached_tokens INTEGER
+);
+CREATE INDEX IF NOT EXISTS calls_game ON calls (game_id, seat);
+
+CREATE TABLE IF NOT EXISTS model_results (
+    model_id INTEGER NOT NULL REFERENCES models (id),
+    num_players INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    PRIMARY KEY (model_id, num_players, role)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS model_calls (
+    model_id INTEGER PRIMARY KEY REFERENCES models (id),
+    calls INTEGER NOT NULL,
+    timed_calls INTEGER NOT NULL,
+    latency REAL NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    parse_failures INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS call_histograms (
+    model_id INTEGER NOT NULL REFERENCES models (id),
+    phase TEXT NOT NULL,
+    timing TEXT NOT NULL,
+    histogram TEXT NOT NULL,
+    PRIMARY KEY (model_id, phase, timing)
+) WITHOUT ROWID;
+"""
+
+# Columns added to calls after the first release, for databases created before
+CALL_COLUMNS_ADDED = {"attempt": "INTEGER", "queue_wait": "REAL", "ttft": "REAL",
+                      "reasoning_tokens": "INTEGER", "cached_tokens": "INTEGER"}
+
+# Roles are stored as the Role values ("Liberal", "FASCIST", "Hitler"); a
+# seat's team is Liberal or Fascist, which Hitler shares.
+LEADERBOARD_QUERY = """
+SELECT m.provider, m.model, SUM(r.games), SUM(r.wins),
+       SUM(CASE WHEN r.role = 'Liberal' THEN r.games END),
+       SUM(CASE WHEN r.role = 'Liberal' THEN r.wins END),
+       SUM(CASE WHEN r.role != 'Liberal' THEN r.games END),
+       SUM(CASE WHEN r.role != 'Liberal' THEN r.wins END)
+FROM model_results r JOIN models m ON m.id = r.model_id
+WHERE (?1 IS NULL OR r.num_players = ?1) AND (?2 IS NULL OR r.role = ?2)
+GROUP BY r.model_id
+ORDER BY 1.0 * SUM(r.wins) / SUM(r.games) DESC
+"""
+
+CALL_STATS_QUERY = """
+SELECT m.provider, m.model, c.calls, c.latency / NULLIF(c.timed_calls, 0), c.prompt_tokens,
+       c.completion_tokens, 1.0 * c.parse_failures / c.calls
+FROM model_calls c JOIN models m ON m.id = c.model_id
+ORDER BY m.provider, m.model
+"""
+
+
+def game_record(game_state, player_configs, player_interfaces, game_key=None):
+    """A finished game as the dict record_games() takes."""
+    winner = game_state.get_winning_team()
+    seats = []
+    for player in game_state.players:
+        seat = game_state.player_ids[player]
+        role = game_state.get_player_role(player)
+        config = player_configs[player]
+        seats.append({
+            "seat": seat,
+            "player_name": player,
+            "provider": config["provider"],
+            "model": config["model"],
+            "role": role.value,
+            "alive": bool(game_state.alive_mask >> seat & 1),
+            "won": winner is not None and (winner == Role.LIBERAL) == (role == Role.LIBERAL),
+            "calls": getattr(player_interfaces[player], "call_records", []),
+        })
+    return {
+        "game_key": game_key,
+        "finished_at": time.time(),
+        "num_players": game_state.num_players,
+        "winner": winner.name.capitalize() if winner else None,
+        "win_reason": game_state.get_win_reason(),
+        "lib_policies": game_state.lib_policies,
+        "fasc_policies": game_state.fasc_policies,
+        "elections": len(game_state.election_history),
+        "seats": seats,
+    }
+
+
+class ResultsStore:
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(calls)")}
+        for column, column_type in CALL_COLUMNS_ADDED.items():
+            if column not in columns:
+                self.connection.execute(f"ALTER TABLE calls ADD COLUMN {column} {column_type}")
+        self._model_ids = {}
+
+    def _model_id(self, cursor, provider, model):
+        key = (provider, model)
+        if key not in self._model_ids:
+            cursor.execute("INSERT OR IGNORE INTO models (provider, model) VALUES (?, ?)", key)
+            self._model_ids[key] = cursor.execute(
+                "SELECT id FROM models WHERE provider = ? AND model = ?", key).fetchone()[0]
+        return self._model_ids[key]
+
+    def record_games(self, records):
+        """Insert games in one transaction. Games whose game_key is already
+        stored are skipped. Returns the number inserted."""
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            inserted = 0
+            seat_rows, call_rows = [], []
+            # Aggregates for model_results and model_calls
+            games, wins = Counter(), Counter()
+            call_totals = defaultdict(lambda: [0, 0, 0.0, 0, 0, 0])
+            histograms = {}
+            for record in records:
+                cursor.execute(
+                    "INSERT OR IGNORE INTO games (game_key, finished_at, num_players, winner,"
+                    " win_reason, lib_policies, fasc_policies, elections)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (record["game_key"], record["finished_at"], record["num_players"], record["winner"],
+                     record["win_reason"], record["lib_policies"], record["fasc_policies"],
+                     record["elections"]))
+                if cursor.rowcount == 0:
+                    continue
+                inserted += 1
+                game_id = cursor.lastrowid
+                for seat in record["seats"]:
+                    model_id = self._model_id(cursor, seat["provider"], seat["model"])
+                    seat_rows.append((game_id, seat["seat"], seat["player_name"], model_id,
+                                      seat["role"], seat["alive"], seat["won"]))
+                    key = (model_id, record["num_players"], seat["role"])
+                    games[key] += 1
+                    wins[key] += bool(seat["won"])
+                    totals = call_totals[model_id]
+                    for call in seat["calls"]:
+                        call_rows.append((game_id, seat["seat"], call["phase"], call["latency"],
+                                          call["prompt_tokens"], call["completion_tokens"],
+                                          call["parse_status"], call.get("attempt"), call.get("queue_wait"),
+                                          call.get("ttft"), call.get("reasoning_tokens"),
+                                          call.get("cached_tokens")))
+                        for timing in TIMINGS:
+                            if call.get(timing) is not None:
+                                key = (model_id, call["phase"], timing)
+                                if key not in histograms:
+                                    histograms[key] = Histogram()
+                                histograms[key].record(call[timing])
+                        totals[0] += 1
+                        if call["latency"] is not None:
+                            totals[1] += 1
+                            totals[2] += call["latency"]
+                        totals[3] += call["prompt_tokens"] or 0
+                        totals[4] += call["completion_tokens"] or 0
+                        totals[5] += call["parse_status"] != "ok"
+            cursor.executemany("INSERT INTO seats VALUES (?, ?, ?, ?, ?, ?, ?)", seat_rows)
+            cursor.executemany(
+                "INSERT INTO calls (game_id, seat, phase, latency, prompt_tokens, completion_tokens,"
+                " parse_status, attempt, queue_wait, ttft, reasoning_tokens, cached_tokens)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", call_rows)
+            for key, histogram in histograms.items():
+                row = cursor.execute(
+                    "SELECT histogram FROM call_histograms WHERE model_id = ? AND phase = ? AND timing = ?",
+                    key).fetchone()
+                if row:
+                    histogram.merge(Histogram.from_dict(json.loads(row[0])))
+                cursor.execute("INSERT OR REPLACE INTO call_histograms VALUES (?, ?, ?, ?)",
+                               (*key, json.dumps(histogram.to_dict())))
+            cursor.executemany(
+                "INSERT INTO model_results VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (model_id, num_players, role)"
+                " DO UPDATE SET games = games + excluded.games, wins = wins + excluded.wins",
+                [(*key, count, wins[key]) for key, count in games.items()])
+            cursor.executemany(
+                "INSERT INTO model_calls VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (model_id) DO UPDATE SET calls = calls + excluded.calls,"
+                " timed_calls = timed_calls + excluded.timed_calls, latency = latency + excluded.latency,"
+                " prompt_tokens = prompt_tokens + excluded.prompt_tokens,"
+                " completion_tokens = completion_tokens + excluded.completion_tokens,"
+                " parse_failures = parse_failures + excluded.parse_failures",
+                [(model_id, *totals) for model_id, totals in call_totals.items() if totals[0]])
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+        return inserted
+
+    def record_game(self, record):
+        return self.record_games([record]) == 1
+
+    def leaderboard(self, num_players=None, role=None):
+        """Per model: games, wins and win rate overall, as a Liberal and on
+        the Fascist team, best overall win rate first."""
+        rows = self.connection.execute(LEADERBOARD_QUERY, (num_players, role))
+        board = []
+        for provider, model, games, wins, lib_games, lib_wins, fasc_games, fasc_wins in rows:
+            board.append({
+                "provider": provider, "model": model, "games": games, "wins": wins,
+                "win_rate": wins / games,
+                "liberal_games": lib_games or 0,
+                "liberal_win_rate": lib_wins / lib_games if lib_games else None,
+                "fascist_games": fasc_games or 0,
+                "fascist_win_rate": fasc_wins / fasc_games if fasc_games else None,
+            })
+        return board
+
+    def call_stats(self):
+        return [
+            {"provider": provider, "model": model, "calls": calls, "mean_latency": latency,
+             "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+             "parse_failure_rate": failures}
+            for provider, model, calls, latency, prompt_tokens, completion_tokens, failures
+            in self.connection.execute(CALL_STATS_QUERY)]
+
+    def latency_percentiles(self, timing="latency"):
+        """p50/p95/p99 of a call timing per model and phase, with phase "all"
+        for each model's calls together."""
+        merged = {}
+        rows = self.connection.execute(
+            "SELECT m.provider, m.model, h.phase, h.histogram FROM call_histograms h"
+            " JOIN models m ON m.id = h.model_id WHERE h.timing = ?", (timing,))
+        for provider, model, phase, histogram in rows:
+            histogram = Histogram.from_dict(json.loads(histogram))
+            for key in ((f"{provider}/{model}", phase), (f"{provider}/{model}", "all")):
+                merged.setdefault(key, Histogram()).merge(histogram)
+        return [{"model": model, "phase": phase, "calls": histogram.count, "mean": histogram.mean,
+                 "p50": histogram.percentile(50), "p95": histogram.percentile(95),
+                 "p99": histogram.percentile(99), "max": histogram.max}
+                for (model, phase), histogram in sorted(merged.items())]
+
+    def close(self):
+        self.connection.close()
+
+
+def _format_rate(rate):
+    return "   -" if rate is None else f"{rate:.3f}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the game results store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    leaderboard_parser = subparsers.add_parser("leaderboard", help="Win rates per model")
+    leaderboard_parser.add_argument("--players", type=int, default=None,
+                                    help="Only games with this many players")
+    leaderboard_parser.add_argument("--role", choices=["Liberal", "FASCIST", "Hitler"], default=None)
+    subparsers.add_parser("calls", help="Latency, tokens and parse failures per model")
+    latency_parser = subparsers.add_parser("latency", help="Call timing percentiles per model and phase")
+    latency_parser.add_argument("--timing", choices=["latency", "ttft", "queue_wait"], default="latency")
+    import_parser = subparsers.add_parser(
+        "import", help="Add the games of a tournament results.jsonl (without per-call stats)")
+    import_parser.add_argument("results", help="results.jsonl from tournament.py")
+    for subparser in subparsers.choices.values():
+        subparser.add_argument("--db", required=True, help="SQLite results database")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    if args.command == "leaderboard":
+        print(f"{'model':<40} {'games':>7} {'win':>6} {'liberal':>8} {'fascist':>8}")
+        for row in store.leaderboard(args.players, args.role):
+            name = f"{row['provider']}/{row['model']}"
+            print(f"{name:<40} {row['games']:>7} {row['win_rate']:>6.3f} "
+                  f"{_format_rate(row['liberal_win_rate']):>8} {_format_rate(row['fascist_win_rate']):>8}")
+    elif args.command == "calls":
+        for row in store.call_stats():
+            print(json.dumps(row))
+    elif args.command == "latency":
+        print(f"{'model':<40} {'phase':<24} {'calls':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}")
+        for row in store.latency_percentiles(args.timing):
+            print(f"{row['model']:<40} {row['phase']:<24} {row['calls']:>7} {row['p50']:>7.2f}"
+                  f" {row['p95']:>7.2f} {row['p99']:>7.2f} {row['max']:>7.2f}")
+    elif args.command == "import":
+        records = []
+        with open(args.results) as f:
+            for result in map(json.loads, f):
+                if result["status"] != "ok":
+                    continue
+                players = list(result["roles"])
+                records.append({
+                    "game_key": result["game_id"], "finished_at": time.time(),
+                    "num_players": len(players), "winner": result["winner"],
+                    "win_reason": result["win_reason"],
+                    "lib_policies": result["lib_policies"], "fasc_policies": result["fasc_policies"],
+                    "elections": result["elections"],
+                    "seats": [{
+                        "seat": seat, "player_name": player,
+                        "provider": result["player_models"][player]["provider"],
+                        "model": result["player_models"][player].get(
+                            "model", result["player_models"][player]["provider"]),
+                        "role": result["roles"][player], "alive": player in result["alive"],
+                        "won": (result["roles"][player] != "Liberal") == (result["winner"] == "Fascist"),
+                        "calls": []} for seat, player in enumerate(players)],
+                })
+        print(f"Imported {store.record_games(records)} new games")
+    store.close()
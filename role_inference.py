@@ -0,0 +1,242 @@
+"""Exact Bayesian inference over the hidden roles.
+
+The hidden information in Secret Hitler is which seats form the Fascist team
+and which of them is Hitler. With at most 10 players that is at most
+C(10, 4) * 4 = 840 assignments, so RoleInference keeps the posterior
+exactly: one log weight per assignment, updated with a vectorized likelihood
+per event. Hard facts (a seat's own role, the Fascist team's knowledge of
+each other, investigation results, an elected Chancellor who was not Hitler)
+rule assignments out, and votes and enacted policies reweight them under a
+BehaviourModel.
+
+    inference = RoleInference.for_player(game_state, "Player3")
+    inference.update(game_state)         # call again whenever state moves on
+    inference.fascist_probabilities()    # P(on the Fascist team) per seat
+
+decision_report() replays a finished game and measures how each player's
+votes and nominations line up with the posterior they could have computed.
+"""
+from itertools import combinations
+
+import numpy as np
+
+from secret_hitler_engine import ROLE_DISTRIBUTION, Role, LIBERAL_CODE, FASCIST_CODE, HITLER_CODE
+
+
+class AssignmentTable:
+    """Every deal of the Fascist team and Hitler for one player count.
+
+    team_masks[a] is the bitmask of Fascist-team seats in assignment a and
+    hitler_seats[a] the seat dealt Hitler; is_fascist and is_hitler are the
+    same tables unpacked to bool [assignments, seats]."""
+
+    def __init__(self, num_players):
+        team_size = sum(role != Role.LIBERAL for role in ROLE_DISTRIBUTION[num_players])
+        team_masks = []
+        hitler_seats = []
+        for team in combinations(range(num_players), team_size):
+            for hitler in team:
+                team_masks.append(sum(1 << seat for seat in team))
+                hitler_seats.append(hitler)
+        seats = np.arange(num_players)
+        self.num_players = num_players
+        self.team_masks = np.array(team_masks, dtype=np.uint16)
+        self.hitler_seats = np.array(hitler_seats, dtype=np.int8)
+        self.is_fascist = (self.team_masks[:, None] >> seats & 1).astype(bool)
+        self.is_hitler = self.hitler_seats[:, None] == seats
+
+    def __len__(self):
+        return len(self.team_masks)
+
+
+ASSIGNMENT_TABLES = {n: AssignmentTable(n) for n in ROLE_DISTRIBUTION}
+
+
+class BehaviourModel:
+    """Probabilities of the observable actions given the hidden roles.
+
+    A government enacts a Fascist policy with probability
+    `fascist_government_enacts_fascist` if it contains a Fascist-team member
+    and `liberal_government_enacts_fascist` otherwise (about 0.24 of fresh
+    draws are three Fascist cards). Fascist-team voters vote YES with
+    probability `fascist_votes_yes_with_fascist` on governments containing
+    one of them and `fascist_votes_yes_without_fascist` otherwise; Liberal
+    votes do not depend on the hidden roles."""
+
+    def __init__(self, liberal_government_enacts_fascist=0.3,
+                 fascist_government_enacts_fascist=0.85,
+                 fascist_votes_yes_with_fascist=0.85,
+                 fascist_votes_yes_without_fascist=0.4,
+                 liberal_votes_yes=0.6):
+        self.liberal_government_enacts_fascist = liberal_government_enacts_fascist
+        self.fascist_government_enacts_fascist = fascist_government_enacts_fascist
+        self.fascist_votes_yes_with_fascist = fascist_votes_yes_with_fascist
+        self.fascist_votes_yes_without_fascist = fascist_votes_yes_without_fascist
+        self.liberal_votes_yes = liberal_votes_yes
+
+
+class RoleInference:
+    def __init__(self, num_players, model=None):
+        if num_players not in ASSIGNMENT_TABLES:
+            raise ValueError(f"Unsupported player count: {num_players}")
+        self.table = ASSIGNMENT_TABLES[num_players]
+        self.model = model or BehaviourModel()
+        self.log_weights = np.zeros(len(self.table))
+        self._votes_seen = 0
+        self._policies_seen = 0
+        self._investigated_seen = 0
+
+    @classmethod
+    def for_player(cls, game_state, player, model=None):
+        """The posterior as `player` knows it once roles have been dealt.
+
+        The runner tells the whole Fascist team who is on it and, from 7
+        players, which of them is Hitler; with 5 or 6 players the team is
+        just one Fascist and Hitler. Either way a Fascist-team seat knows
+        the full assignment."""
+        inference = cls(game_state.num_players, model)
+        seat = game_state.player_ids[player]
+        if game_state.role_codes[seat] == LIBERAL_CODE:
+            inference.observe_team(seat, False)
+        else:
+            for other, code in enumerate(game_state.role_codes):
+                inference.observe_team(other, code != LIBERAL_CODE)
+            inference.observe_hitler(game_state.role_codes.index(HITLER_CODE))
+        return inference
+
+    def _rule_out(self, impossible):
+        self.log_weights[impossible] = -np.inf
+
+    def observe_team(self, seat, on_fascist_team):
+        self._rule_out(self.table.is_fascist[:, seat] != on_fascist_team)
+
+    def observe_hitler(self, seat):
+        self._rule_out(self.table.hitler_seats != seat)
+
+    def observe_not_hitler(self, seat):
+        self._rule_out(self.table.hitler_seats == seat)
+
+    def _fascist_government(self, president, chancellor):
+        return self.table.is_fascist[:, president] | self.table.is_fascist[:, chancellor]
+
+    def observe_vote(self, voter, president, chancellor, yes):
+        model = self.model
+        fascist_yes = np.where(self._fascist_government(president, chancellor),
+                               model.fascist_votes_yes_with_fascist,
+                               model.fascist_votes_yes_without_fascist)
+        p_yes = np.where(self.table.is_fascist[:, voter], fascist_yes, model.liberal_votes_yes)
+        self.log_weights += np.log(p_yes if yes else 1 - p_yes)
+
+    def observe_policy(self, president, chancellor, policy):
+        model = self.model
+        p_fascist = np.where(self._fascist_government(president, chancellor),
+                             model.fascist_government_enacts_fascist,
+                             model.liberal_government_enacts_fascist)
+        self.log_weights += np.log(p_fascist if policy == Role.FASCIST else 1 - p_fascist)
+
+    def observe_election_votes(self, player_ids, record):
+        """All votes of one election in a single pass: Liberal votes are
+        constant, so only the Fascist-team voters' counts matter."""
+        model = self.model
+        president, chancellor = player_ids[record.president], player_ids[record.chancellor]
+        fascist_yes = np.where(self._fascist_government(president, chancellor),
+                               model.fascist_votes_yes_with_fascist,
+                               model.fascist_votes_yes_without_fascist)
+        is_fascist = self.table.is_fascist
+        fascist_yes_votes = is_fascist[:, [player_ids[p] for p in record.yes_votes]].sum(axis=1)
+        fascist_no_votes = is_fascist[:, [player_ids[p] for p in record.no_votes]].sum(axis=1)
+        self.log_weights += (
+            fascist_yes_votes * (np.log(fascist_yes) - np.log(model.liberal_votes_yes))
+            + fascist_no_votes * (np.log(1 - fascist_yes) - np.log(1 - model.liberal_votes_yes)))
+
+    def observe_election_result(self, player_ids, record):
+        """Apply what the end of an election reveals, once it is settled:
+        the enacted policy, and that an elected Chancellor with three or more
+        Fascist policies on the board was not Hitler."""
+        president, chancellor = player_ids[record.president], player_ids[record.chancellor]
+        elected = len(record.yes_votes) > (len(record.yes_votes) + len(record.no_votes)) / 2
+        if elected and record.fasc_policies >= 3:
+            self.observe_not_hitler(chancellor)
+        if record.policy is not None:
+            self.observe_policy(president, chancellor, record.policy)
+
+    def update(self, game_state):
+        """Apply every vote, enacted policy and investigation result that
+        `game_state` has recorded since the last call."""
+        ids = game_state.player_ids
+        history = game_state.election_history
+        for record in history[self._votes_seen:]:
+            self.observe_election_votes(ids, record)
+        self._votes_seen = len(history)
+
+        # The last record stays open until its policy is enacted or the next
+        # election is held; if Hitler was just elected it never settles.
+        while self._policies_seen < len(history):
+            record = history[self._policies_seen]
+            if record.policy is None and self._policies_seen == len(history) - 1:
+                break
+            self.observe_election_result(ids, record)
+            self._policies_seen += 1
+
+        # GameRunner publishes investigation results in the public log
+        new_investigations = game_state.investigated_mask & ~self._investigated_seen
+        for seat in range(game_state.num_players):
+            if new_investigations >> seat & 1:
+                self.observe_team(seat, game_state.membership_codes[seat] == FASCIST_CODE)
+        self._investigated_seen = game_state.investigated_mask
+
+    def posterior(self):
+        """Normalized probability of each assignment in self.table."""
+        peak = self.log_weights.max()
+        if peak == -np.inf:
+            raise ValueError("No role assignment is consistent with the observations")
+        weights = np.exp(self.log_weights - peak)
+        return weights / weights.sum()
+
+    def fascist_probabilities(self):
+        return self.posterior() @ self.table.is_fascist
+
+    def hitler_probabilities(self):
+        return self.posterior() @ self.table.is_hitler
+
+    def fascist_government_probability(self, president, chancellor):
+        return float(self.posterior() @ self._fascist_government(president, chancellor))
+
+
+def decision_report(game_state, model=None):
+    """Score each player's votes and nominations against their own posterior.
+
+    The game's elections are replayed from every seat's point of view. A
+    vote agrees with the posterior when the player voted YES on a
+    government that was more likely than not all Liberal, or NO otherwise;
+    for nominations the report gives the mean probability that the nominee
+    was on the Fascist team. Investigations are not replayed, because the
+    election history does not say when they happened."""
+    ids = game_state.player_ids
+    report = {}
+    for player in game_state.players:
+        seat = ids[player]
+        inference = RoleInference.for_player(game_state, player, model)
+        votes = agreeing_votes = 0
+        nominee_suspicion = []
+        history = game_state.election_history
+        for index, record in enumerate(history):
+            president, chancellor = ids[record.president], ids[record.chancellor]
+            if player in record.yes_votes or player in record.no_votes:
+                p_fascist_government = inference.fascist_government_probability(president, chancellor)
+                votes += 1
+                agreeing_votes += (player in record.yes_votes) == (p_fascist_government < 0.5)
+            if president == seat:
+                nominee_suspicion.append(float(inference.fascist_probabilities()[chancellor]))
+            inference.observe_election_votes(ids, record)
+            if record.policy is not None or index < len(history) - 1:
+                inference.observe_election_result(ids, record)
+        report[player] = {
+            "role": game_state.get_player_role(player).value,
+            "votes": votes,
+            "vote_agreement": agreeing_votes / votes if votes else None,
+            "nominations": len(nominee_suspicion),
+            "mean_nominee_fascist_probability":
+                sum(nominee_suspicion) / len(nominee_suspicion) if nominee_suspicion else None,
+        }
+    return report
@@ -0,0 +1,337 @@
+"""Random-play fuzzer for the rules engine.
+
+    python rules_fuzzer.py --games 1000000 --workers 4 --output failures.json
+    python rules_fuzzer.py --replay 7:123456
+    python rules_fuzzer.py --runner 2000
+
+Every decision is made uniformly at random from the legal choices. The
+default driver plays GameState directly, following GameRunner._play_game
+round by round (the discussions, which change nothing in the rules state,
+are skipped) with logging off, which is fast enough for millions of games.
+--runner plays games through GameRunner itself with random seats instead.
+
+After every round the fuzzer checks:
+
+    cards        deck + discard + enacted policies + cards the Chancellors
+                 left out == 17
+    trackers     0 <= election_tracker < 3 and 0 <= failed_elections < 3
+    policies     at most one policy per round, at most 5 Liberal and 6
+                 Fascist policies
+    game_over    the game is over exactly when Liberals reached 5 policies
+                 or executed Hitler, or Fascists reached 6 policies or elected
+                 Hitler Chancellor after 3 Fascist policies, and the winning
+                 team matches
+    winner_type  a finished game's winner is a Role (kill_player and the
+                 Hitler-Chancellor win store "Liberals"/"Fascists" strings)
+    termination  the game ends within --max_rounds rounds
+    short_draw   no legislative session draws fewer than 3 cards (the runner
+                 crashes or loops forever on one)
+    exception    the engine raises nothing
+
+Game i of a player count is seeded with --seed + i, so a failure replays
+with --replay PLAYERS:SEED (add --runner 1 for a GameRunner seed; the two
+drivers draw random numbers differently, so their seeds are unrelated). For each violated invariant the fuzzer keeps
+the failing game with the fewest rounds (the lowest seed among equals) and
+--output writes those as JSON. The exit status is 1 if any invariant not
+given to --ignore was violated.
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from secret_hitler_engine import ExecutivePower, GameState, HITLER_CODE, Role, valid_nominee_mask
+
+INVARIANTS = ("cards", "trackers", "policies", "game_over", "winner_type", "termination",
+              "short_draw", "exception")
+DECK_SIZE = 17
+CHUNK = 2000
+
+
+class Violation(Exception):
+    def __init__(self, invariant, message):
+        super().__init__(message)
+        self.invariant = invariant
+
+
+def _random_seat(mask):
+    seats = [i for i in range(mask.bit_length()) if mask >> i & 1]
+    return random.choice(seats)
+
+
+def check_round(state, removed, policies_before, hitler_elected):
+    """Raise a Violation if the state at the end of a round breaks an
+    invariant. `removed` counts the cards Chancellors left out of the game
+    and `hitler_elected` whether Hitler was elected Chancellor after 3
+    Fascist policies."""
+    cards = len(state.deck_codes) + len(state.discard_codes) + state.lib_policies + state.fasc_policies + removed
+    if cards != DECK_SIZE:
+        raise Violation("cards", f"{cards} cards accounted for, not {DECK_SIZE}")
+    if not (0 <= state.election_tracker < 3 and 0 <= state.failed_elections < 3):
+        raise Violation("trackers", f"election_tracker={state.election_tracker}, "
+                                    f"failed_elections={state.failed_elections}")
+    enacted = state.lib_policies + state.fasc_policies - policies_before
+    if enacted > 1 or state.lib_policies > 5 or state.fasc_policies > 6:
+        raise Violation("policies", f"{enacted} policies enacted in one round, "
+                                    f"{state.lib_policies} Liberal and {state.fasc_policies} Fascist in all")
+    hitler_dead = not state.alive_mask >> state.role_codes.index(HITLER_CODE) & 1
+    if state.lib_policies >= 5 or hitler_dead:
+        expected = Role.LIBERAL
+    elif state.fasc_policies >= 6 or hitler_elected:
+        expected = Role.FASCIST
+    else:
+        expected = None
+    if state.game_over != (expected is not None) or state.get_winning_team() != expected:
+        raise Violation("game_over", f"game_over={state.game_over}, winner={state.winner!r} with "
+                                     f"{state.lib_policies} Liberal and {state.fasc_policies} Fascist policies, "
+                                     f"Hitler {'dead' if hitler_dead else 'alive'}, "
+                                     f"Chancellor {state.gov.chancellor}")
+    if state.game_over and not isinstance(state.winner, Role):
+        raise Violation("winner_type", f"winner is {state.winner!r}")
+
+
+def _election(state, president):
+    """Nomination and vote; returns whether a government was elected."""
+    nominees = valid_nominee_mask(state, president)
+    # one choice per nominee plus passing
+    choice = random.randrange(nominees.bit_count() + 1)
+    if choice == nominees.bit_count():
+        state.reset_government()
+        return False
+    for _ in range(choice):
+        nominees &= nominees - 1
+    nominee = state.players[(nominees & -nominees).bit_length() - 1]
+    state.set_government(president, nominee)
+    voters = state.alive_players
+    votes = random.getrandbits(len(voters))
+    yes = [player for i, player in enumerate(voters) if votes >> i & 1]
+    no = [player for i, player in enumerate(voters) if not votes >> i & 1]
+    state.record_election(president, nominee, yes, no)
+    return len(yes) > len(voters) / 2
+
+
+def _executive_action(state, president):
+    power = state.get_executive_power()
+    if power is None:
+        return
+    if power == ExecutivePower.POLICY_PEEK:
+        state.policy_peek()
+        return
+    mask = state.executive_target_mask(power, president)
+    if not mask:
+        return
+    target = state.players[_random_seat(mask)]
+    if power == ExecutivePower.INVESTIGATE:
+        state.investigate_player(president, target)
+    elif power == ExecutivePower.SPECIAL_ELECTION:
+        state.call_special_election(president, target)
+    else:
+        state.kill_player(target)
+
+
+def fuzz_game(num_players, seed, max_rounds=200):
+    """Play one random game through GameState; returns (rounds, violation),
+    where violation is None or (invariant, message)."""
+    random.seed(seed)
+    state = GameState([f"Player{i+1}" for i in range(num_players)], None)
+    state.logging_enabled = False
+    hitler = state.players[state.role_codes.index(HITLER_CODE)]
+    removed = 0
+    rounds = 0
+    try:
+        # A new game is never over, and each round ends with check_game_over
+        while True:
+            rounds += 1
+            if rounds > max_rounds:
+                raise Violation("termination", f"no winner after {max_rounds} rounds")
+            policies_before = state.lib_policies + state.fasc_policies
+            hitler_elected = False
+            president = state.get_president()
+            if _election(state, president):
+                state.election_tracker = 0
+                if state.check_hitler_chancellor_win():
+                    hitler_elected = state.gov.chancellor == hitler and state.fasc_policies >= 3
+                    state.game_over = True
+                    state.winner = "Fascists"
+                else:
+                    hand = state.draw_policies(3)
+                    if hand:
+                        if len(hand) < 3:
+                            raise Violation("short_draw", f"legislative session drew {len(hand)} cards")
+                        state.discard_policy(hand.pop(random.randrange(3)))
+                        policy = hand.pop(random.randrange(2))
+                        removed += 1
+                        state.enact_policy(policy)
+                        state.record_enacted_policy(policy)
+                        _executive_action(state, president)
+            else:
+                state.reset_government()
+                state.increment_election_tracker()
+                if state.election_tracker >= 3:
+                    state.enact_chaos_policy()
+                    state.election_tracker = 0
+            if not state.game_over:
+                state.check_game_over()
+            check_round(state, removed, policies_before, hitler_elected)
+            if state.game_over:
+                break
+            state.next_president()
+    except Violation as violation:
+        return rounds, (violation.invariant, str(violation))
+    except Exception as e:
+        return rounds, ("exception", f"{type(e).__name__}: {e}")
+    return rounds, None
+
+
+def fuzz_runner_game(num_players, seed, max_rounds=200):
+    """fuzz_game through GameRunner with random seats."""
+    from secret_hitler_game import GameConfig, GameRunner
+
+    class _FuzzRunner(GameRunner):
+        def display_state_terminal(self, *args, **kwargs):
+            pass
+
+        def _check(self):
+            state = self.game_state
+            removed = sum(record.policy is not None for record in state.election_history)
+            check_round(state, removed, self.policies_before, self.hitler_elected)
+            self.policies_before = state.lib_policies + state.fasc_policies
+            self.hitler_elected = False
+
+        def election_phase(self, resume_phase=None):
+            if self.round_number > 1:
+                self._check()
+            if self.round_number > max_rounds:
+                raise Violation("termination", f"no winner after {max_rounds} rounds")
+            return super().election_phase(resume_phase)
+
+        def _process_election_results(self, president_name, nominee_name, votes):
+            elected = super()._process_election_results(president_name, nominee_name, votes)
+            state = self.game_state
+            self.hitler_elected = (elected and state.fasc_policies >= 3
+                                   and state.get_player_role(nominee_name) == Role.HITLER)
+            return elected
+
+        def legislative_session(self):
+            available = len(self.game_state.deck_codes) + len(self.game_state.discard_codes)
+            if 0 < available < 3:
+                raise Violation("short_draw", f"legislative session would draw {available} cards")
+            return super().legislative_session()
+
+    config = GameConfig(argparse.Namespace(
+        num_players=num_players, slowdown=0, press_enter=False, debug_llm=False,
+        log_to_file=False, log_dir="logs", results_db=None, checkpoint=None, resume=None,
+        player_models=[f'Player{i+1}={{"provider": "random"}}' for i in range(num_players)]))
+    random.seed(seed)
+    runner = _FuzzRunner(config)
+    runner.policies_before = 0
+    runner.hitler_elected = False
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner.run_game()
+        runner._check()
+    except Violation as violation:
+        return runner.round_number, (violation.invariant, str(violation))
+    except Exception as e:
+        return runner.round_number, ("exception", f"{type(e).__name__}: {e}")
+    return runner.round_number, None
+
+
+def fuzz_seeds(num_players, seeds, max_rounds=200, runner=False):
+    """Play a range of seeds; returns (games, violation counts, minimal
+    failure per invariant)."""
+    play = fuzz_runner_game if runner else fuzz_game
+    counts = Counter()
+    minimal = {}
+    for seed in seeds:
+        rounds, violation = play(num_players, seed, max_rounds)
+        if violation is None:
+            continue
+        invariant, message = violation
+        counts[invariant] += 1
+        best = minimal.get(invariant)
+        if best is None or (rounds, seed) < (best["rounds"], best["seed"]):
+            minimal[invariant] = {"players": num_players, "seed": seed, "rounds": rounds, "message": message}
+    return len(seeds), counts, minimal
+
+
+def _merge_minimal(minimal, found):
+    for invariant, failure in found.items():
+        best = minimal.get(invariant)
+        if best is None or (failure["rounds"], failure["seed"]) < (best["rounds"], best["seed"]):
+            minimal[invariant] = failure
+
+
+def fuzz(player_counts, games, seed=0, workers=1, max_rounds=200, runner=False):
+    """Fuzz `games` games per player count; returns {players: (counts,
+    minimal)}."""
+    results = {}
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for num_players in player_counts:
+            chunks = [range(first, min(first + CHUNK, seed + games))
+                      for first in range(seed, seed + games, CHUNK)]
+            counts, minimal, played = Counter(), {}, 0
+            futures = [pool.submit(fuzz_seeds, num_players, chunk, max_rounds, runner) for chunk in chunks]
+            for future in futures:
+                chunk_games, chunk_counts, chunk_minimal = future.result()
+                played += chunk_games
+                counts.update(chunk_counts)
+                _merge_minimal(minimal, chunk_minimal)
+            results[num_players] = (counts, minimal)
+            elapsed = max(time.time() - start, 1e-9)
+            print(f"{num_players} players: {played} games, {sum(counts.values())} violations "
+                  f"({elapsed:.1f}s, {played / elapsed:,.0f} games/s)")
+            start = time.time()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz the rules engine with random play.")
+    parser.add_argument("--games", type=int, default=100000, help="Games per player count")
+    parser.add_argument("--players", type=int, nargs="+", default=list(range(5, 11)))
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first game")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--max_rounds", type=int, default=200)
+    parser.add_argument("--runner", type=int, default=0, metavar="GAMES",
+                        help="Play GAMES games per player count through GameRunner instead")
+    parser.add_argument("--replay", metavar="PLAYERS:SEED", help="Replay one game and print its violation")
+    parser.add_argument("--ignore", nargs="+", default=[], choices=INVARIANTS,
+                        help="Invariants whose violations do not fail the run")
+    parser.add_argument("--output", help="Write the minimal failing seeds as JSON to this path")
+    args = parser.parse_args()
+
+    if args.replay:
+        num_players, seed = (int(part) for part in args.replay.split(":"))
+        play = fuzz_runner_game if args.runner else fuzz_game
+        rounds, violation = play(num_players, seed, args.max_rounds)
+        print(f"{rounds} rounds, " + (f"{violation[0]}: {violation[1]}" if violation else "no violation"))
+        return
+
+    games = args.runner or args.games
+    results = fuzz(args.players, games, args.seed, args.workers, args.max_rounds, runner=bool(args.runner))
+    print(f"\n{'players':>7} " + " ".join(f"{name:>11}" for name in INVARIANTS))
+    for num_players, (counts, _) in results.items():
+        print(f"{num_players:>7} " + " ".join(f"{counts[name]:>11}" for name in INVARIANTS))
+    minimal = {}
+    for _, found in results.values():
+        _merge_minimal(minimal, found)
+    for invariant, failure in sorted(minimal.items()):
+        print(f"\n{invariant}: --replay {failure['players']}:{failure['seed']}{' --runner 1' if args.runner else ''} "
+              f"({failure['rounds']} rounds)\n  {failure['message']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"games": games, "seed": args.seed, "runner": bool(args.runner),
+                       "violations": {n: dict(counts) for n, (counts, _) in results.items()},
+                       "minimal": minimal}, f, indent=2)
+    if set(minimal) - set(args.ignore):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
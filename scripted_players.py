@@ -0,0 +1,140 @@
+import json
+import random
+import re
+import time
+
+from secret_hitler_engine import Role
+from role_inference import RoleInference
+
+NOMINATE_PREFIX = "nominate "
+
+
+class RandomPlayerInterface:
+    """Offline stand-in for LLMPlayerInterface that picks a uniformly random
+    allowed action. It needs no API key and makes no network calls, so it can
+    fill seats in simulations, cross-checks and benchmarks. `latency` seconds
+    of sleep per decision stand in for an API round trip."""
+
+    def __init__(self, player_name, game_logger=None, rng=None, latency=0):
+        self.player_name = player_name
+        self.game_logger = game_logger
+        self.model_name = "random"
+        self.provider_name = "random"
+        self.rng = rng or random
+        self.latency = latency
+
+    def get_llm_response(
+            self,
+            game_state,
+            prompt_text,
+            allowed_responses,
+            game_phase,
+            additional_prompt_info=None):
+        if self.latency:
+            time.sleep(self.latency)
+        action = self.rng.choice(allowed_responses) if allowed_responses else "pass"
+        return json.dumps({"thoughts": "", "say": "", "action": action}), action
+
+    def extract_thought(self, llm_response):
+        return None
+
+    def extract_public_statement(self, llm_response):
+        return None
+
+    def add_thought_to_log(self, game_state, thought):
+        game_state.log_event(
+            self.player_name, f"Thought: {thought}", private_only=True)
+
+
+class BayesianPlayerInterface(RandomPlayerInterface):
+    """Scripted seat that plays its team's cards and decides nominations,
+    votes and executive actions from the exact role posterior kept by
+    role_inference.RoleInference."""
+
+    def __init__(self, player_name, game_logger=None, rng=None, latency=0, model=None,
+                 suspicion_threshold=0.5):
+        super().__init__(player_name, game_logger, rng, latency)
+        self.model_name = "bayes"
+        self.provider_name = "bayes"
+        self.behaviour_model = model
+        self.suspicion_threshold = suspicion_threshold
+        self.inference = None
+        self._game_state = None
+
+    def get_llm_response(
+            self,
+            game_state,
+            prompt_text,
+            allowed_responses,
+            game_phase,
+            additional_prompt_info=None):
+        if self._game_state is not game_state:
+            self.inference = RoleInference.for_player(
+                game_state, self.player_name, self.behaviour_model)
+            self._game_state = game_state
+        self.inference.update(game_state)
+        if self.latency:
+            time.sleep(self.latency)
+        action = self.choose_action(game_state, allowed_responses, game_phase, additional_prompt_info)
+        return json.dumps({"thoughts": "", "say": "", "action": action}), action
+
+    def choose_action(self, game_state, allowed_responses, game_phase, additional_prompt_info):
+        ids = game_state.player_ids
+        liberal = game_state.get_player_role(self.player_name) == Role.LIBERAL
+        suspicion = self.inference.fascist_probabilities()
+        hitler = self.inference.hitler_probabilities()
+
+        def least_suspicious(names):
+            return min(names, key=lambda name: (suspicion[ids[name]], self.rng.random()))
+
+        def most_suspicious(names, probabilities):
+            return max(names, key=lambda name: (probabilities[ids[name]], self.rng.random()))
+
+        if game_phase == "Nomination":
+            nominees = [a[len(NOMINATE_PREFIX):] for a in allowed_responses if a.startswith(NOMINATE_PREFIX)]
+            if not nominees:
+                return allowed_responses[0]
+            if liberal:
+                return NOMINATE_PREFIX + least_suspicious(nominees)
+            if game_state.fasc_policies >= 3:
+                # a Fascist-team seat knows exactly where Hitler is
+                return NOMINATE_PREFIX + most_suspicious(nominees, hitler)
+            return NOMINATE_PREFIX + most_suspicious(nominees, suspicion)
+
+        if game_phase == "Voting":
+            president, chancellor = ids[game_state.gov.president], ids[game_state.gov.chancellor]
+            p_fascist = self.inference.fascist_government_probability(president, chancellor)
+            if liberal:
+                risky = p_fascist >= self.suspicion_threshold or (
+                    game_state.fasc_policies >= 3 and hitler[chancellor] >= 0.5 * self.suspicion_threshold)
+                return "NO" if risky else "YES"
+            return "YES" if p_fascist > 0 else "NO"
+
+        if game_phase in ("President Discard", "Chancellor Enact"):
+            cards = re.findall(r"Role\.(LIBERAL|FASCIST)", additional_prompt_info or "")
+            wanted = "LIBERAL" if liberal else "FASCIST"
+            if game_phase == "President Discard":
+                index = next((i for i, card in enumerate(cards) if card != wanted), 0)
+            else:
+                index = next((i for i, card in enumerate(cards) if card == wanted), 0)
+            return allowed_responses[min(index, len(allowed_responses) - 1)]
+
+        targets = [name for name in allowed_responses if name in ids]
+        if targets:
+            if "Execution" in game_phase:
+                if liberal:
+                    return most_suspicious(targets, hitler)
+                return least_suspicious(targets)
+            if "Special Election" in game_phase:
+                if liberal:
+                    return least_suspicious(targets)
+                return most_suspicious(targets, suspicion)
+            # Investigate whoever the posterior is least sure about
+            return min(targets, key=lambda name: (abs(suspicion[ids[name]] - 0.5), self.rng.random()))
+        return allowed_responses[0] if allowed_responses else "pass"
+
+
+SCRIPTED_PLAYERS = {
+    "random": RandomPlayerInterface,
+    "bayes": BayesianPlayerInterface,
+}
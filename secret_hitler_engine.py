@@ -1,6 +1,10 @@
+import json
+import os
 import random
+import tempfile
 from enum import Enum
 from collections import namedtuple
+from collections.abc import Mapping, MutableSet
 
 
 class Role(Enum):
@@ -23,80 +27,324 @@ class GamePhase(Enum):
     DISCUSSION = "Discussion"
 
 
+class ExecutivePower(Enum):
+    INVESTIGATE = "Investigate"
+    SPECIAL_ELECTION = "Special Election"
+    POLICY_PEEK = "Policy Peek"
+    EXECUTION = "Execution"
+
+
 Government = namedtuple("Government", ["president", "chancellor"])
+# One vote on a nominated government. `fasc_policies` is the count when the
+# vote was held; `policy` is the Role the government enacted, if any.
+ElectionRecord = namedtuple("ElectionRecord", [
+    "president", "chancellor", "yes_votes", "no_votes", "fasc_policies", "policy"])
+
+# Roles, membership cards and policy cards are stored as small integer codes.
+# Policy cards only ever use LIBERAL_CODE and FASCIST_CODE.
+LIBERAL_CODE = 0
+FASCIST_CODE = 1
+HITLER_CODE = 2
+ROLE_BY_CODE = (Role.LIBERAL, Role.FASCIST, Role.HITLER)
+CODE_BY_ROLE = {role: code for code, role in enumerate(ROLE_BY_CODE)}
+
+NO_PLAYER = -1
+
+ROLE_DISTRIBUTION = {
+    5: [Role.FASCIST] * 1 + [Role.HITLER] + [Role.LIBERAL] * 3,
+    6: [Role.FASCIST] * 1 + [Role.HITLER] + [Role.LIBERAL] * 4,
+    7: [Role.FASCIST] * 2 + [Role.HITLER] + [Role.LIBERAL] * 4,
+    8: [Role.FASCIST] * 2 + [Role.HITLER] + [Role.LIBERAL] * 5,
+    9: [Role.FASCIST] * 3 + [Role.HITLER] + [Role.LIBERAL] * 5,
+    10: [Role.FASCIST] * 3 + [Role.HITLER] + [Role.LIBERAL] * 6,
+}
+
+
+class _CodeView(Mapping):
+    """Read-only player name -> Role view over a per-seat code array."""
+    __slots__ = ("_state", "_codes")
+
+    def __init__(self, state, codes):
+        self._state = state
+        self._codes = codes
+
+    def __getitem__(self, player):
+        return ROLE_BY_CODE[self._codes[self._state.player_ids[player]]]
+
+    def __iter__(self):
+        return iter(self._state.players)
+
+    def __len__(self):
+        return self._state.num_players
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class _StatusView(Mapping):
+    """Read-only player name -> PlayerStatus view over the alive bitmask."""
+    __slots__ = ("_state",)
+
+    def __init__(self, state):
+        self._state = state
+
+    def __getitem__(self, player):
+        if self._state.alive_mask >> self._state.player_ids[player] & 1:
+            return PlayerStatus.ALIVE
+        return PlayerStatus.DEAD
+
+    def __iter__(self):
+        return iter(self._state.players)
+
+    def __len__(self):
+        return self._state.num_players
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class _InvestigatedView(MutableSet):
+    """Set view over the investigated bitmask, iterated in seat order."""
+    __slots__ = ("_state",)
+
+    def __init__(self, state):
+        self._state = state
+
+    def __contains__(self, player):
+        player_id = self._state.player_ids.get(player)
+        return player_id is not None and bool(self._state.investigated_mask >> player_id & 1)
+
+    def __iter__(self):
+        mask = self._state.investigated_mask
+        return (p for i, p in enumerate(self._state.players) if mask >> i & 1)
+
+    def __len__(self):
+        return self._state.investigated_mask.bit_count()
+
+    def add(self, player):
+        self._state.investigated_mask |= 1 << self._state.player_ids[player]
+
+    def discard(self, player):
+        player_id = self._state.player_ids.get(player)
+        if player_id is not None:
+            self._state.investigated_mask &= ~(1 << player_id)
+
+    def __repr__(self):
+        return repr(set(self))
+
+
+class _TurnCountView(Mapping):
+    """Read-only player name -> discussion turn count view over a per-seat list."""
+    __slots__ = ("_state",)
+
+    def __init__(self, state):
+        self._state = state
+
+    def __getitem__(self, player):
+        return self._state.turn_counts[self._state.player_ids[player]]
+
+    def __iter__(self):
+        return iter(self._state.players)
+
+    def __len__(self):
+        return self._state.num_players
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class _PrivateLogView(Mapping):
+    """Read-only player name -> private log entries, rendered on access."""
+    __slots__ = ("_state",)
+
+    def __init__(self, state):
+        self._state = state
+
+    def __getitem__(self, player):
+        return self._state.get_private_log(player)
+
+    def __iter__(self):
+        return iter(self._state.players)
+
+    def __len__(self):
+        return self._state.num_players
 
 
 class GameState:
+    # The rules core is seat indexed: role and membership codes are bytes,
+    # the deck and discard pile are bytearrays of card codes (top of the deck
+    # is the end), and alive/investigated players are bitmasks. The string
+    # keyed attributes (roles, player_status, ...) are views over that core.
+    # Only `investigated` is writable; the other views are read-only, and
+    # `deck`/`discard` return tuples, so the core is changed through the
+    # GameState methods (or the *_codes/*_mask fields) and never by accident.
+    __slots__ = (
+        "players", "num_players", "player_ids", "role_codes", "membership_codes",
+        "deck_codes", "discard_codes", "lib_policies", "fasc_policies",
+        "election_tracker", "gov", "prev_govs", "election_history", "president_order",
+        "current_president_index", "term_limit_chancellor_id",
+        "term_limit_president_id", "hitler_revealed", "game_over", "winner",
+        "alive_mask", "_alive_cache_mask", "_alive_cache", "investigated_mask",
+        "special_president", "veto_power", "failed_elections", "public_log",
+        "event_log", "private_overlays", "phase",
+        "discussion_history", "current_discussion_phase",
+        "discussion_speaker_index", "max_discussion_turns", "turn_counts",
+        "game_logger", "logging_enabled", "_shares_collections",
+    )
+
     def __init__(self, players, game_logger):
         self.players = players
         self.num_players = len(players)
-        self.roles = self._assign_roles()
-        self.deck = self._create_deck()
-        self.discard = []
+        self.player_ids = {p: i for i, p in enumerate(players)}
+        self.role_codes = self._assign_roles()
+        self.deck_codes = self._create_deck()
+        self.discard_codes = bytearray()
         self.lib_policies = 0
         self.fasc_policies = 0
         self.election_tracker = 0
         self.gov = Government(president=None, chancellor=None)
         self.prev_govs = []
+        self.election_history = []
         self.president_order = players[:]
         self.current_president_index = 0
-        self.term_limit_chancellor = None
-        self.term_limit_president = None
+        self.term_limit_chancellor_id = NO_PLAYER
+        self.term_limit_president_id = NO_PLAYER
         self.hitler_revealed = False
         self.game_over = False
         self.winner = None
-        self.player_status = {p: PlayerStatus.ALIVE for p in players}
-        self.membership_cards = self._assign_membership()
-        self.investigated = set()
+        self.alive_mask = (1 << self.num_players) - 1
+        self._alive_cache_mask = None
+        self._alive_cache = None
+        self.membership_codes = self._assign_membership()
+        self.investigated_mask = 0
         self.special_president = None
         self.veto_power = False
         self.failed_elections = 0
         self.public_log = []
-        self.private_logs = {p: [] for p in players}
+        self.event_log = []
+        self.private_overlays = [[] for _ in players]
         self.phase = GamePhase.NOMINATION
         self.discussion_history = []
+        self.current_discussion_phase = None
         self.discussion_speaker_index = 0
         self.max_discussion_turns = 2
-        self.discussion_turn_counts = {p: 0 for p in players}
+        self.turn_counts = [0] * self.num_players
         self.game_logger = game_logger
+        self.logging_enabled = True
+        self._shares_collections = False
 
     def _assign_roles(self):
-        role_dist = {
-            5: [Role.FASCIST] * 1 + [Role.HITLER] + [Role.LIBERAL] * 3,
-            6: [Role.FASCIST] * 1 + [Role.HITLER] + [Role.LIBERAL] * 4,
-            7: [Role.FASCIST] * 2 + [Role.HITLER] + [Role.LIBERAL] * 4,
-            8: [Role.FASCIST] * 2 + [Role.HITLER] + [Role.LIBERAL] * 5,
-            9: [Role.FASCIST] * 3 + [Role.HITLER] + [Role.LIBERAL] * 5,
-            10: [Role.FASCIST] * 3 + [Role.HITLER] + [Role.LIBERAL] * 6,
-        }
-        roles = role_dist[self.num_players][:]
+        roles = ROLE_DISTRIBUTION[self.num_players][:]
         random.shuffle(roles)
-        return dict(zip(self.players, roles))
+        return bytes(CODE_BY_ROLE[role] for role in roles)
 
     def _assign_membership(self):
-        return {p: Role.FASCIST for p in self.players}
+        return _membership_codes(self.role_codes)
 
     def _create_deck(self):
-        deck = [Role.LIBERAL] * 6 + [Role.FASCIST] * 11
+        deck = bytearray([LIBERAL_CODE]) * 6 + bytearray([FASCIST_CODE]) * 11
         random.shuffle(deck)
         return deck
 
+    @property
+    def roles(self):
+        return _CodeView(self, self.role_codes)
+
+    @property
+    def membership_cards(self):
+        return _CodeView(self, self.membership_codes)
+
+    @property
+    def player_status(self):
+        return _StatusView(self)
+
+    @property
+    def investigated(self):
+        return _InvestigatedView(self)
+
+    @property
+    def discussion_turn_counts(self):
+        return _TurnCountView(self)
+
+    @property
+    def deck(self):
+        return tuple(ROLE_BY_CODE[code] for code in self.deck_codes)
+
+    @deck.setter
+    def deck(self, cards):
+        self.deck_codes = bytearray(CODE_BY_ROLE[card] for card in cards)
+
+    @property
+    def discard(self):
+        return tuple(ROLE_BY_CODE[code] for code in self.discard_codes)
+
+    @discard.setter
+    def discard(self, cards):
+        self.discard_codes = bytearray(CODE_BY_ROLE[card] for card in cards)
+
+    @property
+    def term_limit_chancellor(self):
+        return self._player_name(self.term_limit_chancellor_id)
+
+    @term_limit_chancellor.setter
+    def term_limit_chancellor(self, player):
+        self.term_limit_chancellor_id = self._player_id(player)
+
+    @property
+    def term_limit_president(self):
+        return self._player_name(self.term_limit_president_id)
+
+    @term_limit_president.setter
+    def term_limit_president(self, player):
+        self.term_limit_president_id = self._player_id(player)
+
+    @property
+    def term_limited_mask(self):
+        """Seats that may not be nominated Chancellor because of term limits."""
+        mask = 0
+        if self.term_limit_chancellor_id != NO_PLAYER:
+            mask |= 1 << self.term_limit_chancellor_id
+        if self.num_players >= 7 and self.term_limit_president_id != NO_PLAYER:
+            mask |= 1 << self.term_limit_president_id
+        return mask
+
+    def _player_id(self, player):
+        return NO_PLAYER if player is None else self.player_ids[player]
+
+    def _player_name(self, player_id):
+        return None if player_id == NO_PLAYER else self.players[player_id]
+
+    @property
+    def alive_players(self):
+        # alive_mask is the only record of who is alive; the name list is
+        # rebuilt lazily whenever the mask has changed since the last call.
+        if self._alive_cache_mask != self.alive_mask:
+            mask = self.alive_mask
+            self._alive_cache = [p for i, p in enumerate(self.players) if mask >> i & 1]
+            self._alive_cache_mask = mask
+        return self._alive_cache
+
+    def is_alive(self, player):
+        return bool(self.alive_mask >> self.player_ids[player] & 1)
+
     def draw_policies(self, num):
+        self._own_collections()
         drawn = []
         for _ in range(num):
-            if not self.deck:
-                self.deck = self.discard[:]
-                self.discard = []
-                random.shuffle(self.deck)
+            if not self.deck_codes:
+                self.deck_codes = self.discard_codes
+                self.discard_codes = bytearray()
+                random.shuffle(self.deck_codes)
                 self.log_event(None, "Deck reshuffled.")
-            if self.deck:
-                drawn.append(self.deck.pop())
+            if self.deck_codes:
+                drawn.append(ROLE_BY_CODE[self.deck_codes.pop()])
             else:
                 break
         return drawn
 
     def discard_policy(self, policy):
-        self.discard.append(policy)
+        self._own_collections()
+        self.discard_codes.append(CODE_BY_ROLE[policy])
 
     def enact_policy(self, policy):
         policy_type = "Unknown Policy Type"
@@ -113,6 +361,16 @@ class GameState:
         self.check_game_over()
         return policy_type
 
+    def record_election(self, president, chancellor, yes_votes, no_votes):
+        self._own_collections()
+        self.election_history.append(ElectionRecord(
+            president, chancellor, tuple(yes_votes), tuple(no_votes), self.fasc_policies, None))
+
+    def record_enacted_policy(self, policy):
+        """Attach the policy enacted by the last elected government to its record."""
+        self._own_collections()
+        self.election_history[-1] = self.election_history[-1]._replace(policy=policy)
+
     def check_game_over(self):
         game_end_conditions = [
             (self.lib_policies >= 5, Role.LIBERAL, "Liberals win by policies."),
@@ -128,8 +386,26 @@ class GameState:
                 return True
         return False
 
+    def get_winning_team(self):
+        """Role.LIBERAL or Role.FASCIST once the game is won, else None. The
+        policy win conditions store a Role in `winner`; the Hitler-Chancellor
+        and Hitler-executed wins store "Fascists" or "Liberals"."""
+        if self.winner in (Role.LIBERAL, "Liberals"):
+            return Role.LIBERAL
+        if self.winner in (Role.FASCIST, "Fascists"):
+            return Role.FASCIST
+        return None
+
+    def get_win_reason(self):
+        team = self.get_winning_team()
+        if team == Role.LIBERAL:
+            return "liberal_policies" if self.lib_policies >= 5 else "hitler_executed"
+        if team == Role.FASCIST:
+            return "fascist_policies" if self.fasc_policies >= 6 else "hitler_chancellor"
+        return None
+
     def check_hitler_chancellor_win(self):
-        return (self.fasc_policies >= 3 and self.gov.chancellor and self.roles[self.gov.chancellor] == Role.HITLER)
+        return (self.fasc_policies >= 3 and self.gov.chancellor and self.role_codes[self.player_ids[self.gov.chancellor]] == HITLER_CODE)
 
     def get_president(self):
         return self.president_order[self.current_president_index % self.num_players]
@@ -143,10 +419,11 @@ class GameState:
 
     def reset_government(self):
         if self.gov.president and self.gov.chancellor:
+            self._own_collections()
             self.prev_govs.append(
                 (self.gov.president, self.gov.chancellor))
-            self.term_limit_president = self.gov.president
-            self.term_limit_chancellor = self.gov.chancellor
+            self.term_limit_president_id = self.player_ids[self.gov.president]
+            self.term_limit_chancellor_id = self.player_ids[self.gov.chancellor]
         self.gov = Government(president=None, chancellor=None)
         self.failed_elections += 1
         if self.failed_elections >= 3:
@@ -158,8 +435,8 @@ class GameState:
         policy = self.draw_policies(1)[0]
         policy_type = self.enact_policy(policy)
         self.election_tracker = 0
-        self.term_limit_chancellor = None
-        self.term_limit_president = None
+        self.term_limit_chancellor_id = NO_PLAYER
+        self.term_limit_president_id = NO_PLAYER
         self.log_event(None, f"Chaos policy was {policy_type}.")
         return policy_type
 
@@ -178,6 +455,8 @@ class GameState:
             self.check_game_over()
 
     def log_event(self, player, event_desc, private_info=None, private_only=False):
+        if not self.logging_enabled:
+            return
         log_entry = f"Round {len(self.public_log) + 1 if not self.game_over else 'End'} - "
         if player:
             log_entry += f"{player}: "
@@ -186,32 +465,83 @@ class GameState:
         if not private_only:
             self._log_public(log_entry)
 
-        self._log_private(log_entry, private_info, player=player)
+        self._log_private(log_entry, private_info, player=player,
+                          private_only=private_only)
 
     def _log_public(self, log_entry):
         self.public_log.append(log_entry)
         if self.game_logger:
             self.game_logger.log_public_event(log_entry)
 
-    def _log_private(self, log_entry, private_info=None, player=None):
-        for p in self.players:
-            private_log_entry = log_entry
-            if private_info and p in private_info:
-                private_log_entry += f" (Private: {private_info[p]})"
-            self.private_logs[p].append(private_log_entry)
+    def _log_private(self, log_entry, private_info=None, player=None, private_only=False):
+        # Every player's private log is the shared event_log, with the few
+        # entries that carry private information swapped in from that
+        # player's overlay: (event index, entry, replaces shared entry).
+        event_index = len(self.event_log)
+        if private_only and player:
+            # e.g. a player's thoughts: only that player's log gets the entry
+            if private_info and player in private_info:
+                log_entry += f" (Private: {private_info[player]})"
+            self.private_overlays[self.player_ids[player]].append(
+                (event_index, log_entry, False))
+            return
+        self.event_log.append(log_entry)
+        if private_info:
+            for p, info in private_info.items():
+                self.private_overlays[self.player_ids[p]].append(
+                    (event_index, f"{log_entry} (Private: {info})", True))
+
+    def get_private_log(self, player):
+        overlay = self.private_overlays[self.player_ids[player]]
+        if not overlay:
+            return self.event_log[:]
+        entries = []
+        start = 0
+        for event_index, entry, replaces in overlay:
+            entries += self.event_log[start:event_index]
+            entries.append(entry)
+            start = event_index + 1 if replaces else event_index
+        entries += self.event_log[start:]
+        return entries
+
+    @property
+    def private_logs(self):
+        return _PrivateLogView(self)
 
     def get_player_role(self, player):
-        return self.roles[player]
+        return ROLE_BY_CODE[self.role_codes[self.player_ids[player]]]
 
     def get_player_names(self):
         return self.players
 
+    def get_executive_power(self):
+        """The power granted to the President after the latest policy, if any."""
+        if self.fasc_policies == 3 and self.num_players >= 5:
+            return ExecutivePower.INVESTIGATE
+        if self.fasc_policies == 4 and self.num_players >= 7:
+            return ExecutivePower.SPECIAL_ELECTION
+        if self.fasc_policies == 5 and self.num_players >= 9:
+            return ExecutivePower.POLICY_PEEK
+        if self.fasc_policies >= 4 and (self.num_players in (5, 6) or self.num_players >= 9):
+            return ExecutivePower.EXECUTION
+        return None
+
+    def executive_target_mask(self, power, president):
+        """Bitmask of the seats `president` may target with `power`."""
+        if power == ExecutivePower.POLICY_PEEK:
+            return 0
+        mask = self.alive_mask & ~(1 << self.player_ids[president])
+        if power == ExecutivePower.INVESTIGATE:
+            mask &= ~self.investigated_mask
+        return mask
+
     def kill_player(self, player):
-        if self.player_status[player] == PlayerStatus.DEAD:
+        player_id = self.player_ids[player]
+        if not self.alive_mask >> player_id & 1:
             return False
-        self.player_status[player] = PlayerStatus.DEAD
+        self.alive_mask &= ~(1 << player_id)
         self.log_event(None, f"{player} executed.")
-        if self.roles[player] == Role.HITLER:
+        if self.role_codes[player_id] == HITLER_CODE:
             self.game_over = True
             self.winner = "Liberals"
             self.log_event(None, "Liberals win: Hitler executed.")
@@ -219,18 +549,19 @@ class GameState:
         return True
 
     def investigate_player(self, president, target_player):
-        if target_player in self.investigated:
+        target_bit = 1 << self.player_ids[target_player]
+        if self.investigated_mask & target_bit:
             return None
-        if self.player_status[target_player] == PlayerStatus.DEAD:
+        if not self.alive_mask & target_bit:
             return None
         if president == target_player:
             return None
 
-        self.investigated.add(target_player)
-        return self.membership_cards[target_player]
+        self.investigated_mask |= target_bit
+        return ROLE_BY_CODE[self.membership_codes[self.player_ids[target_player]]]
 
     def call_special_election(self, president, target_player):
-        if self.player_status[target_player] == PlayerStatus.DEAD:
+        if not self.is_alive(target_player):
             return False
         if president == target_player:
             return False
@@ -242,17 +573,18 @@ class GameState:
         policies = self.draw_policies(3)
         if not policies:
             return []
-        self.deck = policies + self.deck
+        # Cards are drawn from the end of the deck, so the peeked cards go back
+        # in reverse to be the next three drawn, in the order they were seen.
+        self.deck_codes.extend(CODE_BY_ROLE[card] for card in reversed(policies))
         return policies
 
     def start_discussion(self, phase_name):
         self.current_discussion_phase = phase_name
         self.discussion_speaker_index = 0
-        self.discussion_turn_counts = {p: 0 for p in self.players}
+        self.turn_counts = [0] * self.num_players
 
     def get_current_discussion_speaker(self):
-        alive_players = [
-            p for p in self.players if self.player_status[p] == PlayerStatus.ALIVE]
+        alive_players = self.alive_players
         if not alive_players:
             return None
         return alive_players[self.discussion_speaker_index % len(alive_players)]
@@ -260,14 +592,13 @@ class GameState:
     def next_discussion_speaker(self):
         current_speaker = self.get_current_discussion_speaker()
         if current_speaker:
-            self.discussion_turn_counts[current_speaker] += 1
+            self._own_collections()
+            self.turn_counts[self.player_ids[current_speaker]] += 1
             self.discussion_speaker_index += 1
         return self.get_current_discussion_speaker()
 
     def get_first_discussion_speaker(self):
-        alive_players = [
-            p for p in self.players if self.player_status[p] == PlayerStatus.ALIVE]
-        return alive_players[0] if alive_players else None
+        return self.alive_players[0] if self.alive_players else None
 
     def record_discussion_message(self, player_name, message_text):
         message = f"{player_name}: {message_text}"
@@ -290,22 +621,318 @@ class GameState:
         return "\n".join([f"- {event}" for event in self.public_log])
 
     def get_private_log_string(self, player_name):
-        return "\n".join([f"- {event}" for event in self.private_logs[player_name]])
+        entries = self.get_private_log(player_name)
+        if not entries:
+            return ""
+        return "- " + "\n- ".join(entries)
 
     def get_discussion_string(self):
         return "\n".join([f"- {message}" for message in self.discussion_history])
 
     def get_player_names_by_role(self, role_name: Role):
-        return [name for name, role in self.roles.items() if role == role_name]
+        code = CODE_BY_ROLE[role_name]
+        return [name for name, role_code in zip(self.players, self.role_codes) if role_code == code]
+
+    def fork(self):
+        """Return an independent copy of the rules state for search.
+
+        The fork has no logs, discussion history or game logger, and
+        log_event is a no-op on it. Seat data that never changes after setup
+        is shared. The deck, discard pile, previous governments, election
+        history and turn counts are shared copy-on-write: whichever of the two states changes
+        them first makes its own copies.
+        """
+        child = GameState.__new__(GameState)
+        child.players = self.players
+        child.num_players = self.num_players
+        child.player_ids = self.player_ids
+        child.role_codes = self.role_codes
+        child.membership_codes = self.membership_codes
+        child.deck_codes = self.deck_codes
+        child.discard_codes = self.discard_codes
+        child.lib_policies = self.lib_policies
+        child.fasc_policies = self.fasc_policies
+        child.election_tracker = self.election_tracker
+        child.gov = self.gov
+        child.prev_govs = self.prev_govs
+        child.election_history = self.election_history
+        child.president_order = self.president_order
+        child.current_president_index = self.current_president_index
+        child.term_limit_chancellor_id = self.term_limit_chancellor_id
+        child.term_limit_president_id = self.term_limit_president_id
+        child.hitler_revealed = self.hitler_revealed
+        child.game_over = self.game_over
+        child.winner = self.winner
+        child.alive_mask = self.alive_mask
+        child._alive_cache_mask = self._alive_cache_mask
+        child._alive_cache = self._alive_cache
+        child.investigated_mask = self.investigated_mask
+        child.special_president = self.special_president
+        child.veto_power = self.veto_power
+        child.failed_elections = self.failed_elections
+        child.public_log = []
+        child.event_log = []
+        child.private_overlays = [[] for _ in self.players]
+        child.phase = self.phase
+        child.discussion_history = []
+        child.current_discussion_phase = self.current_discussion_phase
+        child.discussion_speaker_index = self.discussion_speaker_index
+        child.max_discussion_turns = self.max_discussion_turns
+        child.turn_counts = self.turn_counts
+        child.game_logger = None
+        child.logging_enabled = False
+        child._shares_collections = True
+        self._shares_collections = True
+        return child
+
+    def _own_collections(self):
+        if self._shares_collections:
+            self.deck_codes = bytearray(self.deck_codes)
+            self.discard_codes = bytearray(self.discard_codes)
+            self.prev_govs = list(self.prev_govs)
+            self.election_history = list(self.election_history)
+            self.turn_counts = list(self.turn_counts)
+            self._shares_collections = False
+
+    def determinize(self, player, rng=random, known_roles=None):
+        """Return a fork whose hidden information is resampled for `player`.
+
+        Roles that `player` cannot see are redealt uniformly among the other
+        seats. A player on the Fascist team sees every role. Dead players
+        cannot be Hitler, because executing Hitler ends the game. Roles in
+        `known_roles` (name -> Role, e.g. from the player's own reasoning)
+        are kept fixed. The unseen policy cards in the deck and discard pile
+        are reshuffled, keeping both pile sizes.
+        """
+        child = self.fork()
+        player_id = self.player_ids[player]
+        fixed = {player_id: self.role_codes[player_id]}
+        if self.role_codes[player_id] != LIBERAL_CODE:
+            fixed = dict(enumerate(self.role_codes))
+        for name, role in (known_roles or {}).items():
+            fixed[self.player_ids[name]] = CODE_BY_ROLE[role]
+
+        hidden_seats = [i for i in range(self.num_players) if i not in fixed]
+        if hidden_seats:
+            pool = list(self.role_codes)
+            for code in fixed.values():
+                pool.remove(code)
+            for _ in range(1000):
+                rng.shuffle(pool)
+                role_codes = bytearray(self.role_codes)
+                for seat, code in fixed.items():
+                    role_codes[seat] = code
+                for seat, code in zip(hidden_seats, pool):
+                    role_codes[seat] = code
+                if all(self.alive_mask >> seat & 1 or code != HITLER_CODE
+                       for seat, code in enumerate(role_codes)):
+                    child.role_codes = bytes(role_codes)
+                    child.membership_codes = _membership_codes(child.role_codes)
+                    break
+            else:
+                raise ValueError(
+                    f"No role assignment is consistent with what {player} knows")
+
+        cards = bytearray(self.deck_codes) + self.discard_codes
+        rng.shuffle(cards)
+        child.deck_codes = cards[:len(self.deck_codes)]
+        child.discard_codes = cards[len(self.deck_codes):]
+        child.prev_govs = list(self.prev_govs)
+        child.election_history = list(self.election_history)
+        child.turn_counts = list(self.turn_counts)
+        child._shares_collections = False
+        return child
+
+    def snapshot(self):
+        return {
+            "players": list(self.players),
+            "roles": {p: r.value for p, r in self.roles.items()},
+            "deck": [card.value for card in self.deck],
+            "discard": [card.value for card in self.discard],
+            "lib_policies": self.lib_policies,
+            "fasc_policies": self.fasc_policies,
+            "election_tracker": self.election_tracker,
+            "gov": [self.gov.president, self.gov.chancellor],
+            "prev_govs": [list(gov) for gov in self.prev_govs],
+            "election_history": [
+                [record.president, record.chancellor, list(record.yes_votes),
+                 list(record.no_votes), record.fasc_policies,
+                 record.policy.value if record.policy else None]
+                for record in self.election_history],
+            "president_order": list(self.president_order),
+            "current_president_index": self.current_president_index,
+            "term_limit_chancellor": self.term_limit_chancellor,
+            "term_limit_president": self.term_limit_president,
+            "hitler_revealed": self.hitler_revealed,
+            "game_over": self.game_over,
+            "winner": _encode_winner(self.winner),
+            "player_status": {p: s.value for p, s in self.player_status.items()},
+            "membership_cards": {p: r.value for p, r in self.membership_cards.items()},
+            "investigated": list(self.investigated),
+            "special_president": self.special_president,
+            "veto_power": self.veto_power,
+            "failed_elections": self.failed_elections,
+            "public_log": list(self.public_log),
+            "event_log": list(self.event_log),
+            "private_overlays": {p: [list(item) for item in self.private_overlays[i]]
+                                 for i, p in enumerate(self.players)},
+            "phase": self.phase.value,
+            "discussion_history": list(self.discussion_history),
+            "current_discussion_phase": self.current_discussion_phase,
+            "discussion_speaker_index": self.discussion_speaker_index,
+            "max_discussion_turns": self.max_discussion_turns,
+            "discussion_turn_counts": dict(self.discussion_turn_counts),
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot, game_logger):
+        state = cls.__new__(cls)
+        state.players = list(snapshot["players"])
+        state.num_players = len(state.players)
+        state.player_ids = {p: i for i, p in enumerate(state.players)}
+        state.role_codes = bytes(CODE_BY_ROLE[Role(snapshot["roles"][p])]
+                                 for p in state.players)
+        state.membership_codes = bytes(CODE_BY_ROLE[Role(snapshot["membership_cards"][p])]
+                                       for p in state.players)
+        state.deck = [Role(card) for card in snapshot["deck"]]
+        state.discard = [Role(card) for card in snapshot["discard"]]
+        state.lib_policies = snapshot["lib_policies"]
+        state.fasc_policies = snapshot["fasc_policies"]
+        state.election_tracker = snapshot["election_tracker"]
+        state.gov = Government(*snapshot["gov"])
+        state.prev_govs = [tuple(gov) for gov in snapshot["prev_govs"]]
+        state.election_history = [
+            ElectionRecord(president, chancellor, tuple(yes_votes), tuple(no_votes),
+                           fasc_policies, Role(policy) if policy else None)
+            for president, chancellor, yes_votes, no_votes, fasc_policies, policy
+            in snapshot.get("election_history", [])]
+        state.president_order = list(snapshot["president_order"])
+        state.current_president_index = snapshot["current_president_index"]
+        state.term_limit_chancellor = snapshot["term_limit_chancellor"]
+        state.term_limit_president = snapshot["term_limit_president"]
+        state.hitler_revealed = snapshot["hitler_revealed"]
+        state.game_over = snapshot["game_over"]
+        state.winner = _decode_winner(snapshot["winner"])
+        state.alive_mask = 0
+        for p in state.players:
+            if PlayerStatus(snapshot["player_status"][p]) == PlayerStatus.ALIVE:
+                state.alive_mask |= 1 << state.player_ids[p]
+        state._alive_cache_mask = None
+        state._alive_cache = None
+        state.investigated_mask = 0
+        for p in snapshot["investigated"]:
+            state.investigated_mask |= 1 << state.player_ids[p]
+        state.special_president = snapshot["special_president"]
+        state.veto_power = snapshot["veto_power"]
+        state.failed_elections = snapshot["failed_elections"]
+        state.public_log = list(snapshot["public_log"])
+        state.event_log = list(snapshot["event_log"])
+        state.private_overlays = [[tuple(item) for item in snapshot["private_overlays"][p]]
+                                  for p in state.players]
+        state.phase = GamePhase(snapshot["phase"])
+        state.discussion_history = list(snapshot["discussion_history"])
+        state.current_discussion_phase = snapshot["current_discussion_phase"]
+        state.discussion_speaker_index = snapshot["discussion_speaker_index"]
+        state.max_discussion_turns = snapshot["max_discussion_turns"]
+        state.turn_counts = [snapshot["discussion_turn_counts"][p]
+                             for p in state.players]
+        state.game_logger = game_logger
+        state.logging_enabled = True
+        state._shares_collections = False
+        return state
+
+
+def _membership_codes(role_codes):
+    # Hitler carries a Fascist party membership card.
+    return bytes(LIBERAL_CODE if code == LIBERAL_CODE else FASCIST_CODE
+                 for code in role_codes)
+
+
+def _encode_winner(winner):
+    # kill_player and the Hitler-Chancellor check in GameRunner store team
+    # names as plain strings, the policy win conditions store a Role.
+    if isinstance(winner, Role):
+        return {"role": winner.value}
+    return {"name": winner}
+
+
+def _decode_winner(encoded):
+    if "role" in encoded:
+        return Role(encoded["role"])
+    return encoded["name"]
+
+
+CHECKPOINT_VERSION = 2
+
+
+def save_checkpoint(path, game_state):
+    """Atomically write the game state and RNG state to `path`."""
+    version, internal_state, gauss_next = random.getstate()
+    checkpoint = {
+        "version": CHECKPOINT_VERSION,
+        "game_state": game_state.snapshot(),
+        "random_state": [version, list(internal_state), gauss_next],
+    }
+    checkpoint_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=checkpoint_dir, prefix=".checkpoint-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _upgrade_v1_snapshot(snapshot):
+    # Version 1 stored a full copy of the event list per player. The entries
+    # only differ where private info was appended, so the shortest entry at
+    # each position is the shared one.
+    private_logs = snapshot.pop("private_logs")
+    players = snapshot["players"]
+    event_log = []
+    private_overlays = {p: [] for p in players}
+    for event_index, entries in enumerate(zip(*(private_logs[p] for p in players))):
+        shared_entry = min(entries, key=len)
+        event_log.append(shared_entry)
+        for p, entry in zip(players, entries):
+            if entry != shared_entry:
+                private_overlays[p].append([event_index, entry, True])
+    snapshot["event_log"] = event_log
+    snapshot["private_overlays"] = private_overlays
+
+
+def load_checkpoint(path, game_logger):
+    """Restore a GameState written by save_checkpoint and reseed `random`."""
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("version") == 1:
+        _upgrade_v1_snapshot(checkpoint["game_state"])
+    elif checkpoint.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(
+            f"Unsupported checkpoint version: {checkpoint.get('version')}")
+    version, internal_state, gauss_next = checkpoint["random_state"]
+    random.setstate((version, tuple(internal_state), gauss_next))
+    return GameState.from_snapshot(checkpoint["game_state"], game_logger)
 
 
 def is_valid_chancellor_nominee(game_state, president_name, nominee_name):
     if nominee_name == president_name:
         return False
-    if game_state.player_status[nominee_name] == PlayerStatus.DEAD:
+    nominee_bit = 1 << game_state.player_ids[nominee_name]
+    if not game_state.alive_mask & nominee_bit:
         return False
-    if nominee_name == game_state.term_limit_chancellor:
-        return False
-    if (game_state.num_players >= 7 and nominee_name == game_state.term_limit_president):
+    if game_state.term_limited_mask & nominee_bit:
         return False
     return True
+
+
+def valid_nominee_mask(game_state, president_name):
+    """Bitmask of the seats `president_name` may nominate as Chancellor."""
+    president_bit = 1 << game_state.player_ids[president_name]
+    return game_state.alive_mask & ~game_state.term_limited_mask & ~president_bit
@@ -0,0 +1,380 @@
+"""Gym-style vectorized environment over GameState for non-LLM agents.
+
+SecretHitlerVectorEnv steps N games of the same player count together. In
+every game exactly one seat acts per step (votes are cast one seat at a
+time, in seat order, as GameRunner collects them), so an action is a single
+integer per game:
+
+    0 .. num_players-1   nominate, investigate, choose or execute that seat
+    ACTION_PASS          pass on the nomination
+    ACTION_VOTE_NO/YES   vote on the nominated government
+    ACTION_DISCARD + i   President discards card i (0-2)
+    ACTION_ENACT + i     Chancellor enacts card i (0-1)
+    ACTION_CONTINUE      acknowledge a Policy Peek
+
+reset() and step() return a dict with
+    "observation"     float32 [N, num_players, OBS_SIZE], one row per seat
+    "action_mask"     bool [N, NUM_ACTIONS], legal actions of the acting seat
+    "current_player"  int [N], the acting seat
+and step() also returns rewards [N, num_players] (+1 for the winning team,
+-1 for the losers, 0 for a stalled game), dones [N] and an info dict. A
+finished game is reset in place, so the returned observation already
+belongs to the next game.
+
+The phase logic follows GameRunner.run_game and calls the same GameState
+methods in the same order; the discussion phases are skipped. A legislative
+session with only one or two cards left, or a chaos policy with none,
+crashes or hangs the runner, so here it ends the game as STALLED.
+
+The engine shuffles with the `random` module, so reset(seed) seeds it and
+the run is reproducible as long as nothing else draws from `random` between
+steps.
+"""
+import random
+
+import numpy as np
+
+from secret_hitler_engine import (
+    GameState, ExecutivePower, Role, CODE_BY_ROLE, LIBERAL_CODE, FASCIST_CODE,
+    HITLER_CODE, valid_nominee_mask)
+from secret_hitler_simulator import (
+    IN_PROGRESS, LIBERAL_POLICIES, FASCIST_POLICIES, HITLER_CHANCELLOR, STALLED)
+
+MAX_PLAYERS = 10
+
+ACTION_PASS = MAX_PLAYERS
+ACTION_VOTE_NO = ACTION_PASS + 1
+ACTION_VOTE_YES = ACTION_PASS + 2
+ACTION_DISCARD = ACTION_PASS + 3
+ACTION_ENACT = ACTION_DISCARD + 3
+ACTION_CONTINUE = ACTION_ENACT + 2
+NUM_ACTIONS = ACTION_CONTINUE + 1
+
+PHASE_NOMINATE = 0
+PHASE_VOTE = 1
+PHASE_DISCARD = 2
+PHASE_ENACT = 3
+PHASE_INVESTIGATE = 4
+PHASE_SPECIAL_ELECTION = 5
+PHASE_POLICY_PEEK = 6
+PHASE_EXECUTE = 7
+NUM_PHASES = 8
+
+_PHASE_BY_POWER = {
+    ExecutivePower.INVESTIGATE: PHASE_INVESTIGATE,
+    ExecutivePower.SPECIAL_ELECTION: PHASE_SPECIAL_ELECTION,
+    ExecutivePower.POLICY_PEEK: PHASE_POLICY_PEEK,
+    ExecutivePower.EXECUTION: PHASE_EXECUTE,
+}
+
+# _SEAT_BITS[mask] unpacks a seat bitmask; _SEAT_ACTIONS[mask] is the same
+# row as an action mask, and _PHASE_ACTIONS[phase] the fixed non-seat actions
+# each phase allows. Legal masks are then two table lookups and an or.
+_SEAT_BITS = (np.arange(1 << MAX_PLAYERS)[:, None] >> np.arange(MAX_PLAYERS) & 1).astype(bool)
+_SEAT_ACTIONS = np.zeros((1 << MAX_PLAYERS, NUM_ACTIONS), dtype=bool)
+_SEAT_ACTIONS[:, :MAX_PLAYERS] = _SEAT_BITS
+_PHASE_ACTIONS = np.zeros((NUM_PHASES, NUM_ACTIONS), dtype=bool)
+_PHASE_ACTIONS[PHASE_NOMINATE, ACTION_PASS] = True
+_PHASE_ACTIONS[PHASE_VOTE, [ACTION_VOTE_NO, ACTION_VOTE_YES]] = True
+_PHASE_ACTIONS[PHASE_DISCARD, ACTION_DISCARD:ACTION_DISCARD + 3] = True
+_PHASE_ACTIONS[PHASE_ENACT, ACTION_ENACT:ACTION_ENACT + 2] = True
+_PHASE_ACTIONS[PHASE_POLICY_PEEK, ACTION_CONTINUE] = True
+_PHASE_ONE_HOT = np.eye(NUM_PHASES, dtype=np.float32)
+# card code (or -1 for no card) -> [is liberal, is fascist]
+_CARD_ONE_HOT = np.array([[1, 0], [0, 1], [0, 0]], dtype=np.float32)
+
+
+def observation_size(num_players):
+    return 13 * num_players + 3 + NUM_PHASES + 6 + 12
+
+
+def sample_legal_actions(action_mask, rng):
+    """A uniformly random legal action per game."""
+    keys = rng.random(action_mask.shape)
+    keys[~action_mask] = -1.0
+    return keys.argmax(axis=1)
+
+
+class _Game:
+    __slots__ = ("state", "phase", "actor", "president", "seat_mask", "hand",
+                 "voters", "vote_index", "yes_mask", "last_voters", "last_yes",
+                 "peeked", "known_membership", "outcome", "length")
+
+    def __init__(self, num_players):
+        players = [f"Player{i+1}" for i in range(num_players)]
+        self.state = GameState(players, None)
+        self.state.logging_enabled = False
+        self.hand = []
+        self.peeked = []
+        self.last_voters = 0
+        self.last_yes = 0
+        self.outcome = IN_PROGRESS
+        self.length = 0
+
+
+class SecretHitlerVectorEnv:
+    # per-game integers copied out of GameState after every step
+    _INT_FIELDS = ("phase", "actor", "president", "chancellor", "seat_mask",
+                   "alive_mask", "investigated_mask", "term_limited_mask",
+                   "lib_policies", "fasc_policies", "election_tracker",
+                   "failed_elections", "deck_size", "discard_size",
+                   "last_voters", "last_yes")
+
+    def __init__(self, num_envs, num_players):
+        if num_players not in range(5, MAX_PLAYERS + 1):
+            raise ValueError(f"Unsupported player count: {num_players}")
+        self.num_envs = num_envs
+        self.num_players = num_players
+        self.observation_size = observation_size(num_players)
+        self.games = []
+
+        n = num_players
+        self._roles = np.zeros((num_envs, n), dtype=np.int8)
+        self._known_team = np.zeros((num_envs, n, n), dtype=np.float32)
+        self._known_hitler = np.zeros((num_envs, n, n), dtype=np.float32)
+        self._known_membership = np.zeros((num_envs, n, n), dtype=np.int8)
+        self._ints = np.zeros((num_envs, len(self._INT_FIELDS)), dtype=np.int32)
+        self._hand = np.full((num_envs, 3), -1, dtype=np.int8)
+        self._peek = np.full((num_envs, 3), -1, dtype=np.int8)
+
+    def reset(self, seed=None):
+        if seed is not None:
+            random.seed(seed)
+        self.games = [self._new_game(i) for i in range(self.num_envs)]
+        for i, game in enumerate(self.games):
+            self._record(i, game)
+        return self._observe()
+
+    def step(self, actions):
+        rewards = np.zeros((self.num_envs, self.num_players), dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        outcomes = np.zeros(self.num_envs, dtype=np.int8)
+        lengths = np.zeros(self.num_envs, dtype=np.int32)
+        for i, game in enumerate(self.games):
+            action = int(actions[i])
+            if not self._is_legal(game, action):
+                raise ValueError(f"Illegal action {action} in game {i} (phase {game.phase})")
+            game.length += 1
+            try:
+                self._apply(game, action)
+            except IndexError:
+                # the runner crashes when a chaos policy finds no card to draw
+                game.outcome = STALLED
+            if game.outcome != IN_PROGRESS:
+                dones[i] = True
+                outcomes[i] = game.outcome
+                lengths[i] = game.length
+                rewards[i] = self._rewards(i, game.outcome)
+                game = self.games[i] = self._new_game(i)
+            self._record(i, game)
+        info = {"outcome": outcomes, "episode_length": lengths}
+        return self._observe(), rewards, dones, info
+
+    def _new_game(self, index):
+        game = _Game(self.num_players)
+        state = game.state
+        roles = np.frombuffer(state.role_codes, dtype=np.int8)
+        self._roles[index] = roles
+        # The runner tells every Fascist and Hitler who the Fascist team is,
+        # and from 7 players tells the Fascists which of them is Hitler.
+        fascist_team = (roles != LIBERAL_CODE).astype(np.float32)
+        self._known_team[index] = fascist_team[:, None] * fascist_team[None, :]
+        hitler = (roles == HITLER_CODE).astype(np.float32)
+        knows_hitler = roles == HITLER_CODE
+        if self.num_players >= 7:
+            knows_hitler = knows_hitler | (roles == FASCIST_CODE)
+        self._known_hitler[index] = knows_hitler[:, None] * hitler[None, :]
+        # known_membership[i, j]: what seat i learned by investigating seat j
+        # (-1 unknown, otherwise a membership card code)
+        game.known_membership = self._known_membership[index]
+        game.known_membership[:] = -1
+        self._start_round(game)
+        return game
+
+    def _is_legal(self, game, action):
+        if 0 <= action < MAX_PLAYERS:
+            return bool(game.seat_mask >> action & 1)
+        return 0 <= action < NUM_ACTIONS and bool(_PHASE_ACTIONS[game.phase, action])
+
+    def _start_round(self, game):
+        state = game.state
+        president_name = state.get_president()
+        game.president = state.player_ids[president_name]
+        game.phase = PHASE_NOMINATE
+        game.actor = game.president
+        game.seat_mask = valid_nominee_mask(state, president_name)
+
+    def _end_round(self, game):
+        state = game.state
+        if state.check_game_over():
+            game.outcome = self._outcome(state)
+            return
+        state.next_president()
+        self._start_round(game)
+
+    def _failed_election(self, game):
+        game.state.reset_government()
+        game.state.increment_election_tracker()
+        self._end_round(game)
+
+    def _apply(self, game, action):
+        state = game.state
+        president_name = state.players[game.president]
+        phase = game.phase
+
+        if phase == PHASE_NOMINATE:
+            if action == ACTION_PASS:
+                state.reset_government()
+                self._failed_election(game)
+                return
+            state.set_government(president_name, state.players[action])
+            game.voters = [i for i in range(self.num_players) if state.alive_mask >> i & 1]
+            game.vote_index = 0
+            game.yes_mask = 0
+            game.phase = PHASE_VOTE
+            game.actor = game.voters[0]
+            game.seat_mask = 0
+
+        elif phase == PHASE_VOTE:
+            if action == ACTION_VOTE_YES:
+                game.yes_mask |= 1 << game.actor
+            game.vote_index += 1
+            if game.vote_index < len(game.voters):
+                game.actor = game.voters[game.vote_index]
+                return
+            game.last_voters = sum(1 << i for i in game.voters)
+            game.last_yes = game.yes_mask
+            state.record_election(
+                president_name, state.gov.chancellor,
+                [state.players[i] for i in game.voters if game.yes_mask >> i & 1],
+                [state.players[i] for i in game.voters if not game.yes_mask >> i & 1])
+            if game.yes_mask.bit_count() <= len(game.voters) / 2:
+                self._failed_election(game)
+                return
+            state.election_tracker = 0
+            if state.check_hitler_chancellor_win():
+                state.game_over = True
+                state.winner = "Fascists"
+                game.outcome = HITLER_CHANCELLOR
+                return
+            available = len(state.deck_codes) + len(state.discard_codes)
+            if available == 0:
+                self._end_round(game)
+            elif available < 3:
+                game.outcome = STALLED
+            else:
+                game.hand = state.draw_policies(3)
+                game.phase = PHASE_DISCARD
+                game.actor = game.president
+
+        elif phase == PHASE_DISCARD:
+            state.discard_policy(game.hand.pop(action - ACTION_DISCARD))
+            game.phase = PHASE_ENACT
+            game.actor = state.player_ids[state.gov.chancellor]
+
+        elif phase == PHASE_ENACT:
+            policy = game.hand[action - ACTION_ENACT]
+            state.enact_policy(policy)
+            state.record_enacted_policy(policy)
+            # the Chancellor's other card leaves the game, as in the runner
+            game.hand = []
+            power = state.get_executive_power()
+            if power is None:
+                self._end_round(game)
+                return
+            game.seat_mask = state.executive_target_mask(power, president_name)
+            if power == ExecutivePower.POLICY_PEEK:
+                game.peeked = state.policy_peek()
+            elif not game.seat_mask:
+                self._end_round(game)
+                return
+            game.phase = _PHASE_BY_POWER[power]
+            game.actor = game.president
+
+        else:
+            if phase == PHASE_INVESTIGATE:
+                membership = state.investigate_player(president_name, state.players[action])
+                game.known_membership[game.president, action] = CODE_BY_ROLE[membership]
+            elif phase == PHASE_SPECIAL_ELECTION:
+                state.call_special_election(president_name, state.players[action])
+            elif phase == PHASE_EXECUTE:
+                state.kill_player(state.players[action])
+            game.peeked = []
+            game.seat_mask = 0
+            self._end_round(game)
+
+    def _outcome(self, state):
+        if state.winner == Role.LIBERAL:
+            return LIBERAL_POLICIES
+        if state.winner == Role.FASCIST and state.fasc_policies >= 6:
+            return FASCIST_POLICIES
+        return HITLER_CHANCELLOR
+
+    def _rewards(self, index, outcome):
+        if outcome == STALLED:
+            return 0.0
+        liberal = self._roles[index] == LIBERAL_CODE
+        liberals_won = outcome == LIBERAL_POLICIES
+        return np.where(liberal == liberals_won, 1.0, -1.0)
+
+    def _record(self, index, game):
+        """Copy the integers the observation is built from into the batch arrays."""
+        state = game.state
+        chancellor = state.gov.chancellor
+        self._ints[index] = (
+            game.phase, game.actor, game.president,
+            -1 if chancellor is None else state.player_ids[chancellor],
+            game.seat_mask, state.alive_mask, state.investigated_mask,
+            state.term_limited_mask, state.lib_policies, state.fasc_policies,
+            state.election_tracker, state.failed_elections,
+            len(state.deck_codes), len(state.discard_codes),
+            game.last_voters, game.last_yes)
+        self._hand[index] = -1
+        self._hand[index, :len(game.hand)] = [CODE_BY_ROLE[card] for card in game.hand]
+        self._peek[index] = -1
+        self._peek[index, :len(game.peeked)] = [CODE_BY_ROLE[card] for card in game.peeked]
+
+    def _observe(self):
+        n = self.num_players
+        N = self.num_envs
+        (phase, actor, president, chancellor, seat_mask, alive, investigated,
+         term_limited, lib, fasc, tracker, failed, deck_size, discard_size,
+         last_voters, last_yes) = self._ints.T
+        seats = np.arange(n)
+
+        def seat_bits(mask):
+            return _SEAT_BITS[mask, :n]
+
+        public = np.concatenate([
+            seat_bits(alive), seat_bits(investigated),
+            seats == president[:, None], seats == chancellor[:, None],
+            seat_bits(term_limited), seats == actor[:, None],
+            seat_bits(last_yes), seat_bits(last_voters & ~last_yes),
+        ], axis=1).astype(np.float32)
+        scalars = np.stack([lib / 5, fasc / 6, tracker / 3, failed / 3,
+                            deck_size / 17, discard_size / 17], axis=1).astype(np.float32)
+        public = np.concatenate([public, _PHASE_ONE_HOT[phase], scalars], axis=1)
+
+        # Cards are only visible to the seat holding them: the acting
+        # President or Chancellor, or the President during a Policy Peek.
+        is_actor = (seats == actor[:, None])[:, :, None]
+        hand = _CARD_ONE_HOT[self._hand].reshape(N, 1, 6) * is_actor
+        peek = _CARD_ONE_HOT[self._peek].reshape(N, 1, 6) * is_actor
+
+        roles = self._roles
+        observation = np.concatenate([
+            np.broadcast_to(np.eye(n, dtype=np.float32), (N, n, n)),
+            np.eye(3, dtype=np.float32)[roles],
+            self._known_team,
+            self._known_hitler,
+            (self._known_membership == FASCIST_CODE).astype(np.float32),
+            (self._known_membership == LIBERAL_CODE).astype(np.float32),
+            np.broadcast_to(public[:, None, :], (N, n, public.shape[1])),
+            hand, peek,
+        ], axis=2)
+        action_mask = _PHASE_ACTIONS[phase] | _SEAT_ACTIONS[seat_mask]
+        return {
+            "observation": observation,
+            "action_mask": action_mask,
+            "current_player": actor.copy(),
+        }
@@ -1,11 +1,18 @@
 import argparse
+import functools
 import os
 import sys
 import time
 import json
+import random
 
-from secret_hitler_engine import GameState, is_valid_chancellor_nominee, Role, PlayerStatus
+from secret_hitler_engine import GameState, GamePhase, ExecutivePower, valid_nominee_mask, Role, PlayerStatus, save_checkpoint, load_checkpoint
 from llm_interface import LLMPlayerInterface, GameLogger
+from scripted_players import SCRIPTED_PLAYERS
+from results_store import ResultsStore, game_record
+from telemetry import CallTelemetry
+import tracing
+import memory_telemetry
 
 
 NOMINATE_ACTION_PREFIX = "nominate "
@@ -18,6 +25,19 @@ EXECUTE_ACTION = "execute "
 PASS_ACTION = "pass"
 
 
+def _game_phase(method):
+    """Keeps GameRunner.current_phase up to date for status reports."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        outer_phase = self.current_phase
+        self.current_phase = method.__name__
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.current_phase = outer_phase
+    return wrapper
+
+
 class GameConfig:
     def __init__(self, config_args):
         self.num_players = config_args.num_players
@@ -25,6 +45,11 @@ class GameConfig:
         self.press_enter_mode = config_args.press_enter
         self.debug_llm_enabled = config_args.debug_llm
         self.log_to_file_enabled = config_args.log_to_file
+        self.log_dir = config_args.log_dir
+        self.results_db = config_args.results_db
+        self.resume_path = config_args.resume
+        # Resumed games keep checkpointing to the file they were resumed from
+        self.checkpoint_path = config_args.checkpoint or config_args.resume
         self.player_configs = self._parse_player_models(
             # Store player configs, not just models
             config_args.player_models, config_args.num_players)
@@ -37,6 +62,10 @@ class GameConfig:
                     player_name, config_json_str = player_config_str.split(
                         "=", 1)
                     config = json.loads(config_json_str)
+                    if config.get("provider") in SCRIPTED_PLAYERS:
+                        # Scripted seats run offline and need no model or key
+                        config.setdefault("model", config["provider"])
+                        config.setdefault("api_key_env", None)
                     if not all(key in config for key in ["provider", "model", "api_key_env"]):
                         raise ValueError(
                             "Player config must include 'provider', 'model', and 'api_key_env'")
@@ -63,15 +92,30 @@ class GameConfig:
 
 
 class GameRunner:
-    def __init__(self, config):
+    def __init__(self, config, game_key=None):
         self.config = config
-        self.logger = GameLogger(config.log_to_file_enabled)
+        # Identifies the game in the results store; repeats are not recorded twice
+        self.game_key = game_key
+        self.logger = GameLogger(
+            config.log_to_file_enabled, file_mode='a' if config.resume_path else 'w',
+            log_dir=config.log_dir)
         self.player_llm_configs = self._setup_llm_interfaces()
         self.game_state = None
+        self.round_number = 0
+        self.current_phase = None
 
     def _setup_llm_interfaces(self):
         player_llm_configs = {}
         for player_name, player_config in self.config.player_configs.items():
+            scripted_player_class = SCRIPTED_PLAYERS.get(player_config["provider"])
+            if scripted_player_class:
+                # A "seed" gives the player its own RNG, leaving the shared one to the engine
+                rng = random.Random(player_config["seed"]) if "seed" in player_config else None
+                player_llm_configs[player_name] = scripted_player_class(
+                    player_name=player_name, game_logger=self.logger, rng=rng,
+                    latency=player_config.get("latency", 0))
+                continue
+
             api_key_env_var = player_config["api_key_env"]
             api_key = os.environ.get(api_key_env_var)
             if not api_key:
@@ -85,7 +129,10 @@ class GameRunner:
                 game_logger=self.logger,
                 llm_debug_enabled=self.config.debug_llm_enabled,
                 slowdown_timer=self.config.slowdown_timer,
-                provider_name=player_config["provider"]
+                provider_name=player_config["provider"],
+                base_url=player_config.get("base_url"),
+                stream=player_config.get("stream", False),
+                client_options=player_config.get("client_options")
             )
         return player_llm_configs
 
@@ -118,6 +165,49 @@ class GameRunner:
             self.game_state.log_event(None, "Roles assigned.",
                                       private_info=private_info)
 
+    def resume_game(self, checkpoint_path):
+        self.game_state = load_checkpoint(checkpoint_path, self.logger)
+        player_names = list(self.player_llm_configs.keys())
+        if sorted(player_names) != sorted(self.game_state.get_player_names()):
+            raise ValueError(
+                f"Checkpoint players {self.game_state.get_player_names()} do not match configured players {player_names}")
+
+        if self.config.log_to_file_enabled:
+            self.logger.setup_logging(self.game_state.get_player_names())
+            self.logger.log_public_event(
+                f"--- RESUMED FROM CHECKPOINT ({self.game_state.phase.value}) ---")
+        self.display_state_terminal(
+            message=f"Resumed game from {checkpoint_path} at {self.game_state.phase.value} phase.")
+
+    def status(self):
+        """The game's progress for the metrics endpoint (see metrics_server.py).
+        Reads only, so other threads may call it while the game runs."""
+        game_state = self.game_state
+        now = time.perf_counter()
+        return {
+            "game_id": self.game_key,
+            "round": self.round_number,
+            "phase": self.current_phase,
+            "lib_policies": game_state.lib_policies if game_state else 0,
+            "fasc_policies": game_state.fasc_policies if game_state else 0,
+            "in_flight": [{"provider": player.provider_name, "model": player.model_name,
+                           "seconds": now - player.request_started}
+                          for player in list(self.player_llm_configs.values())
+                          if getattr(player, "request_started", None) is not None],
+        }
+
+    def call_telemetry(self):
+        return CallTelemetry.from_calls([call for player in list(self.player_llm_configs.values())
+                                         for call in list(getattr(player, "call_records", []))])
+
+    def checkpoint_phase(self, phase):
+        self.game_state.phase = phase
+        if self.config.checkpoint_path:
+            save_checkpoint(self.config.checkpoint_path, self.game_state)
+            self.game_state.game_logger.log_to_debug_file(
+                "Game", f"DEBUG: Checkpoint saved at {phase.value} phase to {self.config.checkpoint_path}")
+
+    @tracing.traced("render")
     def display_state_terminal(self,  message: str | None = None, error_message: str | None = None, debug_message: str | None = None, current_player_name: str | None = None):
         if error_message:
             print(f"ERROR: {error_message}")
@@ -165,9 +255,10 @@ class GameRunner:
     def get_player_input(self, prompt, allowed_responses, current_player, game_phase, llm_interface, additional_prompt_info=None):
         self.game_state.game_logger.log_to_debug_file(
             current_player, f"DEBUG: get_player_input CALLED - Phase: {game_phase}, Allowed Responses: {allowed_responses}, Player: {current_player}")
-        llm_response_full, llm_response_action = llm_interface.get_llm_response(
-            self.game_state, prompt, allowed_responses, game_phase, additional_prompt_info
-        )
+        with tracing.span("decision", player=current_player, phase=game_phase):
+            llm_response_full, llm_response_action = llm_interface.get_llm_response(
+                self.game_state, prompt, allowed_responses, game_phase, additional_prompt_info
+            )
 
         thought = llm_interface.extract_thought(llm_response_full)
         if thought:
@@ -200,24 +291,33 @@ class GameRunner:
 
         return llm_response_action
 
-    def election_phase(self):
+    @tracing.traced("election_phase")
+    @_game_phase
+    def election_phase(self, resume_phase=None):
         president_name = self.game_state.get_president()
         llm_interface_president = self.player_llm_configs[president_name]
 
-        nominee_name = self._nomination_phase(
-            president_name, llm_interface_president)
-        if not nominee_name:
-            return False
+        if resume_phase == GamePhase.VOTING:
+            # Resumed after the election discussion: the nominated government
+            # is already set on the game state.
+            nominee_name = self.game_state.gov.chancellor
+        else:
+            nominee_name = self._nomination_phase(
+                president_name, llm_interface_president)
+            if not nominee_name:
+                return False
 
-        self.discussion_phase("Election")
+            self.discussion_phase("Election")
+            self.checkpoint_phase(GamePhase.VOTING)
         votes = self.voting_phase()
         election_successful = self._process_election_results(
             president_name, nominee_name, votes)
         return election_successful
 
     def _nomination_phase(self, president_name, llm_interface_president):
-        valid_nominees = [name for name in self.game_state.get_player_names(
-        ) if is_valid_chancellor_nominee(self.game_state, president_name, name)]
+        nominee_mask = valid_nominee_mask(self.game_state, president_name)
+        valid_nominees = [name for i, name in enumerate(
+            self.game_state.get_player_names()) if nominee_mask >> i & 1]
         allowed_nominees_actions = [
             f"{NOMINATE_ACTION_PREFIX}{nominee}" for nominee in valid_nominees] + [PASS_ACTION]
 
@@ -244,6 +344,10 @@ class GameRunner:
 
     def _process_election_results(self, president_name, nominee_name, votes):
         yes_votes = list(votes.values()).count(VOTE_YES)
+        self.game_state.record_election(
+            president_name, nominee_name,
+            [player for player, vote in votes.items() if vote == VOTE_YES],
+            [player for player, vote in votes.items() if vote != VOTE_YES])
         vote_results_msg = f"Vote Results: Yes={yes_votes}, No={len(votes) - yes_votes}"
         self.display_state_terminal(message=f"\n{vote_results_msg}")
         election_result = "Government approved" if yes_votes > len(
@@ -252,6 +356,8 @@ class GameRunner:
         self.game_state.log_event(None, full_election_log_msg)
         return yes_votes > len(votes) / 2
 
+    @tracing.traced("discussion_phase")
+    @_game_phase
     def discussion_phase(self, phase_name):
         self.display_state_terminal(
             message=f"\n--- {phase_name} Discussion ---")
@@ -298,6 +404,8 @@ class GameRunner:
         self.display_state_terminal(
             message=f"--- {phase_name} Discussion End ---")
 
+    @tracing.traced("voting_phase")
+    @_game_phase
     def voting_phase(self):
         self.display_state_terminal(message="\n--- Voting Phase ---")
         votes = {}
@@ -322,6 +430,8 @@ class GameRunner:
         self.game_state.log_event(None, " ".join(vote_log_messages))
         return votes
 
+    @tracing.traced("legislative_session")
+    @_game_phase
     def legislative_session(self):
         president_name = self.game_state.get_president()
         chancellor_name = self.game_state.gov.chancellor
@@ -341,6 +451,7 @@ class GameRunner:
         enacted_policy = self._chancellor_choose_policy(
             chancellor_name, llm_interface_chancellor, policies)
         self.game_state.enact_policy(enacted_policy)
+        self.game_state.record_enacted_policy(enacted_policy)
         policy_enacted_message = f"Policy enacted: {enacted_policy}. Liberal policies enacted: {self.game_state.lib_policies}, Fascist policies enacted: {self.game_state.fasc_policies}"
         self.game_state.game_logger.log_to_debug_file(
             "Game", f"DEBUG: {policy_enacted_message}.")
@@ -397,6 +508,8 @@ class GameRunner:
             self.display_state_terminal(
                 error_message=f"Invalid choice from Chancellor: {enact_choice_action}. Please choose from: {', '.join(policy_choices_chancellor)}")
 
+    @tracing.traced("executive_action")
+    @_game_phase
     def executive_action(self):
         president_name = self.game_state.get_president()
         llm_interface_president = self.player_llm_configs[president_name]
@@ -404,32 +517,28 @@ class GameRunner:
         log_message = None
         allowed_targets = None
 
-        if self.game_state.fasc_policies == 3 and self.config.num_players >= 5:
-            power_used = "Investigate"
+        power = self.game_state.get_executive_power()
+        if power is None:
+            self.display_state_terminal(message="No executive action.")
+            return
+
+        power_used = power.value
+        target_mask = self.game_state.executive_target_mask(power, president_name)
+        allowed_targets = [name for i, name in enumerate(
+            self.game_state.get_player_names()) if target_mask >> i & 1]
+        if power == ExecutivePower.INVESTIGATE:
             action_func = self.game_state.investigate_player
             prompt_text = f"{president_name}, investigate player:"
-            allowed_targets = [name for name in self.game_state.get_player_names(
-            ) if name != president_name and name not in self.game_state.investigated and self.game_state.player_status[name] == PlayerStatus.ALIVE]
-        elif self.game_state.fasc_policies == 4 and self.config.num_players >= 7:
-            power_used = "Special Election"
+        elif power == ExecutivePower.SPECIAL_ELECTION:
             action_func = self.game_state.call_special_election
             prompt_text = f"{president_name}, choose next president:"
-            allowed_targets = [name for name in self.game_state.get_player_names(
-            ) if name != president_name and self.game_state.player_status[name] == PlayerStatus.ALIVE]
-        elif self.game_state.fasc_policies == 5 and self.config.num_players >= 9:
-            power_used = "Policy Peek"
+        elif power == ExecutivePower.POLICY_PEEK:
             action_func = self.game_state.policy_peek
             prompt_text = f"{president_name} uses Policy Peek."
             allowed_targets = ["continue"]
-        elif self.game_state.fasc_policies >= 4 and (self.config.num_players == 5 or self.config.num_players == 6 or self.config.num_players >= 9):
-            power_used = "Execution"
+        else:
             action_func = self.game_state.kill_player
             prompt_text = f"{president_name}, execute player:"
-            allowed_targets = [name for name in self.game_state.get_player_names(
-            ) if name != president_name and self.game_state.player_status[name] == PlayerStatus.ALIVE]
-        else:
-            self.display_state_terminal(message="No executive action.")
-            return
 
         self.display_state_terminal(
             message=f"\n--- Executive Action: {power_used} ---")
@@ -517,44 +626,86 @@ class GameRunner:
         self.game_state.log_event(
             None, f"Liberals were: {', '.join(self.game_state.get_player_names_by_role(Role.LIBERAL))}")
 
+        CallTelemetry.from_calls(
+            call for player in self.player_llm_configs.values()
+            for call in getattr(player, "call_records", [])).print_summary("LLM CALLS THIS GAME")
+
+        if self.config.results_db:
+            self.record_results()
+
         if self.config.log_to_file_enabled:
             self.logger.close_log_files()
 
+    def record_results(self):
+        store = ResultsStore(self.config.results_db)
+        try:
+            store.record_game(game_record(self.game_state, self.config.player_configs,
+                                          self.player_llm_configs, self.game_key))
+        finally:
+            store.close()
+
     def run_game(self):
-        self.setup_game()
-
-        while not self.game_state.check_game_over():
-            gov_approved = self.election_phase()
-
-            if gov_approved:
-                self.game_state.election_tracker = 0
-                if self.game_state.check_hitler_chancellor_win():
-                    win_msg = "\nFascists win: Hitler Chancellor after 3 Fascist policies!"
-                    self.display_state_terminal(message=win_msg)
-                    self.game_state.log_event(None, win_msg)
-                    self.game_state.game_over = True
-                    self.game_state.winner = "Fascists"
-                    break
-                enacted_policy = self.legislative_session()
-                if enacted_policy:
-                    self.executive_action()
-            else:
-                self.game_state.reset_government()
-                self.game_state.increment_election_tracker()
-                if self.game_state.election_tracker >= 3:
-                    chaos_msg = "\nElection tracker maxed! Chaos policy enacted."
-                    self.display_state_terminal(message=chaos_msg)
-                    self.game_state.log_event(None, chaos_msg)
-                    self.game_state.enact_chaos_policy()
+        tracing.begin_track(self.game_key or "game")
+        with tracing.span("game", game=self.game_key):
+            self._play_game()
+
+    def _play_game(self):
+        if self.config.resume_path:
+            self.resume_game(self.config.resume_path)
+        else:
+            self.setup_game()
+
+        # Checkpoints are taken at the start of a round, after the election
+        # discussion and after a successful election. A resumed game re-runs
+        # at most the phase that was interrupted; a crash mid-discussion loses
+        # that discussion and restarts the round from the nomination.
+        resume_phase = self.game_state.phase
+        # check_game_over counts a nominated Hitler Chancellor as elected, so
+        # it must not run between the nomination and the vote.
+        while resume_phase == GamePhase.VOTING or not self.game_state.check_game_over():
+            memory_telemetry.record_round(self, self.round_number)
+            self.round_number += 1
+            with tracing.span("round", number=self.round_number):
+                if resume_phase == GamePhase.LEGISLATIVE:
+                    gov_approved = True
+                elif resume_phase == GamePhase.VOTING:
+                    gov_approved = self.election_phase(resume_phase)
+                else:
+                    self.checkpoint_phase(GamePhase.NOMINATION)
+                    gov_approved = self.election_phase()
+                resume_phase = None
+
+                if gov_approved:
                     self.game_state.election_tracker = 0
-                    if self.game_state.game_over:
+                    if self.game_state.check_hitler_chancellor_win():
+                        win_msg = "\nFascists win: Hitler Chancellor after 3 Fascist policies!"
+                        self.display_state_terminal(message=win_msg)
+                        self.game_state.log_event(None, win_msg)
+                        self.game_state.game_over = True
+                        self.game_state.winner = "Fascists"
                         break
-
-            if not self.game_state.check_game_over():
-                self.game_state.next_president()
-                self.display_state_terminal(message="\n--- Next Round ---")
-                self.game_state.game_logger.log_to_debug_file(
-                    "Game", "--- Next Round ---")
+                    self.checkpoint_phase(GamePhase.LEGISLATIVE)
+                    enacted_policy = self.legislative_session()
+                    if enacted_policy:
+                        self.executive_action()
+                else:
+                    self.game_state.reset_government()
+                    self.game_state.increment_election_tracker()
+                    if self.game_state.election_tracker >= 3:
+                        chaos_msg = "\nElection tracker maxed! Chaos policy enacted."
+                        self.display_state_terminal(message=chaos_msg)
+                        self.game_state.log_event(None, chaos_msg)
+                        self.game_state.enact_chaos_policy()
+                        self.game_state.election_tracker = 0
+                        if self.game_state.game_over:
+                            break
+
+                if not self.game_state.check_game_over():
+                    self.game_state.next_president()
+                    self.display_state_terminal(message="\n--- Next Round ---")
+                    self.game_state.game_logger.log_to_debug_file(
+                        "Game", "--- Next Round ---")
+        memory_telemetry.record_round(self, self.round_number)
         self.game_over_screen()
 
 
@@ -570,10 +721,14 @@ if __name__ == "__main__":
     parser.add_argument("--debug_llm", action="store_true",
                         help="Enable LLM debug output")
     parser.add_argument("--log_to_file", action="store_true",
-                        help="Enable logging detailed output to files in 'logs/' directory")
+                        help="Enable logging detailed output to files in --log_dir")
+    parser.add_argument("--log_dir", default="logs",
+                        help="Directory for --log_to_file output (default: logs)")
+    parser.add_argument("--results_db", metavar="PATH",
+                        help="Record the finished game in the SQLite results store at PATH")
     parser.add_argument("--player_models", nargs="+",
                         help="Player configurations as JSON strings. "
-                             "Format: PlayerName='{\"provider\": \"gemini\" or \"openrouter\", "
+                             "Format: PlayerName='{\"provider\": \"gemini\" or \"openrouter\" (or \"random\" for an offline scripted player), "
                              "\"model\": \"model_name\", \"api_key_env\": \"ENV_VAR_NAME\"}'. "
                              "Example: Player1='{\"provider\": \"openrouter\", "
                              "\"model\": \"openai/gpt-4o\", "
@@ -581,6 +736,13 @@ if __name__ == "__main__":
                              "Player2='{\"provider\": \"gemini\", "
                              "\"model\": \"gemini-2.0-flash\", "
                              "\"api_key_env\": \"GEMINI_API_KEY\"}'")
+    parser.add_argument("--checkpoint", metavar="PATH",
+                        help="Write an atomic checkpoint of the game state to PATH at the start of each round, "
+                             "after the election discussion and after each approved election")
+    parser.add_argument("--resume", metavar="CHECKPOINT",
+                        help="Resume a game from a checkpoint file written with --checkpoint")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Write a Chrome Trace Event timeline of the game to PATH (see tracing.py)")
     args = parser.parse_args()
 
     if not 5 <= args.num_players <= 10:
@@ -599,7 +761,13 @@ if __name__ == "__main__":
     if game_config.debug_llm_enabled:
         start_game_msg += " LLM debug output enabled."
     if game_config.log_to_file_enabled:
-        start_game_msg += " File logging enabled (logs/ directory)."
+        start_game_msg += f" File logging enabled ({game_config.log_dir}/ directory)."
+    if game_config.checkpoint_path:
+        start_game_msg += f" Checkpointing to {game_config.checkpoint_path}."
     game_runner.display_state_terminal(message=start_game_msg)
 
+    if args.trace:
+        tracing.enable()
     game_runner.run_game()
+    if args.trace:
+        tracing.write_trace(args.trace, tracing.take_events())
@@ -0,0 +1,463 @@
+"""Vectorized Monte Carlo simulator of the Secret Hitler rules.
+
+BatchSimulator keeps thousands of games of one player count as NumPy arrays
+and advances all of them by one round at a time. A round follows
+GameRunner.run_game and secret_hitler_engine.GameState as they are written,
+including the behaviour that differs from the board game:
+
+- the Chancellor's unplayed policy is removed from the game, not discarded;
+- a President who passes counts as two failed elections (both the
+  nomination phase and run_game call reset_government);
+- failed governments, not elected ones, become term limited;
+- executing Hitler does not end the game;
+- dead players keep their turn as President;
+- a legislative session that can only draw one or two cards cannot be
+  played (the runner raises or loops forever), so the game is counted as
+  stalled, as is a chaos policy with no card left to draw.
+
+The deck is stored as the number of Liberal and Fascist cards in the draw
+and discard piles. Random and team policies never see the card order, so
+drawing each card at random from those counts is equivalent to drawing from
+a shuffled deck. The one place where order matters is a Policy Peek with
+fewer than three cards left: the engine puts the peeked cards back on top of
+the reshuffled discard pile, while the simulator only merges the two piles.
+
+Run `python secret_hitler_simulator.py --games 100000` for the baseline
+table, and add `--cross-check 300` to compare against GameRunner games played
+by RandomPlayerInterface seats.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import random
+import sys
+
+import numpy as np
+
+from secret_hitler_engine import ROLE_DISTRIBUTION, CODE_BY_ROLE, Role
+
+IN_PROGRESS = 0
+LIBERAL_POLICIES = 1
+FASCIST_POLICIES = 2
+HITLER_CHANCELLOR = 3
+STALLED = 4
+OUTCOME_NAMES = {
+    LIBERAL_POLICIES: "liberal_policies",
+    FASCIST_POLICIES: "fascist_policies",
+    HITLER_CHANCELLOR: "hitler_chancellor",
+    STALLED: "stalled",
+}
+
+LIBERAL = CODE_BY_ROLE[Role.LIBERAL]
+FASCIST = CODE_BY_ROLE[Role.FASCIST]
+HITLER = CODE_BY_ROLE[Role.HITLER]
+
+# index pairs left after the President discards card 0, 1 or 2
+_REMAINING_AFTER_DISCARD = np.array([[1, 2], [0, 2], [0, 1]])
+
+
+def choose_uniform(rng, mask):
+    """Per row, a uniformly random column where `mask` is True, or -1."""
+    keys = rng.random(mask.shape)
+    keys[~mask] = -1.0
+    choice = keys.argmax(axis=1)
+    choice[~mask.any(axis=1)] = -1
+    return choice
+
+
+class RandomPolicy:
+    """Uniform over the allowed actions, like RandomPlayerInterface."""
+    name = "random"
+
+    def nominate(self, sim, rows, president, valid):
+        num_valid = valid.sum(axis=1)
+        passes = sim.rng.integers(0, num_valid + 1) == num_valid
+        nominee = choose_uniform(sim.rng, valid)
+        nominee[passes] = -1
+        return nominee
+
+    def vote(self, sim, rows, president, chancellor):
+        return sim.rng.random((len(rows), sim.num_players)) < 0.5
+
+    def discard(self, sim, rows, president, cards):
+        return sim.rng.integers(0, 3, len(rows))
+
+    def enact(self, sim, rows, chancellor, cards):
+        return sim.rng.integers(0, 2, len(rows))
+
+    def target(self, sim, rows, president, allowed):
+        return choose_uniform(sim.rng, allowed)
+
+
+class TeamPolicy(RandomPolicy):
+    """Greedy team play: every seat plays the policy cards for its own team,
+    the Fascist team nominates and votes for its own members, and liberals
+    vote YES with probability `liberal_yes`. Presidents never pass."""
+    name = "team"
+
+    def __init__(self, liberal_yes=2 / 3):
+        self.liberal_yes = liberal_yes
+
+    def nominate(self, sim, rows, president, valid):
+        president_fascist = sim.roles[rows, president] != LIBERAL
+        teammates = valid & (sim.roles[rows] != LIBERAL) & president_fascist[:, None]
+        prefer = np.where(teammates.any(axis=1)[:, None], teammates, valid)
+        return choose_uniform(sim.rng, prefer)
+
+    def vote(self, sim, rows, president, chancellor):
+        fascist_team = sim.roles[rows] != LIBERAL
+        fascist_government = (sim.roles[rows, president] != LIBERAL) | (
+            sim.roles[rows, chancellor] != LIBERAL)
+        liberal_votes = sim.rng.random((len(rows), sim.num_players)) < self.liberal_yes
+        return np.where(fascist_team, fascist_government[:, None], liberal_votes)
+
+    def discard(self, sim, rows, president, cards):
+        # a Liberal President throws away a Fascist card and vice versa
+        unwanted = np.where(sim.roles[rows, president] == LIBERAL, FASCIST, LIBERAL)
+        matches = cards == unwanted[:, None]
+        return np.where(matches.any(axis=1), choose_uniform(sim.rng, matches),
+                        sim.rng.integers(0, 3, len(rows)))
+
+    def enact(self, sim, rows, chancellor, cards):
+        wanted = np.where(sim.roles[rows, chancellor] == LIBERAL, LIBERAL, FASCIST)
+        return np.where(cards[:, 0] == wanted, 0,
+                        np.where(cards[:, 1] == wanted, 1, sim.rng.integers(0, 2, len(rows))))
+
+    def target(self, sim, rows, president, allowed):
+        president_fascist = sim.roles[rows, president] != LIBERAL
+        liberals = allowed & (sim.roles[rows] == LIBERAL) & president_fascist[:, None]
+        prefer = np.where(liberals.any(axis=1)[:, None], liberals, allowed)
+        return choose_uniform(sim.rng, prefer)
+
+
+POLICIES = {"random": RandomPolicy, "team": TeamPolicy}
+
+
+class BatchSimulator:
+    def __init__(self, num_players, num_games, policy=None, seed=None, max_rounds=200):
+        if num_players not in ROLE_DISTRIBUTION:
+            raise ValueError(f"Unsupported player count: {num_players}")
+        self.num_players = num_players
+        self.num_games = num_games
+        self.policy = policy or RandomPolicy()
+        self.rng = np.random.default_rng(seed)
+        self.max_rounds = max_rounds
+
+        roles = np.array([CODE_BY_ROLE[r] for r in ROLE_DISTRIBUTION[num_players]], dtype=np.int8)
+        self.roles = self.rng.permuted(np.tile(roles, (num_games, 1)), axis=1)
+        self.alive = np.ones((num_games, num_players), dtype=bool)
+        self.investigated = np.zeros((num_games, num_players), dtype=bool)
+
+        self.deck_lib = np.full(num_games, 6, dtype=np.int16)
+        self.deck_fasc = np.full(num_games, 11, dtype=np.int16)
+        self.discard_lib = np.zeros(num_games, dtype=np.int16)
+        self.discard_fasc = np.zeros(num_games, dtype=np.int16)
+
+        self.lib_policies = np.zeros(num_games, dtype=np.int8)
+        self.fasc_policies = np.zeros(num_games, dtype=np.int8)
+        self.election_tracker = np.zeros(num_games, dtype=np.int8)
+        self.failed_elections = np.zeros(num_games, dtype=np.int8)
+        self.president_index = np.zeros(num_games, dtype=np.int32)
+        self.gov_president = np.full(num_games, -1, dtype=np.int8)
+        self.gov_chancellor = np.full(num_games, -1, dtype=np.int8)
+        self.term_limit_president = np.full(num_games, -1, dtype=np.int8)
+        self.term_limit_chancellor = np.full(num_games, -1, dtype=np.int8)
+
+        self.outcome = np.zeros(num_games, dtype=np.int8)
+        self.rounds = np.zeros(num_games, dtype=np.int16)
+        self.chaos_policies = np.zeros(num_games, dtype=np.int8)
+        self.forced_fascist = np.zeros(num_games, dtype=np.int8)
+
+    def run(self):
+        for _ in range(self.max_rounds):
+            rows = np.flatnonzero(self.outcome == IN_PROGRESS)
+            if len(rows) == 0:
+                break
+            self._play_round(rows)
+        return self.outcome
+
+    def _play_round(self, rows):
+        n = self.num_players
+        seats = np.arange(n)
+        self.rounds[rows] += 1
+        president = self.president_index[rows] % n
+
+        valid = self.alive[rows] & (seats != president[:, None])
+        valid &= seats != self.term_limit_chancellor[rows, None]
+        if n >= 7:
+            valid &= seats != self.term_limit_president[rows, None]
+        nominee = self.policy.nominate(self, rows, president, valid)
+
+        passed = rows[nominee < 0]
+        self._reset_government(passed)
+
+        nominated = nominee >= 0
+        voting = rows[nominated]
+        voting_president = president[nominated]
+        chancellor = nominee[nominated]
+        self.gov_president[voting] = voting_president
+        self.gov_chancellor[voting] = chancellor
+        yes = self.policy.vote(self, voting, voting_president, chancellor) & self.alive[voting]
+        approved = yes.sum(axis=1) > self.alive[voting].sum(axis=1) / 2
+
+        elected = voting[approved]
+        self.election_tracker[elected] = 0
+        hitler_elected = (self.fasc_policies[elected] >= 3) & (
+            self.roles[elected, chancellor[approved]] == HITLER)
+        self.outcome[elected[hitler_elected]] = HITLER_CHANCELLOR
+        keep = ~hitler_elected
+        self._legislative_session(
+            elected[keep], voting_president[approved][keep], chancellor[approved][keep])
+
+        failed = np.concatenate([passed, voting[~approved]])
+        failed = failed[self.outcome[failed] == IN_PROGRESS]
+        self._reset_government(failed)
+        self._increment_election_tracker(failed)
+
+        self._check_game_over(rows)
+        self.president_index[rows[self.outcome[rows] == IN_PROGRESS]] += 1
+
+    def _check_game_over(self, rows):
+        rows = rows[self.outcome[rows] == IN_PROGRESS]
+        chancellor = self.gov_chancellor[rows]
+        hitler_chancellor = (chancellor >= 0) & (self.fasc_policies[rows] >= 3) & (
+            self.roles[rows, np.maximum(chancellor, 0)] == HITLER)
+        outcome = np.select(
+            [self.lib_policies[rows] >= 5, self.fasc_policies[rows] >= 6, hitler_chancellor],
+            [LIBERAL_POLICIES, FASCIST_POLICIES, HITLER_CHANCELLOR], IN_PROGRESS)
+        self.outcome[rows] = outcome
+
+    def _draw_card(self, rows):
+        """Draw one card per game in `rows`, reshuffling the discard pile into
+        an empty deck. Games with no card left are marked stalled (-1)."""
+        empty = rows[self.deck_lib[rows] + self.deck_fasc[rows] == 0]
+        self.deck_lib[empty] += self.discard_lib[empty]
+        self.deck_fasc[empty] += self.discard_fasc[empty]
+        self.discard_lib[empty] = 0
+        self.discard_fasc[empty] = 0
+
+        total = self.deck_lib[rows] + self.deck_fasc[rows]
+        cards = np.where(self.rng.random(len(rows)) * total < self.deck_fasc[rows], FASCIST, LIBERAL)
+        cards[total == 0] = -1
+        self.outcome[rows[total == 0]] = STALLED
+        self.deck_fasc[rows[cards == FASCIST]] -= 1
+        self.deck_lib[rows[cards == LIBERAL]] -= 1
+        return cards
+
+    def _enact(self, rows, cards):
+        np.add.at(self.lib_policies, rows[cards == LIBERAL], 1)
+        np.add.at(self.fasc_policies, rows[cards == FASCIST], 1)
+
+    def _enact_top_card(self, rows):
+        cards = self._draw_card(rows)
+        drawn = cards >= 0
+        self._enact(rows[drawn], cards[drawn])
+        self.chaos_policies[rows[drawn]] += 1
+        return rows[drawn]
+
+    def _reset_government(self, rows):
+        rows = rows[self.outcome[rows] == IN_PROGRESS]
+        has_government = rows[(self.gov_president[rows] >= 0) & (self.gov_chancellor[rows] >= 0)]
+        self.term_limit_president[has_government] = self.gov_president[has_government]
+        self.term_limit_chancellor[has_government] = self.gov_chancellor[has_government]
+        self.gov_president[rows] = -1
+        self.gov_chancellor[rows] = -1
+        self.failed_elections[rows] += 1
+        chaos = rows[self.failed_elections[rows] >= 3]
+        enacted = self._enact_top_card(chaos)
+        self.election_tracker[enacted] = 0
+        self.term_limit_president[enacted] = -1
+        self.term_limit_chancellor[enacted] = -1
+        self.failed_elections[enacted] = 0
+
+    def _increment_election_tracker(self, rows):
+        rows = rows[self.outcome[rows] == IN_PROGRESS]
+        self.election_tracker[rows] += 1
+        maxed = rows[self.election_tracker[rows] >= 3]
+        self._enact_top_card(maxed)
+        self.election_tracker[maxed] = 0
+
+    def _legislative_session(self, rows, president, chancellor):
+        available = (self.deck_lib[rows] + self.deck_fasc[rows]
+                     + self.discard_lib[rows] + self.discard_fasc[rows])
+        self.outcome[rows[(available > 0) & (available < 3)]] = STALLED
+        playable = available >= 3
+        rows, president, chancellor = rows[playable], president[playable], chancellor[playable]
+        if len(rows) == 0:
+            return
+
+        cards = np.stack([self._draw_card(rows) for _ in range(3)], axis=1)
+        self.forced_fascist[rows[(cards == FASCIST).all(axis=1)]] += 1
+        discard_index = self.policy.discard(self, rows, president, cards)
+        discarded = cards[np.arange(len(rows)), discard_index]
+        np.add.at(self.discard_lib, rows[discarded == LIBERAL], 1)
+        np.add.at(self.discard_fasc, rows[discarded == FASCIST], 1)
+
+        remaining = np.take_along_axis(cards, _REMAINING_AFTER_DISCARD[discard_index], axis=1)
+        enact_index = self.policy.enact(self, rows, chancellor, remaining)
+        self._enact(rows, remaining[np.arange(len(rows)), enact_index])
+        self._executive_action(rows, president)
+
+    def _executive_action(self, rows, president):
+        n = self.num_players
+        seats = np.arange(n)
+        fasc = self.fasc_policies[rows]
+        others_alive = self.alive[rows] & (seats != president[:, None])
+
+        investigate = fasc == 3
+        special_election = (fasc == 4) & (n >= 7)
+        policy_peek = (fasc == 5) & (n >= 9) & ~special_election
+        execution = (fasc >= 4) & (n <= 6 or n >= 9) & ~special_election & ~policy_peek
+
+        inv = np.flatnonzero(investigate)
+        target = self.policy.target(self, rows[inv], president[inv],
+                                    others_alive[inv] & ~self.investigated[rows[inv]])
+        self.investigated[rows[inv][target >= 0], target[target >= 0]] = True
+
+        # A peek that runs out of deck reshuffles the discard pile into it;
+        # special elections have no effect because get_president ignores them.
+        peek = rows[policy_peek]
+        short = peek[self.deck_lib[peek] + self.deck_fasc[peek] < 3]
+        self.deck_lib[short] += self.discard_lib[short]
+        self.deck_fasc[short] += self.discard_fasc[short]
+        self.discard_lib[short] = 0
+        self.discard_fasc[short] = 0
+
+        ex = np.flatnonzero(execution)
+        target = self.policy.target(self, rows[ex], president[ex], others_alive[ex])
+        self.alive[rows[ex][target >= 0], target[target >= 0]] = False
+
+    def summary(self):
+        finished = self.outcome != IN_PROGRESS
+        counts = {name: int((self.outcome == code).sum()) for code, name in OUTCOME_NAMES.items()}
+        games = self.num_games
+        liberal_wins = counts["liberal_policies"]
+        fascist_wins = counts["fascist_policies"] + counts["hitler_chancellor"]
+        return {
+            "players": self.num_players,
+            "policy": self.policy.name,
+            "games": games,
+            "liberal_win_rate": liberal_wins / games,
+            "fascist_win_rate": fascist_wins / games,
+            "stalled_rate": counts["stalled"] / games,
+            "unfinished": int((~finished).sum()),
+            "outcomes": counts,
+            "mean_rounds": float(self.rounds.mean()),
+            "mean_liberal_policies": float(self.lib_policies.mean()),
+            "mean_fascist_policies": float(self.fasc_policies.mean()),
+            "games_with_chaos_policy": float((self.chaos_policies > 0).mean()),
+            "games_with_forced_fascist_policy": float((self.forced_fascist > 0).mean()),
+        }
+
+
+def simulate(num_players, num_games, policy="random", seed=None):
+    sim = BatchSimulator(num_players, num_games, POLICIES[policy](), seed=seed)
+    sim.run()
+    return sim.summary()
+
+
+def play_engine_games(num_players, num_games, seed=0):
+    """Play games through GameRunner with RandomPlayerInterface seats and
+    return per-game (outcome, liberal policies, fascist policies)."""
+    from secret_hitler_game import GameConfig, GameRunner
+
+    class _Stalled(Exception):
+        pass
+
+    class _CrossCheckRunner(GameRunner):
+        def display_state_terminal(self, *args, **kwargs):
+            pass
+
+        def legislative_session(self):
+            available = len(self.game_state.deck_codes) + len(self.game_state.discard_codes)
+            if 0 < available < 3:
+                raise _Stalled()
+            return super().legislative_session()
+
+    player_models = [f'Player{i+1}={{"provider": "random"}}' for i in range(num_players)]
+    config = GameConfig(argparse.Namespace(
+        num_players=num_players, slowdown=0, press_enter=False, debug_llm=False,
+        log_to_file=False, log_dir="logs", results_db=None, player_models=player_models, checkpoint=None,
+        resume=None))
+    results = []
+    for game_index in range(num_games):
+        random.seed(seed * 1_000_003 + game_index)
+        runner = _CrossCheckRunner(config)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                runner.run_game()
+        except (_Stalled, IndexError):
+            results.append((STALLED, runner.game_state.lib_policies, runner.game_state.fasc_policies))
+            continue
+        state = runner.game_state
+        if state.winner == Role.LIBERAL:
+            outcome = LIBERAL_POLICIES
+        elif state.winner == Role.FASCIST and state.fasc_policies >= 6:
+            outcome = FASCIST_POLICIES
+        else:
+            outcome = HITLER_CHANCELLOR
+        results.append((outcome, state.lib_policies, state.fasc_policies))
+    return results
+
+
+def cross_check(num_players, engine_games, sim_games=200000, seed=0, z_limit=4.0):
+    """Compare outcome rates of the simulator and the engine under random play.
+
+    Returns (ok, rows) where each row is (metric, engine, simulator, z)."""
+    engine = play_engine_games(num_players, engine_games, seed)
+    sim = BatchSimulator(num_players, sim_games, RandomPolicy(), seed=seed)
+    sim.run()
+
+    rows = []
+    for code, name in OUTCOME_NAMES.items():
+        p_engine = sum(outcome == code for outcome, _, _ in engine) / engine_games
+        p_sim = float((sim.outcome == code).mean())
+        se = math.sqrt(max(p_sim * (1 - p_sim), 1e-9) / engine_games)
+        rows.append((name, p_engine, p_sim, (p_engine - p_sim) / se))
+    for index, name, values in ((1, "mean_liberal_policies", sim.lib_policies),
+                                (2, "mean_fascist_policies", sim.fasc_policies)):
+        m_engine = sum(r[index] for r in engine) / engine_games
+        se = max(float(values.std()), 1e-9) / math.sqrt(engine_games)
+        rows.append((name, m_engine, float(values.mean()), (m_engine - float(values.mean())) / se))
+    return all(abs(z) <= z_limit for _, _, _, z in rows), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Vectorized Monte Carlo baselines for Secret Hitler.")
+    parser.add_argument("--games", type=int, default=100000,
+                        help="Simulated games per player count")
+    parser.add_argument("--players", type=int, nargs="+", default=list(range(5, 11)))
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the baseline table as JSON to this path")
+    parser.add_argument("--cross-check", type=int, default=0, metavar="GAMES",
+                        help="Also play GAMES engine games per player count and compare")
+    args = parser.parse_args()
+
+    table = [simulate(n, args.games, args.policy, seed=args.seed + n) for n in args.players]
+    print(f"{'players':>7} {'liberal':>8} {'fascist':>8} {'stalled':>8} {'rounds':>7} "
+          f"{'chaos':>7} {'forced F':>8}")
+    for row in table:
+        print(f"{row['players']:>7} {row['liberal_win_rate']:>8.3f} {row['fascist_win_rate']:>8.3f} "
+              f"{row['stalled_rate']:>8.3f} {row['mean_rounds']:>7.2f} "
+              f"{row['games_with_chaos_policy']:>7.3f} {row['games_with_forced_fascist_policy']:>8.3f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"policy": args.policy, "seed": args.seed, "baselines": table}, f, indent=2)
+
+    failed = False
+    for n in args.players if args.cross_check else []:
+        ok, rows = cross_check(n, args.cross_check, seed=args.seed + n)
+        failed |= not ok
+        print(f"\nCross-check, {n} players, {args.cross_check} engine games: {'OK' if ok else 'MISMATCH'}")
+        for name, engine_value, sim_value, z in rows:
+            print(f"  {name:<24} engine={engine_value:.3f} sim={sim_value:.3f} z={z:+.2f}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
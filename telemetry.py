@@ -0,0 +1,198 @@
+"""Per-call LLM telemetry and latency histograms.
+
+Every LLM call appends a record to its player's call_records:
+
+    provider, model, phase, attempt     which call it was
+    queue_wait                          seconds waiting for a concurrency slot
+                                        (async_scheduler.py only, else 0)
+    ttft                                seconds to the first streamed token
+                                        ("stream": true in the player config,
+                                        else None)
+    latency                             seconds for the whole call
+    prompt_tokens, completion_tokens, reasoning_tokens, cached_tokens
+    parse_status                        ok, invalid_action, empty or error
+    defaulted                           whether the player fell back to a
+                                        default action after this call
+
+and feeds it to the process-wide TELEMETRY, whose histograms keep every
+latency to within 1% so p50/p95/p99 are available per model and phase at
+any time. Games print a summary of their own calls at the end, and the
+results store merges the histograms of every game it records.
+"""
+import math
+from collections import Counter
+
+TIMINGS = ("latency", "ttft", "queue_wait")
+
+
+class Histogram:
+    """Log-bucketed histogram in the spirit of HdrHistogram: bucket i holds
+    values within a factor (1 + precision) of each other, so any percentile
+    is accurate to `precision` relative error in a few hundred buckets."""
+
+    def __init__(self, precision=0.01, lowest=1e-4):
+        self.precision = precision
+        self.lowest = lowest
+        self._log_base = math.log1p(precision)
+        self.counts = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value, count=1):
+        index = 0 if value < self.lowest else int(math.log(value / self.lowest) / self._log_base) + 1
+        self.counts[index] += count
+        self.count += count
+        self.total += value * count
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        if (other.precision, other.lowest) != (self.precision, self.lowest):
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.counts.update(other.counts)
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def _value(self, index):
+        # Geometric middle of the bucket
+        if index == 0:
+            return self.lowest / 2
+        return self.lowest * math.exp((index - 0.5) * self._log_base)
+
+    def percentile(self, q):
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._value(index), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def to_dict(self):
+        return {"precision": self.precision, "lowest": self.lowest, "count": self.count,
+                "total": self.total, "max": self.max,
+                "counts": {str(index): count for index, count in self.counts.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["precision"], data["lowest"])
+        histogram.counts = Counter({int(index): count for index, count in data["counts"].items()})
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.max = data["max"]
+        return histogram
+
+
+class CallTelemetry:
+    """Histograms of call timings and counts of outcomes and tokens, keyed
+    by ("provider/model", phase)."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.outcomes = Counter()
+        self.tokens = Counter()
+        self.retries = Counter()
+        self.default_actions = Counter()
+
+    def histogram(self, model, phase, timing):
+        key = (model, phase, timing)
+        if key not in self.histograms:
+            self.histograms[key] = Histogram()
+        return self.histograms[key]
+
+    def record(self, call):
+        model = f"{call['provider']}/{call['model']}"
+        for timing in TIMINGS:
+            if call.get(timing) is not None:
+                self.histogram(model, call["phase"], timing).record(call[timing])
+        self.outcomes[(model, call["phase"], call["parse_status"])] += 1
+        for field in ("prompt_tokens", "completion_tokens", "reasoning_tokens", "cached_tokens"):
+            self.tokens[(model, field)] += call.get(field) or 0
+        if (call.get("attempt") or 1) > 1:
+            self.retries[model] += 1
+        if call.get("defaulted"):
+            self.default_actions[model] += 1
+
+    def merge(self, other):
+        for key, histogram in other.histograms.items():
+            self.histogram(*key).merge(histogram)
+        self.outcomes.update(other.outcomes)
+        self.tokens.update(other.tokens)
+        self.retries.update(other.retries)
+        self.default_actions.update(other.default_actions)
+
+    def to_dict(self):
+        return {"histograms": [[*key, histogram.to_dict()] for key, histogram in self.histograms.items()],
+                "outcomes": [[*key, count] for key, count in self.outcomes.items()],
+                "tokens": [[*key, count] for key, count in self.tokens.items()],
+                "retries": dict(self.retries), "default_actions": dict(self.default_actions)}
+
+    @classmethod
+    def from_dict(cls, data):
+        telemetry = cls()
+        for model, phase, timing, histogram in data["histograms"]:
+            telemetry.histograms[(model, phase, timing)] = Histogram.from_dict(histogram)
+        telemetry.outcomes.update({(model, phase, status): count for model, phase, status, count in data["outcomes"]})
+        telemetry.tokens.update({(model, field): count for model, field, count in data["tokens"]})
+        telemetry.retries.update(data["retries"])
+        telemetry.default_actions.update(data["default_actions"])
+        return telemetry
+
+    @classmethod
+    def from_calls(cls, calls):
+        telemetry = cls()
+        for call in calls:
+            telemetry.record(call)
+        return telemetry
+
+    def summary(self):
+        """One row per model and phase, plus an "all" phase per model."""
+        rows = {}
+        for (model, phase, timing), histogram in self.histograms.items():
+            for key in ((model, phase), (model, "all")):
+                merged = rows.setdefault(key, {}).setdefault(timing, Histogram())
+                merged.merge(histogram)
+        calls = Counter()
+        failures = Counter()
+        for (model, phase, status), count in self.outcomes.items():
+            for key in ((model, phase), (model, "all")):
+                calls[key] += count
+                failures[key] += count if status != "ok" else 0
+        summary = []
+        for (model, phase) in sorted(calls):
+            timings = rows.get((model, phase), {})
+            row = {"model": model, "phase": phase, "calls": calls[(model, phase)],
+                   "failure_rate": failures[(model, phase)] / calls[(model, phase)]}
+            for timing in TIMINGS:
+                histogram = timings.get(timing)
+                for q in (50, 95, 99):
+                    row[f"{timing}_p{q}"] = histogram.percentile(q) if histogram else None
+            summary.append(row)
+        return summary
+
+    def print_summary(self, title="LLM CALLS"):
+        rows = self.summary()
+        if not rows:
+            return
+        print(f"\n======== {title} ========")
+        print(f"{'model':<36} {'phase':<24} {'calls':>6} {'fail':>5} {'p50':>7} {'p95':>7} {'p99':>7}"
+              f" {'ttft p95':>9} {'queue p95':>10}")
+        for row in rows:
+            print(f"{row['model']:<36} {row['phase']:<24} {row['calls']:>6} {row['failure_rate']:>5.0%}"
+                  f" {_seconds(row['latency_p50'])} {_seconds(row['latency_p95'])} {_seconds(row['latency_p99'])}"
+                  f"  {_seconds(row['ttft_p95'])}   {_seconds(row['queue_wait_p95'])}")
+
+
+def _seconds(value):
+    return "      -" if value is None else f"{value:>6.2f}s"
+
+
+# Every call made in this process
+TELEMETRY = CallTelemetry()
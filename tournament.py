@@ -0,0 +1,621 @@
+"""Run many games in parallel from a matchup spec.
+
+    python tournament.py matchups.json --output tournaments/run1 --retries 2
+
+The spec lists matchups, each played for a number of games:
+
+    {
+      "seed": 0,
+      "matchups": [
+        {"name": "bayes-vs-random", "num_players": 5, "games": 50,
+         "player_models": {"Player1": {"provider": "bayes"},
+                           "Player2": {"provider": "random"}, ...}}
+      ]
+    }
+
+player_models takes the same per-seat configs as --player_models.
+
+A matchup with "format": "duplicate" plays each deal once per seat rotation:
+
+    {"name": "dup", "format": "duplicate", "num_players": 5, "deals": 20,
+     "models": [{"provider": "bayes"}, {"provider": "random"}, ...]}
+
+takes one model config per seat, and every deal (a seed, which fixes the
+role layout and deck order) is replayed num_players times with the models
+shifted one seat each time, so every model plays every seat under the same
+card luck. Scripted players get a per-seat seed so they leave the shared RNG
+to the engine. The summary then scores each model against the average
+result of its deals, which cancels most of the luck of the deal.
+
+With --sprt, games are interleaved across matchups and every matchup
+between exactly two distinct models runs a sequential test (see
+SequentialTest); once a matchup is decided its remaining games are dropped,
+and a report at the end shows the games saved against playing them all.
+
+With --trace, each game also writes a Chrome Trace Event timeline to
+trace.json in its directory, and <output>/trace.json merges them with every
+game on its own track (see tracing.py). With --profile, every game is
+profiled and <output>/profile.* aggregate the profiles (see profiling.py).
+With --memory, games record their memory use per round and workers warn
+about memory a game leaves behind (see memory_telemetry.py). --metrics_port
+serves live metrics and a status page while the tournament runs (see
+metrics_server.py).
+
+Every game runs in its own directory under <output>/games/ with its own seed, file logs
+and console.log, and one line per finished or abandoned game is appended to
+<output>/results.jsonl. Rerunning with the same output directory skips the
+games that already finished.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import signal
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from cost_governor import CostGovernor, game_usage, load_prices
+from secret_hitler_game import GameConfig, GameRunner
+import memory_telemetry
+from metrics_server import STATUS_INTERVAL, MetricsServer, StatusWriter, TournamentMonitor
+import profiling
+import tracing
+
+
+def load_spec(path):
+    with open(path) as f:
+        spec = json.load(f)
+    if not spec.get("matchups"):
+        raise ValueError(f"Matchup spec {path} has no matchups")
+    return spec
+
+
+def expand_games(spec):
+    """One game dict per game in the spec, each with a stable id and seed."""
+    base_seed = spec.get("seed", 0)
+    games = []
+    for matchup_index, matchup in enumerate(spec["matchups"]):
+        name = matchup.get("name", f"matchup{matchup_index + 1}")
+        if matchup.get("format") == "duplicate":
+            games.extend(_duplicate_games(name, matchup, base_seed * 1_000_003 + matchup_index * 100_003))
+            continue
+        for game_index in range(matchup["games"]):
+            games.append({
+                "game_id": f"{name}-{game_index:05d}",
+                "matchup": name,
+                "seed": base_seed * 1_000_003 + matchup_index * 100_003 + game_index,
+                "num_players": matchup["num_players"],
+                "player_models": matchup["player_models"],
+            })
+    return games
+
+
+def _duplicate_games(name, matchup, first_seed):
+    num_players = matchup["num_players"]
+    models = matchup["models"]
+    if len(models) != num_players:
+        raise ValueError(f"Duplicate matchup {name} needs one model per seat: "
+                         f"{len(models)} models for {num_players} players")
+    games = []
+    for deal in range(matchup["deals"]):
+        seed = first_seed + deal
+        for rotation in range(num_players):
+            games.append({
+                "game_id": f"{name}-{deal:05d}-r{rotation}",
+                "matchup": name,
+                "seed": seed,
+                "deal": deal,
+                "rotation": rotation,
+                "num_players": num_players,
+                "player_models": {
+                    f"Player{seat + 1}": {"seed": seed * 100 + seat, **models[(seat + rotation) % num_players]}
+                    for seat in range(num_players)},
+            })
+    return games
+
+
+def _init_worker():
+    # Workers ignore Ctrl-C; the parent shuts the pool down.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class _GameTimeout(BaseException):
+    """Raised by the alarm. Not an Exception, so the retry loops in player
+    code that catch Exception cannot swallow it; play_game turns it into a
+    TimeoutError."""
+
+
+def _on_timeout(signum, frame):
+    raise _GameTimeout()
+
+
+def game_config(game, log_dir, log_to_file=True, results_db=None):
+    return GameConfig(argparse.Namespace(
+        num_players=game["num_players"], slowdown=0, press_enter=False, debug_llm=False,
+        log_to_file=log_to_file, log_dir=log_dir, results_db=results_db,
+        player_models=[f"{name}={json.dumps(config)}"
+                       for name, config in game["player_models"].items()],
+        checkpoint=None, resume=None))
+
+
+def game_result(game, game_state, seconds, players=None):
+    winner = game_state.get_winning_team()
+    return {
+        "game_id": game["game_id"],
+        "matchup": game["matchup"],
+        "seed": game["seed"],
+        "status": "ok",
+        "winner": winner.name.capitalize() if winner else None,
+        "win_reason": game_state.get_win_reason(),
+        "lib_policies": game_state.lib_policies,
+        "fasc_policies": game_state.fasc_policies,
+        "elections": len(game_state.election_history),
+        "roles": {name: role.value for name, role in game_state.roles.items()},
+        "alive": [name for name in game_state.players
+                  if game_state.alive_mask >> game_state.player_ids[name] & 1],
+        "player_models": game["player_models"],
+        "seconds": round(seconds, 3),
+        **{key: game[key] for key in ("deal", "rotation") if key in game},
+        "usage": game_usage(players or {}),
+    }
+
+
+def play_game(game, output_dir, timeout=0, results_db=None, trace=False, profile=None, memory_leak_kb=None,
+              status_interval=None):
+    """Play one game in a worker process and return its result dict.
+
+    LLM clients are pooled per process (llm_interface.get_llm_client), so a
+    warm worker reuses its connections from game to game."""
+    game_dir = os.path.join(output_dir, "games", game["game_id"])
+    os.makedirs(game_dir, exist_ok=True)
+    config = game_config(game, game_dir, results_db=results_db)
+
+    random.seed(game["seed"])
+    if trace:
+        tracing.enable()
+    profiler = profiling.GameProfiler() if profile == "cpu" else contextlib.nullcontext()
+    if profile:
+        profiling.count_hot_spots()
+        # Drop the counts of a game that failed before saving them
+        profiling.take_call_counts()
+    if memory_leak_kb is not None:
+        memory_telemetry.enable(memory_leak_kb)
+        memory_telemetry.begin_game(os.path.join(game_dir, "memory.jsonl"))
+    status_writer = None
+    if status_interval:
+        status_writer = StatusWriter(os.path.join(game_dir, "status.json"), status_interval)
+        status_writer.start()
+    start = time.perf_counter()
+    runner = None
+    if timeout:
+        signal.signal(signal.SIGALRM, _on_timeout)
+        signal.alarm(timeout)
+    try:
+        with open(os.path.join(game_dir, "console.log"), "w") as console, \
+                contextlib.redirect_stdout(console), profiler:
+            runner = GameRunner(config, game_key=game["game_id"])
+            if status_writer:
+                status_writer.runner = runner
+            runner.run_game()
+    except _GameTimeout:
+        raise TimeoutError("Game timed out") from None
+    except SystemExit as e:
+        # GameRunner exits on a missing API key; keep that inside the worker
+        raise RuntimeError(str(e))
+    finally:
+        if timeout:
+            signal.alarm(0)
+        if status_writer:
+            status_writer.stop()
+        if runner:
+            runner.logger.close_log_files()
+        if trace:
+            tracing.write_trace(os.path.join(game_dir, "trace.json"), tracing.take_events())
+        if profile:
+            profiling.save_call_counts(game_dir)
+        if profile == "cpu":
+            profiler.save(game_dir)
+
+    result = game_result(game, runner.game_state, time.perf_counter() - start, runner.player_llm_configs)
+    # Anything the finished game still holds once its runner is gone is a leak
+    runner = None
+    memory_telemetry.end_game(game["game_id"])
+    return result
+
+
+def load_results(results_path):
+    """The last recorded result of each game in a results.jsonl file."""
+    if not os.path.exists(results_path):
+        return []
+    with open(results_path) as f:
+        return list({result["game_id"]: result for result in map(json.loads, f)}.values())
+
+
+def run_tournament(games, output_dir, workers, retries=1, timeout=0, results_db=None, stopper=None,
+                   governor=None, trace=False, profile=None, memory_leak_kb=None, monitor=None):
+    """Play `games` on a process pool of `workers`, retrying each failed game
+    up to `retries` times, and return the results of the games played.
+
+    With a SequentialStopper, games are interleaved across matchups and a
+    matchup's remaining games are dropped once its test is decided. With a
+    CostGovernor, no game is started that would take the spend past its
+    hard budget. With `trace`, the games' timelines are merged into
+    <output_dir>/trace.json, and with `profile` ("cpu" or "calls", see
+    profiling.py) their profiles into <output_dir>/profile.*. With
+    `memory_leak_kb`, games record memory per round (see memory_telemetry.py).
+    A TournamentMonitor is told of every game started and finished."""
+    os.makedirs(output_dir, exist_ok=True)
+    results_path = os.path.join(output_dir, "results.jsonl")
+    game_ids = {game["game_id"] for game in games}
+    done = [result for result in load_results(results_path)
+            if result["status"] == "ok" and result["game_id"] in game_ids]
+    done_ids = {result["game_id"] for result in done}
+    for result in done:
+        if stopper:
+            stopper.record(result)
+        if governor:
+            governor.record(result)
+    if stopper:
+        games = interleave_matchups(games)
+    queue = deque((game, 1) for game in games if game["game_id"] not in done_ids)
+    if done_ids:
+        print(f"Skipping {len(done_ids)} games already in {results_path}")
+
+    total = len(queue)
+    results = []
+    running = {}
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    try:
+        with open(results_path, "a") as results_file:
+            while queue or running:
+                while queue and len(running) < workers:
+                    game, attempt = queue.popleft()
+                    if stopper and not stopper.should_play(game):
+                        total -= 1
+                        continue
+                    if governor and not governor.may_start(game, [game for game, _ in running.values()]):
+                        queue.appendleft((game, attempt))
+                        break
+                    running[pool.submit(play_game, game, output_dir, timeout, results_db, trace,
+                                         profile, memory_leak_kb,
+                                         STATUS_INTERVAL if monitor else None)] = (game, attempt)
+                    if monitor:
+                        monitor.game_started(game)
+                if not running:
+                    if queue:
+                        print(f"Hard budget of ${governor.hard_budget:.2f} reached; "
+                              f"not starting the remaining {len(queue)} games")
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in finished:
+                    game, attempt = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        broken |= isinstance(e, BrokenProcessPool)
+                        if attempt <= retries:
+                            print(f"{game['game_id']} failed (attempt {attempt}): {e!r}; retrying")
+                            queue.append((game, attempt + 1))
+                            if monitor:
+                                monitor.game_finished(game, None)
+                            continue
+                        result = {"game_id": game["game_id"], "matchup": game["matchup"],
+                                  "seed": game["seed"], "status": "failed", "error": repr(e)}
+                    if monitor:
+                        monitor.game_finished(game, result)
+                    result["attempts"] = attempt
+                    results.append(result)
+                    results_file.write(json.dumps(result) + "\n")
+                    results_file.flush()
+                    decided = stopper.record(result) if stopper else None
+                    spend = ""
+                    if governor:
+                        governor.record(result)
+                        remaining = [game for game, _ in queue] + [game for game, _ in running.values()]
+                        spend = f", ${governor.spent:.2f} spent, ${governor.projected_total(remaining):.2f} projected"
+                    if decided:
+                        print(f"{result['matchup']} decided: {decided}; dropping its remaining games")
+
+                    elapsed = time.perf_counter() - start
+                    outcome = result.get("winner") or result["status"]
+                    print(f"[{len(results)}/{total}] {result['game_id']}: {outcome} "
+                          f"({elapsed:.1f}s elapsed, {len(results) / elapsed * 3600:.0f} games/hour{spend})")
+
+                if broken:
+                    # A dead worker breaks the whole pool; every game still
+                    # running on it fails with BrokenProcessPool as well.
+                    print("Worker process died; restarting the pool")
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    for future, (game, attempt) in running.items():
+                        queue.appendleft((game, attempt))
+                    running.clear()
+                    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+    if governor and (governor.model_tokens or governor.hard_budget is not None):
+        governor.print_report([game for game, _ in queue])
+    if trace:
+        trace_path = os.path.join(output_dir, "trace.json")
+        tracing.merge_traces([os.path.join(output_dir, "games", game["game_id"], "trace.json")
+                              for game in games], trace_path)
+        print(f"Trace written to {trace_path}")
+    if profile:
+        profiling.merge_profiles([os.path.join(output_dir, "games", result["game_id"])
+                                  for result in results if result["status"] == "ok"], output_dir)
+    return results
+
+
+def _model_label(config):
+    return f"{config['provider']}/{config.get('model', config['provider'])}"
+
+
+def duplicate_scores(results):
+    """Per duplicate matchup and model: (seats, win rate, duplicate score,
+    standard error of the score). The score is the model's win rate in each
+    deal minus the win rate of all seats in that deal, averaged over deals
+    whose rotations all finished."""
+    deals = {}
+    for result in results:
+        if "deal" in result and result["status"] == "ok" and result["winner"]:
+            deals.setdefault((result["matchup"], result["deal"]), []).append(result)
+
+    per_deal = {}
+    for (matchup, _), games in deals.items():
+        if len(games) != len(games[0]["player_models"]):
+            continue
+        wins, seats = Counter(), Counter()
+        for game in games:
+            for player, config in game["player_models"].items():
+                model = _model_label(config)
+                seats[model] += 1
+                wins[model] += (game["roles"][player] == "Liberal") == (game["winner"] == "Liberal")
+        deal_rate = sum(wins.values()) / sum(seats.values())
+        for model in seats:
+            per_deal.setdefault(matchup, {}).setdefault(model, []).append(
+                (wins[model], seats[model], wins[model] / seats[model] - deal_rate))
+
+    scores = {}
+    for matchup, models in per_deal.items():
+        for model, rows in models.items():
+            wins, seats, deltas = zip(*rows)
+            mean = sum(deltas) / len(deltas)
+            variance = sum((delta - mean) ** 2 for delta in deltas) / max(len(deltas) - 1, 1)
+            scores.setdefault(matchup, {})[model] = (
+                sum(seats), sum(wins) / sum(seats), mean, (variance / len(deltas)) ** 0.5)
+    return scores
+
+
+def interleave_matchups(games):
+    """Round-robin the games of each matchup, keeping a duplicate deal's
+    rotations together."""
+    units = {}
+    for game in games:
+        units.setdefault(game["matchup"], {}).setdefault(game.get("deal", game["game_id"]), []).append(game)
+    queues = [deque(matchup_units.values()) for matchup_units in units.values()]
+    interleaved = []
+    while queues:
+        for unit_queue in queues:
+            interleaved.extend(unit_queue.popleft())
+        queues = [unit_queue for unit_queue in queues if unit_queue]
+    return interleaved
+
+
+class SequentialTest:
+    """Sobel-Wald three-way sequential test on p, model A's expected
+    head-to-head score against model B.
+
+    Two SPRTs run side by side: p = 0.5 against p = 0.5 + delta, and
+    p = 0.5 against p = 0.5 - delta. The test decides "A" or "B" when either
+    finds that edge, and "even" once both accept p = 0.5. alpha is the chance
+    of declaring a model stronger when the two are even, and beta the chance
+    of missing an edge of delta. Scores are treated as normal with the
+    variance observed so far (a generalized SPRT), so nothing is decided
+    before min_observations."""
+
+    def __init__(self, alpha=0.05, beta=0.05, delta=0.1, min_observations=20):
+        if not 0 < delta < 0.5:
+            raise ValueError(f"delta must be between 0 and 0.5, got {delta}")
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+        self.delta = delta
+        self.min_observations = min_observations
+        self.observations = 0
+        self.total_score = 0.0
+        self.total_square = 0.0
+        self.even_a = False
+        self.even_b = False
+        self.decision = None
+
+    def update(self, score):
+        if self.decision is not None:
+            return
+        self.observations += 1
+        self.total_score += score
+        self.total_square += score * score
+        n = self.observations
+        if n < self.min_observations:
+            return
+        variance = max((self.total_square - self.total_score ** 2 / n) / (n - 1), 1e-4)
+        llr_a = self.delta / variance * (self.total_score - n * (0.5 + self.delta / 2))
+        llr_b = self.delta / variance * (n * (0.5 - self.delta / 2) - self.total_score)
+        # An SPRT that has accepted p = 0.5 stays stopped
+        if not self.even_a:
+            if llr_a >= self.upper:
+                self.decision = "A"
+            self.even_a = llr_a <= self.lower
+        if not self.even_b and self.decision is None:
+            if llr_b >= self.upper:
+                self.decision = "B"
+            self.even_b = llr_b <= self.lower
+        if self.decision is None and self.even_a and self.even_b:
+            self.decision = "even"
+
+
+class SequentialStopper:
+    """Runs a SequentialTest per matchup between its two models, and stops
+    scheduling a matchup once its test is decided.
+
+    Each game (or, in a duplicate matchup, each complete deal) is one
+    observation: the average over every pair of an A seat and a B seat of 1
+    if the A seat won and the B seat lost, 0 for the reverse and 0.5 if both
+    won or both lost. Random roles make that 0.5 in expectation for equal
+    models whatever the seat counts. Matchups with other than two distinct
+    models always play every game."""
+
+    def __init__(self, games, alpha=0.05, beta=0.05, delta=0.1):
+        self.planned = Counter(game["matchup"] for game in games)
+        self.played = Counter()
+        self.tests = {}
+        self.pairs = {}
+        models = {}
+        for game in games:
+            models.setdefault(game["matchup"], set()).update(
+                map(_model_label, game["player_models"].values()))
+        for matchup, labels in models.items():
+            if len(labels) == 2:
+                self.pairs[matchup] = sorted(labels)
+                self.tests[matchup] = SequentialTest(alpha, beta, delta)
+        self.started_deals = set()
+        self._deals = {}
+
+    def should_play(self, game):
+        test = self.tests.get(game["matchup"])
+        deal = (game["matchup"], game.get("deal"))
+        if test is None or test.decision is None or deal in self.started_deals:
+            if "deal" in game:
+                self.started_deals.add(deal)
+            return True
+        return False
+
+    def record(self, result):
+        """Count a finished game; returns the decision if it decided its matchup."""
+        matchup = result["matchup"]
+        self.played[matchup] += 1
+        test = self.tests.get(matchup)
+        if test is None or test.decision is not None or result["status"] != "ok" or not result["winner"]:
+            return None
+        games = [result]
+        if "deal" in result:
+            games = self._deals.setdefault((matchup, result["deal"]), [])
+            games.append(result)
+            if len(games) < len(result["player_models"]):
+                return None
+        won, seats = Counter(), Counter()
+        for game in games:
+            for player, config in game["player_models"].items():
+                model = _model_label(config)
+                seats[model] += 1
+                won[model] += (game["roles"][player] == "Liberal") == (game["winner"] == "Liberal")
+        model_a, model_b = self.pairs[matchup]
+        if not seats[model_a] or not seats[model_b]:
+            return None
+        test.update(0.5 + (won[model_a] / seats[model_a] - won[model_b] / seats[model_b]) / 2)
+        if test.decision is None:
+            return None
+        return self.describe(matchup)
+
+    def describe(self, matchup):
+        test = self.tests[matchup]
+        model_a, model_b = self.pairs[matchup]
+        evidence = (f"{model_a} scored {test.total_score / max(test.observations, 1):.3f} "
+                    f"over {test.observations} observations")
+        if test.decision is None:
+            return f"undecided ({evidence})"
+        if test.decision == "even":
+            return f"{model_a} and {model_b} even ({evidence})"
+        stronger, weaker = (model_a, model_b) if test.decision == "A" else (model_b, model_a)
+        return f"{stronger} stronger than {weaker} ({evidence})"
+
+    def print_report(self):
+        print("\n======== SEQUENTIAL STOPPING ========")
+        for matchup, planned in self.planned.items():
+            played = self.played[matchup]
+            outcome = self.describe(matchup) if matchup in self.tests else "no test (needs exactly two models)"
+            print(f"{matchup:<28} played {played:>5} of {planned:>5}  {outcome}")
+        planned, played = sum(self.planned.values()), sum(self.played.values())
+        print(f"Played {played} of {planned} games; saved {planned - played} "
+              f"({(planned - played) / planned:.0%}) against the fixed-N design")
+
+
+def print_summary(results):
+    by_matchup = {}
+    for result in results:
+        by_matchup.setdefault(result["matchup"], Counter())[result.get("winner") or result["status"]] += 1
+    print("\n======== TOURNAMENT RESULTS ========")
+    for matchup, counts in by_matchup.items():
+        played = counts["Liberal"] + counts["Fascist"]
+        liberal_rate = counts["Liberal"] / played if played else 0.0
+        print(f"{matchup:<28} liberal wins {counts['Liberal']:>5}  fascist wins {counts['Fascist']:>5}"
+              f"  failed {counts['failed']:>3}  liberal win rate {liberal_rate:.3f}")
+    for matchup, models in duplicate_scores(results).items():
+        print(f"\n{matchup} (duplicate): score is win rate relative to the average seat of the same deals")
+        for model, (seats, win_rate, score, stderr) in sorted(models.items(), key=lambda item: -item[1][2]):
+            naive_stderr = (win_rate * (1 - win_rate) / seats) ** 0.5
+            print(f"  {model:<40} seats {seats:>5}  win rate {win_rate:.3f} (+/- {naive_stderr:.3f})"
+                  f"  score {score:+.3f} (+/- {stderr:.3f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Play a tournament of Secret Hitler games on a process pool.")
+    parser.add_argument("spec", help="JSON matchup spec")
+    parser.add_argument("--output", default="tournaments/latest",
+                        help="Directory for results.jsonl and per-game logs")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: min(cores, --max_concurrent_calls))")
+    parser.add_argument("--max_concurrent_calls", type=int, default=8,
+                        help="API concurrency budget; each game makes one call at a time")
+    parser.add_argument("--retries", type=int, default=1,
+                        help="Times a failed or timed-out game is replayed")
+    parser.add_argument("--timeout", type=int, default=0,
+                        help="Seconds before a game is abandoned (0 for no limit)")
+    parser.add_argument("--results_db", default=None,
+                        help="Also record every game in this SQLite results store")
+    parser.add_argument("--prices", default=None,
+                        help="JSON price table overriding the built-in one (see cost_governor.py)")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="Hard budget in dollars: no new games once it would be exceeded")
+    parser.add_argument("--soft_budget", type=float, default=None,
+                        help="Warn once the spend passes this many dollars")
+    parser.add_argument("--trace", action="store_true",
+                        help="Write a Chrome Trace Event timeline of every game to <output>/trace.json")
+    parser.add_argument("--profile", nargs="?", const="cpu", choices=profiling.PROFILE_MODES,
+                        help="Profile every game: 'cpu' (the default) for cProfile, sampled stacks and "
+                             "hot-spot call counts, 'calls' for the call counts alone")
+    parser.add_argument("--memory", action="store_true",
+                        help="Record memory per round with tracemalloc and warn about leaks between games")
+    parser.add_argument("--leak_kb", type=int, default=256,
+                        help="With --memory, warn when a game leaves more than this many KB allocated")
+    parser.add_argument("--metrics_port", type=int, default=None,
+                        help="Serve live metrics and a status page on this local port")
+    parser.add_argument("--sprt", action="store_true",
+                        help="Stop each two-model matchup once a sequential test decides it")
+    parser.add_argument("--alpha", type=float, default=0.05,
+                        help="SPRT: chance of declaring a model stronger when the two are even")
+    parser.add_argument("--beta", type=float, default=0.05,
+                        help="SPRT: chance of missing a head-to-head edge of --delta")
+    parser.add_argument("--delta", type=float, default=0.1,
+                        help="SPRT: smallest edge over a 0.5 head-to-head score worth detecting")
+    args = parser.parse_args()
+
+    workers = args.workers or min(os.cpu_count() or 1, args.max_concurrent_calls)
+    games = expand_games(load_spec(args.spec))
+    print(f"Playing {len(games)} games on {workers} workers")
+    stopper = SequentialStopper(games, args.alpha, args.beta, args.delta) if args.sprt else None
+    governor = CostGovernor(load_prices(args.prices), args.soft_budget, args.budget)
+    monitor = None
+    if args.metrics_port is not None:
+        monitor = TournamentMonitor(args.output, governor.prices)
+        MetricsServer(monitor.collect, args.metrics_port).start()
+    run_tournament(games, args.output, workers, args.retries, args.timeout, args.results_db, stopper,
+                   governor, args.trace, args.profile, args.leak_kb if args.memory else None, monitor)
+    print_summary(load_results(os.path.join(args.output, "results.jsonl")))
+    if stopper:
+        stopper.print_report()
@@ -0,0 +1,133 @@
+"""Nested timing spans exported as Chrome Trace Event JSON.
+
+    python secret_hitler_game.py 5 --trace trace.json --player_models ...
+    python tournament.py matchups.json --trace
+    python async_scheduler.py matchups.json --trace trace.json
+
+Open the file in https://ui.perfetto.dev or chrome://tracing. Each game is
+its own track, with spans nesting
+
+    game > round > election_phase, discussion_phase, voting_phase,
+                   legislative_session, executive_action
+         > decision > llm_call > build_prompt, request, backoff, parse
+
+and render (terminal output) and log (file logging) spans wherever they
+happen. Tracing is off until enable() is called; until then span() returns
+a shared no-op context manager and traced functions call straight through.
+"""
+import contextlib
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+
+_NULL_SPAN = contextlib.nullcontext()
+_tracer = None
+
+
+class Tracer:
+    """Collects complete ("X") events. Timestamps come from perf_counter,
+    which is system-wide on Linux, so traces written by different worker
+    processes line up when merged."""
+
+    def __init__(self):
+        self.events = []
+        self.pid = os.getpid()
+        self._local = threading.local()
+        self._tracks = itertools.count(1)
+
+    def begin_track(self, name):
+        """Give the calling thread a new track, named `name` in the viewer."""
+        tid = next(self._tracks)
+        self._local.tid = tid
+        self.events.append({"ph": "M", "name": "thread_name", "pid": self.pid, "tid": tid,
+                            "args": {"name": name}})
+        return tid
+
+    def track(self):
+        return getattr(self._local, "tid", 0)
+
+    def take(self):
+        """Return the events collected so far and start afresh."""
+        events, self.events = self.events, []
+        return events
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        end = time.perf_counter_ns()
+        event = {"ph": "X", "name": self.name, "ts": self.start / 1000, "dur": (end - self.start) / 1000,
+                 "pid": self.tracer.pid, "tid": self.tracer.track()}
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        if self.args:
+            event["args"] = self.args
+        self.tracer.events.append(event)
+        return False
+
+
+def enable():
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(name, **args):
+    if _tracer is None:
+        return _NULL_SPAN
+    return _Span(_tracer, name, args)
+
+
+def traced(name):
+    """Decorator putting every call of a function in a span."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return function(*args, **kwargs)
+            with _Span(_tracer, name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def begin_track(name):
+    if _tracer is not None:
+        _tracer.begin_track(name)
+
+
+def take_events():
+    return _tracer.take() if _tracer is not None else []
+
+
+def write_trace(path, events):
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def merge_traces(paths, path):
+    """Combine trace files (those that exist) into one."""
+    events = []
+    for trace_path in paths:
+        if os.path.exists(trace_path):
+            with open(trace_path) as f:
+                events.extend(json.load(f)["traceEvents"])
+    write_trace(path, events)
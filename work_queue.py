@@ -0,0 +1,268 @@
+"""Tournament work queue shared through one SQLite file.
+
+    python work_queue.py enqueue matchups.json --db /shared/run1.db
+    python work_queue.py work --db /shared/run1.db --output tournaments/run1 --processes 4
+    python work_queue.py status --db /shared/run1.db
+    python work_queue.py export --db /shared/run1.db --output results.jsonl
+
+Any number of `work` processes on any number of hosts pull games from the
+same database. A claimed game is leased to one worker, which renews the lease
+with a heartbeat while the game runs; if the worker dies the lease expires
+and the game goes back to the queue. Completion is at-least-once: a game
+whose lease expired may be played twice, and the first result written wins.
+The database must live on a filesystem with working POSIX locks (a local
+disk, or NFSv4 and most cluster filesystems).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from tournament import expand_games, load_spec, play_game
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+class WorkQueue:
+    def __init__(self, path, lease_seconds=300, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                game_id TEXT PRIMARY KEY,
+                game TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                updated REAL
+            )""")
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires)")
+
+    def _transaction(self, statements):
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers can
+        # never read the same queued row and both claim it.
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            result = statements(cursor)
+            cursor.execute("COMMIT")
+            return result
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, games):
+        """Add games by game_id; games already in the queue are left alone."""
+        now = time.time()
+        rows = [(game["game_id"], json.dumps(game), QUEUED, now) for game in games]
+
+        def insert(cursor):
+            cursor.executemany(
+                "INSERT OR IGNORE INTO jobs (game_id, game, status, updated) VALUES (?, ?, ?, ?)", rows)
+            return cursor.rowcount
+        return self._transaction(insert)
+
+    def claim(self, worker):
+        """Lease the next queued or expired game to `worker` and return
+        (game, attempt), or None if nothing can be claimed right now."""
+        def claim_next(cursor):
+            now = time.time()
+            row = cursor.execute(
+                "SELECT game_id, game, attempts FROM jobs"
+                " WHERE status = ? OR (status = ? AND lease_expires < ?)"
+                " ORDER BY attempts, game_id LIMIT 1",
+                (QUEUED, LEASED, now)).fetchone()
+            if row is None:
+                return None
+            game_id, game, attempts = row
+            if attempts >= self.max_attempts:
+                # The last lease expired without a result
+                cursor.execute(
+                    "UPDATE jobs SET status = ?, worker = NULL, error = ?, updated = ? WHERE game_id = ?",
+                    (FAILED, "Lease expired", now, game_id))
+                return claim_next(cursor)
+            cursor.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = ?, lease_expires = ?, updated = ?"
+                " WHERE game_id = ?",
+                (LEASED, worker, attempts + 1, now + self.lease_seconds, now, game_id))
+            return json.loads(game), attempts + 1
+        return self._transaction(claim_next)
+
+    def heartbeat(self, game_id, worker):
+        """Extend `worker`'s lease; False if the lease was lost."""
+        now = time.time()
+        cursor = self.connection.execute(
+            "UPDATE jobs SET lease_expires = ?, updated = ? WHERE game_id = ? AND worker = ? AND status = ?",
+            (now + self.lease_seconds, now, game_id, worker, LEASED))
+        return cursor.rowcount == 1
+
+    def complete(self, game_id, worker, result):
+        """Record a result unless the game already has one. Returns whether
+        this call wrote it."""
+        cursor = self.connection.execute(
+            "UPDATE jobs SET status = ?, worker = ?, result = ?, error = NULL, updated = ?"
+            " WHERE game_id = ? AND status != ?",
+            (DONE, worker, json.dumps(result), time.time(), game_id, DONE))
+        return cursor.rowcount == 1
+
+    def fail(self, game_id, worker, error):
+        """Requeue a failed game, or mark it failed after max_attempts."""
+        def record_failure(cursor):
+            row = cursor.execute(
+                "SELECT attempts FROM jobs WHERE game_id = ? AND worker = ? AND status = ?",
+                (game_id, worker, LEASED)).fetchone()
+            if row is None:
+                return
+            status = FAILED if row[0] >= self.max_attempts else QUEUED
+            cursor.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, lease_expires = NULL, error = ?, updated = ?"
+                " WHERE game_id = ?",
+                (status, error, time.time(), game_id))
+        self._transaction(record_failure)
+
+    def counts(self):
+        return dict(self.connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+    def pending(self):
+        """Games that are queued or leased and may still produce a result."""
+        counts = self.counts()
+        return counts.get(QUEUED, 0) + counts.get(LEASED, 0)
+
+    def results(self):
+        rows = self.connection.execute(
+            "SELECT game_id, game, status, attempts, result, error FROM jobs"
+            " WHERE status IN (?, ?) ORDER BY game_id", (DONE, FAILED))
+        results = []
+        for game_id, game, status, attempts, result, error in rows:
+            if status == DONE:
+                result = json.loads(result)
+            else:
+                game = json.loads(game)
+                result = {"game_id": game_id, "matchup": game["matchup"], "seed": game["seed"],
+                          "status": "failed", "error": error}
+            result["attempts"] = attempts
+            results.append(result)
+        return results
+
+    def close(self):
+        self.connection.close()
+
+
+def _heartbeat_loop(db_path, game_id, worker, lease_seconds, stop):
+    # SQLite connections cannot be shared across threads
+    queue = WorkQueue(db_path, lease_seconds)
+    try:
+        while not stop.wait(lease_seconds / 3):
+            if not queue.heartbeat(game_id, worker):
+                break
+    finally:
+        queue.close()
+
+
+def run_worker(db_path, output_dir, lease_seconds=300, max_attempts=3, timeout=0, results_db=None,
+               poll_seconds=5):
+    """Claim and play games until no game is queued or leased."""
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    queue = WorkQueue(db_path, lease_seconds, max_attempts)
+    played = 0
+    while True:
+        claimed = queue.claim(worker)
+        if claimed is None:
+            if queue.pending() == 0:
+                break
+            # Other workers hold leases that may still expire
+            time.sleep(poll_seconds)
+            continue
+
+        game, attempt = claimed
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=_heartbeat_loop, args=(db_path, game["game_id"], worker, lease_seconds, stop),
+            daemon=True)
+        heartbeat.start()
+        try:
+            result = play_game(game, output_dir, timeout, results_db)
+        except Exception as e:
+            queue.fail(game["game_id"], worker, repr(e))
+            print(f"{worker} {game['game_id']} failed (attempt {attempt}): {e!r}")
+            continue
+        finally:
+            stop.set()
+            heartbeat.join()
+        result["worker"] = worker
+        written = queue.complete(game["game_id"], worker, result)
+        played += 1
+        print(f"{worker} {game['game_id']}: {result['winner']}"
+              + ("" if written else " (already recorded by another worker)"))
+    queue.close()
+    return played
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Share a Secret Hitler tournament between workers through SQLite.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="Add the games of a matchup spec")
+    enqueue_parser.add_argument("spec", help="JSON matchup spec (see tournament.py)")
+
+    work_parser = subparsers.add_parser("work", help="Play queued games until none are left")
+    work_parser.add_argument("--output", default="tournaments/latest",
+                             help="Directory for this host's per-game logs")
+    work_parser.add_argument("--processes", type=int, default=1,
+                             help="Worker processes to start on this host")
+    work_parser.add_argument("--lease", type=int, default=300,
+                             help="Seconds a claimed game stays leased without a heartbeat")
+    work_parser.add_argument("--max_attempts", type=int, default=3,
+                             help="Attempts before a game is marked failed")
+    work_parser.add_argument("--timeout", type=int, default=0,
+                             help="Seconds before a game is abandoned (0 for no limit)")
+    work_parser.add_argument("--results_db", default=None,
+                             help="Also record every game in this SQLite results store")
+
+    subparsers.add_parser("status", help="Print job counts by status")
+
+    export_parser = subparsers.add_parser("export", help="Write finished and failed games as JSON lines")
+    export_parser.add_argument("--output", default="results.jsonl")
+
+    for subparser in subparsers.choices.values():
+        subparser.add_argument("--db", required=True, help="Path of the shared SQLite queue")
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        queue = WorkQueue(args.db)
+        added = queue.enqueue(expand_games(load_spec(args.spec)))
+        print(f"Queued {added} new games; {queue.counts()}")
+    elif args.command == "work":
+        worker_args = (args.db, args.output, args.lease, args.max_attempts, args.timeout,
+                       args.results_db)
+        if args.processes == 1:
+            run_worker(*worker_args)
+        else:
+            processes = [multiprocessing.Process(target=run_worker, args=worker_args)
+                         for _ in range(args.processes)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        print(f"Queue drained: {WorkQueue(args.db).counts()}")
+    elif args.command == "status":
+        print(WorkQueue(args.db).counts())
+    elif args.command == "export":
+        with open(args.output, "w") as f:
+            for result in WorkQueue(args.db).results():
+                f.write(json.dumps(result) + "\n")
+        print(f"Wrote {args.output}")